@@ -1,15 +1,373 @@
+# matching/candidates/block_candidates.py
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from matching.config.match_config import BLOCKING_PASSES, MAX_BLOCK_PAIRS, SUB_BLOCK_KEYS
+from matching.utils.phonetic import phonetic_column
+from matching.utils.validators import require_columns
+
+
+BLOCK_KEYS = ["ln0", "dob_year"]
+
+# every key column add_pass_keys creates
+PASS_KEY_COLS = BLOCK_KEYS + ["fn0", "ln_soundex", "zip5", "dob_key"]
+
+
+def add_block_keys(df, side):
+    """
+    Add the blocking key columns (last-name initial, DOB year) in place.
+
+    Args:
+        df (pd.DataFrame): Attempts ("att") or voterfile ("vf") frame with
+            last_name_<side> and dob_norm_<side> columns.
+        side (str): "att" or "vf".
+
+    Returns:
+        pd.DataFrame: The same frame, for chaining.
+    """
+    df["ln0"] = df[f"last_name_{side}"].str[0].str.lower()
+    df["dob_year"] = df[f"dob_norm_{side}"].dt.year
+    return df
+
+
+def ensure_block_keys(df, side):
+    """add_block_keys unless the frame already has them (e.g. attempts from prepare_attempts)."""
+    if not all(col in df.columns for col in BLOCK_KEYS):
+        add_block_keys(df, side)
+    return df
+
+
 def block_candidate_pairs(att_df, vf_chunk):
     """Block by last name initial and DOB year as example."""
-    att_df["ln0"] = att_df["last_name_att"].str[0].str.lower()
-    att_df["dob_year"] = att_df["dob_norm_att"].dt.year
-    
-    vf_chunk["ln0"] = vf_chunk["last_name_vf"].str[0].str.lower()
-    vf_chunk["dob_year"] = vf_chunk["dob_norm_vf"].dt.year
+    ensure_block_keys(att_df, "att")
+    add_block_keys(vf_chunk, "vf")
     
     return att_df.merge(
         vf_chunk,
         how="inner",
-        left_on=["ln0", "dob_year"],
-        right_on=["ln0", "dob_year"],
+        left_on=BLOCK_KEYS,
+        right_on=BLOCK_KEYS,
         suffixes=('_att', '_vf'),
-    )
\ No newline at end of file
+    )
+
+
+def add_sub_block_keys(df, side):
+    """Add the secondary keys used to split oversized blocks: ln2 (first two letters) and dob_month."""
+    df["ln2"] = df[f"last_name_{side}"].str[:2].str.lower()
+    df["dob_month"] = df[f"dob_norm_{side}"].dt.month
+    return df
+
+
+def block_size_stats(att_df, vf_chunk, keys=None):
+    """
+    Count attempts, voters and candidate pairs per block.
+
+    Missing key values form their own block, as they do in the merge.
+
+    Args:
+        att_df (pd.DataFrame): Attempts with the key columns.
+        vf_chunk (pd.DataFrame): Voterfile chunk with the key columns.
+        keys (list of str, optional): Block key columns. Defaults to BLOCK_KEYS.
+
+    Returns:
+        pd.DataFrame: keys + n_att, n_vf, pairs; largest blocks first.
+    """
+    keys = BLOCK_KEYS if keys is None else keys
+    n_att = att_df.groupby(keys, dropna=False).size().reset_index(name="n_att")
+    n_vf = vf_chunk.groupby(keys, dropna=False).size().reset_index(name="n_vf")
+    stats = n_att.merge(n_vf, on=keys, how="inner")
+    stats["pairs"] = stats["n_att"].astype("int64") * stats["n_vf"].astype("int64")
+    return stats.sort_values("pairs", ascending=False, ignore_index=True)
+
+
+BLOCK_SIZE_BINS = [0, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, np.inf]
+
+
+def block_size_histogram(stats, bins=None):
+    """
+    Histogram of blocks by candidate-pair count.
+
+    Args:
+        stats (pd.DataFrame): Output of block_size_stats.
+        bins (list, optional): Bin edges on pairs per block. Defaults to BLOCK_SIZE_BINS.
+
+    Returns:
+        pd.DataFrame: One row per bin with n_blocks and total pairs.
+    """
+    bins = BLOCK_SIZE_BINS if bins is None else bins
+    binned = pd.cut(stats["pairs"], bins=bins, right=True).rename("pairs_per_block")
+    return (
+        stats.groupby(binned, observed=False)["pairs"]
+        .agg(n_blocks="size", total_pairs="sum")
+        .reset_index()
+    )
+
+
+def _estimate_bytes_per_row(df, sample_rows=1000):
+    head = df.head(sample_rows)
+    if head.empty:
+        return 0.0
+    return head.memory_usage(deep=True, index=False).sum() / len(head)
+
+
+def capped_block_candidate_pairs(att_df, vf_chunk, max_block_pairs=None, sub_keys=None, max_candidate_bytes=None):
+    """
+    block_candidate_pairs with a cap on the size of any single block.
+
+    Blocks whose attempt x voter product exceeds `max_block_pairs` are split on
+    the next key in `sub_keys` (first two letters of the last name, then birth
+    month), repeating until every block fits or the sub keys run out. Splitting
+    trades a little recall inside very common blocks for a bounded candidate frame.
+
+    The split plan, the final pair count and the candidate frame size are all
+    computed from block_size_stats before any join runs, so an oversized chunk
+    can be rejected before it is materialized.
+
+    Args:
+        att_df (pd.DataFrame): Normalized attempts.
+        vf_chunk (pd.DataFrame): Normalized voterfile chunk.
+        max_block_pairs (int, optional): Cap per block. Defaults to MAX_BLOCK_PAIRS.
+        sub_keys (list of str, optional): Secondary keys. Defaults to SUB_BLOCK_KEYS.
+        max_candidate_bytes (int, optional): Refuse to build a candidate frame
+            estimated to be larger than this. No limit when None.
+
+    Returns:
+        tuple: (candidates, report). candidates has the same columns as
+            block_candidate_pairs. report is a dict with block_stats and
+            histogram (before capping), oversized_blocks, pairs_before,
+            pairs_after, largest_block_before, largest_block_after,
+            bytes_per_pair and est_candidate_bytes.
+
+    Raises:
+        ValueError: If est_candidate_bytes exceeds max_candidate_bytes.
+    """
+    max_block_pairs = MAX_BLOCK_PAIRS if max_block_pairs is None else max_block_pairs
+    sub_keys = SUB_BLOCK_KEYS if sub_keys is None else sub_keys
+
+    ensure_block_keys(att_df, "att")
+    add_block_keys(vf_chunk, "vf")
+    add_sub_block_keys(att_df, "att")
+    add_sub_block_keys(vf_chunk, "vf")
+
+    stats_before = block_size_stats(att_df, vf_chunk, BLOCK_KEYS)
+    levels = [BLOCK_KEYS] + [BLOCK_KEYS + sub_keys[:i + 1] for i in range(len(sub_keys))]
+
+    # Plan: which rows join at which level, and how many pairs each level yields
+    plan = []
+    pairs_after = 0
+    largest_after = 0
+    att_rest, vf_rest = att_df, vf_chunk
+    for level, keys in enumerate(levels):
+        stats = block_size_stats(att_rest, vf_rest, keys)
+        if level < len(levels) - 1:
+            oversized = stats.loc[stats["pairs"] > max_block_pairs, keys]
+        else:
+            oversized = stats.iloc[0:0][keys]
+
+        att_big = att_rest[keys].merge(oversized.assign(_big=True), on=keys, how="left")["_big"].notna().to_numpy()
+        vf_big = vf_rest[keys].merge(oversized.assign(_big=True), on=keys, how="left")["_big"].notna().to_numpy()
+
+        fitting = stats.loc[~stats.index.isin(oversized.index), "pairs"]
+        if len(fitting):
+            largest_after = max(largest_after, int(fitting.max()))
+            pairs_after += int(fitting.sum())
+        plan.append((keys, att_rest[~att_big], vf_rest[~vf_big]))
+        att_rest, vf_rest = att_rest[att_big], vf_rest[vf_big]
+        if oversized.empty:
+            break
+
+    bytes_per_pair = _estimate_bytes_per_row(att_df) + _estimate_bytes_per_row(vf_chunk)
+    est_candidate_bytes = int(pairs_after * bytes_per_pair)
+    if max_candidate_bytes is not None and est_candidate_bytes > max_candidate_bytes:
+        raise ValueError(
+            f"Candidate frame estimated at {est_candidate_bytes / 1e6:.1f} MB ({pairs_after} pairs) "
+            f"exceeds max_candidate_bytes {max_candidate_bytes / 1e6:.1f} MB; "
+            "lower max_block_pairs or the chunk size"
+        )
+
+    parts = [
+        att_part.merge(vf_part, how="inner", on=keys, suffixes=('_att', '_vf'))
+        for keys, att_part, vf_part in plan
+    ]
+    candidates = pd.concat(parts, ignore_index=True)
+    # Secondary keys were only for splitting; drop them (and their suffixed copies)
+    candidates = candidates.drop(columns=[
+        c for c in candidates.columns
+        if c in sub_keys or any(c == f"{k}_att" or c == f"{k}_vf" for k in sub_keys)
+    ])
+
+    report = {
+        "block_stats": stats_before,
+        "histogram": block_size_histogram(stats_before),
+        "oversized_blocks": int((stats_before["pairs"] > max_block_pairs).sum()),
+        "pairs_before": int(stats_before["pairs"].sum()),
+        "pairs_after": pairs_after,
+        "largest_block_before": int(stats_before["pairs"].max()) if len(stats_before) else 0,
+        "largest_block_after": largest_after,
+        "bytes_per_pair": float(bytes_per_pair),
+        "est_candidate_bytes": est_candidate_bytes,
+    }
+    return candidates, report
+
+
+def join_pair_frames(att_part, vf_part, key_cols):
+    """
+    Put attempt rows and their paired voterfile rows side by side, naming
+    columns the way the blocking merge does: key columns once (from the attempt
+    side), other shared columns suffixed _att / _vf.
+
+    Args:
+        att_part (pd.DataFrame): Attempt rows, one per pair.
+        vf_part (pd.DataFrame): Voterfile rows, aligned with att_part.
+        key_cols (list of str): Blocking key columns present on both sides.
+
+    Returns:
+        pd.DataFrame: Candidate pairs with a fresh RangeIndex.
+    """
+    att_part = att_part.reset_index(drop=True)
+    vf_part = vf_part.reset_index(drop=True).drop(columns=[c for c in key_cols if c in vf_part.columns])
+
+    overlap = [c for c in vf_part.columns if c in att_part.columns]
+    att_part = att_part.rename(columns={c: f"{c}_att" for c in overlap})
+    vf_part = vf_part.rename(columns={c: f"{c}_vf" for c in overlap})
+    return pd.concat([att_part, vf_part], axis=1)
+
+
+def add_pass_keys(df, side, key_cols=None):
+    """
+    Add the key columns used by blocking passes, in place.
+
+    Keys: ln0/dob_year (add_block_keys), fn0 (first initial), ln_soundex
+    (Soundex of the normalized last name, reusing ln_soundex_<side> when the
+    frame already has it), zip5 and dob_key (exact DOB).
+    Expects the normalized columns from normalize_attempt_keys /
+    normalize_voterfile_keys.
+
+    Args:
+        df (pd.DataFrame): Normalized attempts or voterfile frame.
+        side (str): "att" or "vf".
+        key_cols (list of str, optional): Only build these keys. Defaults to PASS_KEY_COLS.
+
+    Returns:
+        pd.DataFrame: The same frame, for chaining.
+    """
+    key_cols = PASS_KEY_COLS if key_cols is None else key_cols
+    require_columns(df, [f"fn_norm_{side}", f"ln_norm_{side}", f"zip_norm_{side}", f"dob_norm_{side}"], side)
+    ensure_block_keys(df, side)
+    if "fn0" in key_cols:
+        df["fn0"] = df[f"fn_norm_{side}"].str.strip().str.lower().str[0]
+    if "ln_soundex" in key_cols:
+        df["ln_soundex"] = phonetic_column(df, f"ln_norm_{side}", f"ln_soundex_{side}")
+    if "zip5" in key_cols:
+        df["zip5"] = df[f"zip_norm_{side}"]
+    if "dob_key" in key_cols:
+        df["dob_key"] = df[f"dob_norm_{side}"]
+    return df
+
+
+def _pair_keys(pairs):
+    return pd.MultiIndex.from_arrays([pairs["registration_form_id"], pairs["voter_id"]])
+
+
+def multi_pass_candidate_pairs(att_df, vf_chunk, passes=None, gold_pairs=None):
+    """
+    Block with several key sets and return the union of their candidate pairs.
+
+    Each pass joins on its own keys (rows with a missing key are skipped), the
+    pairs are unioned and deduplicated on (registration_form_id, voter_id), and
+    the first pass that found a pair is kept in `block_pass`.
+
+    Args:
+        att_df (pd.DataFrame): Normalized attempts.
+        vf_chunk (pd.DataFrame): Normalized voterfile chunk.
+        passes (dict, optional): Pass name -> key columns. Defaults to BLOCKING_PASSES.
+        gold_pairs (pd.DataFrame, optional): Known matches (registration_form_id,
+            voter_id) used to measure pair completeness.
+
+    Returns:
+        tuple: (candidates, stats) where candidates has the same layout as
+            block_candidate_pairs plus `block_pass`, and stats has one row per
+            pass plus a "union" row: pairs, new_pairs, reduction_ratio,
+            pair_completeness, seconds and pairs_per_sec.
+    """
+    passes = BLOCKING_PASSES if passes is None else passes
+    require_columns(att_df, ["registration_form_id"], "att_df")
+    require_columns(vf_chunk, ["voter_id"], "vf_chunk")
+    key_cols = sorted({col for keys in passes.values() for col in keys})
+    add_pass_keys(att_df, "att", key_cols)
+    add_pass_keys(vf_chunk, "vf", key_cols)
+
+    att_ids = att_df["registration_form_id"].to_numpy()
+    vf_ids = vf_chunk["voter_id"].to_numpy()
+    total_pairs = len(att_df) * len(vf_chunk)
+
+    gold_keys = None
+    if gold_pairs is not None:
+        gold = gold_pairs[
+            gold_pairs["registration_form_id"].isin(att_df["registration_form_id"])
+            & gold_pairs["voter_id"].isin(vf_chunk["voter_id"])
+        ]
+        gold_keys = _pair_keys(gold.drop_duplicates(["registration_form_id", "voter_id"]))
+
+    def completeness(pairs):
+        if gold_keys is None or len(gold_keys) == 0:
+            return np.nan
+        return gold_keys.isin(_pair_keys(pairs)).mean()
+
+    stats = []
+    pass_pairs = []
+    seen = pd.MultiIndex.from_arrays([[], []])
+    union_start = time.perf_counter()
+    for name, keys in passes.items():
+        start = time.perf_counter()
+        left = att_df[keys].assign(att_pos=np.arange(len(att_df))).dropna(subset=keys)
+        right = vf_chunk[keys].assign(vf_pos=np.arange(len(vf_chunk))).dropna(subset=keys)
+        pairs = left.merge(right, on=keys, how="inner")[["att_pos", "vf_pos"]]
+        pairs["registration_form_id"] = att_ids[pairs["att_pos"].to_numpy()]
+        pairs["voter_id"] = vf_ids[pairs["vf_pos"].to_numpy()]
+        pairs = pairs.drop_duplicates(["registration_form_id", "voter_id"])
+        pairs["block_pass"] = name
+        seconds = time.perf_counter() - start
+
+        pair_index = _pair_keys(pairs)
+        new_pairs = int((~pair_index.isin(seen)).sum())
+        seen = seen.append(pair_index[~pair_index.isin(seen)])
+        pass_pairs.append(pairs)
+
+        stats.append({
+            "pass": name,
+            "keys": "+".join(keys),
+            "pairs": len(pairs),
+            "new_pairs": new_pairs,
+            "reduction_ratio": 1 - len(pairs) / total_pairs if total_pairs else np.nan,
+            "pair_completeness": completeness(pairs),
+            "seconds": seconds,
+            "pairs_per_sec": len(pairs) / seconds if seconds else np.nan,
+        })
+
+    union = (
+        pd.concat(pass_pairs, ignore_index=True)
+        .drop_duplicates(["registration_form_id", "voter_id"], keep="first")
+    )
+    candidates = join_pair_frames(
+        att_df.iloc[union["att_pos"].to_numpy()],
+        vf_chunk.iloc[union["vf_pos"].to_numpy()],
+        key_cols=PASS_KEY_COLS,
+    )
+    candidates["block_pass"] = union["block_pass"].to_numpy()
+    seconds = time.perf_counter() - union_start
+
+    stats.append({
+        "pass": "union",
+        "keys": "",
+        "pairs": len(union),
+        "new_pairs": len(union),
+        "reduction_ratio": 1 - len(union) / total_pairs if total_pairs else np.nan,
+        "pair_completeness": completeness(union),
+        "seconds": seconds,
+        "pairs_per_sec": len(union) / seconds if seconds else np.nan,
+    })
+    return candidates, pd.DataFrame(stats)
@@ -0,0 +1,203 @@
+# matching/candidates/block_index.py
+
+# Build-once blocking index over the normalized voterfile.
+#
+# Layout of an index directory:
+#   voterfile.arrow   normalized voterfile rows (Arrow IPC file, memory-mapped on load)
+#   block_keys.npy    sorted unique encoded block keys
+#   block_offsets.npy block i owns block_rows[block_offsets[i]:block_offsets[i + 1]]
+#   block_rows.npy    voterfile row positions grouped by block key
+#   meta.json         row count and key definition
+#
+# Candidate generation is then a lookup per attempt instead of a merge against
+# every voterfile chunk, so the voterfile is never rescanned at inference time.
+
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from matching.candidates.block_candidates import BLOCK_KEYS, add_block_keys, ensure_block_keys, join_pair_frames
+from matching.gold.gold_pairs import normalize_voterfile_keys
+from matching.utils.validators import require_columns
+
+
+INDEX_TABLE_FILE = "voterfile.arrow"
+INDEX_META_FILE = "meta.json"
+
+
+def encode_block_keys(ln0: pd.Series, dob_year: pd.Series) -> np.ndarray:
+    """
+    Pack (last-name initial, DOB year) into one int64 per row.
+
+    Missing components encode as 0 on both sides, so rows with a missing key
+    still pair up exactly as they do in the pandas merge.
+    """
+    initial = ln0.map(lambda c: ord(c) if isinstance(c, str) and c else 0).to_numpy(dtype=np.int64)
+    year = pd.to_numeric(dob_year, errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+    return initial * 10000 + year
+
+
+def _arrow_table(df: pd.DataFrame, schema: pa.Schema = None) -> pa.Table:
+    """
+    Convert a voterfile chunk to Arrow with a stable schema across chunks.
+    Object columns are stored as strings so an all-null chunk does not fix the type.
+    Categorical columns (e.g. phonetic codes) are stored as plain strings too, since
+    an IPC file cannot change a column's dictionary between chunks.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object or isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("string")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if schema is not None:
+        table = table.select(schema.names).cast(schema)
+    return table
+
+
+def build_block_index(vf_chunks, index_dir: str) -> dict:
+    """
+    Stream voterfile chunks once and write a blocking index to `index_dir`.
+
+    Args:
+        vf_chunks (iterable of pd.DataFrame): Voterfile chunks with the standard
+            *_vf columns (first_name_vf, last_name_vf, zip_raw_vf, dob_raw_vf).
+        index_dir (str): Output directory.
+
+    Returns:
+        dict: Summary with n_rows, n_blocks, max_block_size and build seconds.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    start = time.perf_counter()
+
+    writer = None
+    schema = None
+    categorical_columns = []
+    key_parts = []
+    n_rows = 0
+    try:
+        for idx, vf_chunk in enumerate(vf_chunks):
+            require_columns(vf_chunk, ["first_name_vf", "last_name_vf", "zip_raw_vf", "dob_raw_vf"], "vf_chunk")
+            vf_chunk = normalize_voterfile_keys(vf_chunk)
+            add_block_keys(vf_chunk, "vf")
+            key_parts.append(encode_block_keys(vf_chunk["ln0"], vf_chunk["dob_year"]))
+
+            table = _arrow_table(vf_chunk, schema)
+            if writer is None:
+                categorical_columns = [
+                    col for col in vf_chunk.columns if isinstance(vf_chunk[col].dtype, pd.CategoricalDtype)
+                ]
+                schema = table.schema
+                writer = pa.ipc.new_file(os.path.join(index_dir, INDEX_TABLE_FILE), schema)
+            writer.write_table(table)
+            n_rows += len(vf_chunk)
+            print(f"Block index: chunk {idx} added, {n_rows} voterfile rows so far")
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        raise ValueError("build_block_index: no voterfile chunks to index")
+
+    row_keys = np.concatenate(key_parts)
+    order = np.argsort(row_keys, kind="stable")
+    block_keys, block_starts = np.unique(row_keys[order], return_index=True)
+    block_offsets = np.append(block_starts, len(order)).astype(np.int64)
+
+    np.save(os.path.join(index_dir, "block_keys.npy"), block_keys)
+    np.save(os.path.join(index_dir, "block_offsets.npy"), block_offsets)
+    np.save(os.path.join(index_dir, "block_rows.npy"), order.astype(np.int64))
+
+    summary = {
+        "n_rows": int(n_rows),
+        "n_blocks": int(len(block_keys)),
+        "max_block_size": int(np.diff(block_offsets).max()),
+        "block_keys": BLOCK_KEYS,
+        "categorical_columns": categorical_columns,
+        "build_seconds": round(time.perf_counter() - start, 3),
+    }
+    with open(os.path.join(index_dir, INDEX_META_FILE), "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Block index written to {index_dir}: {summary}")
+    return summary
+
+
+class BlockIndex:
+    """
+    Read-only blocking index loaded from disk. Arrays and the voterfile table are
+    memory-mapped, so opening an index costs almost nothing and only the rows an
+    attempt needs are ever read.
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, INDEX_META_FILE), "r") as f:
+            self.meta = json.load(f)
+        self.block_keys = np.load(os.path.join(index_dir, "block_keys.npy"), mmap_mode="r")
+        self.block_offsets = np.load(os.path.join(index_dir, "block_offsets.npy"), mmap_mode="r")
+        self.block_rows = np.load(os.path.join(index_dir, "block_rows.npy"), mmap_mode="r")
+        source = pa.memory_map(os.path.join(index_dir, INDEX_TABLE_FILE), "r")
+        self.table = pa.ipc.open_file(source).read_all()
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def lookup(self, keys: np.ndarray):
+        """
+        Find the voterfile rows sharing each encoded block key.
+
+        Args:
+            keys (np.ndarray): Encoded block keys, one per attempt.
+
+        Returns:
+            tuple: (att_pos, vf_rows) aligned arrays; attempt att_pos[i] pairs with
+                voterfile row vf_rows[i]. Pairs are ordered by attempt, then by
+                voterfile row, like the inner merge.
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        if len(self.block_keys) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        pos = np.searchsorted(self.block_keys, keys)
+        pos_clipped = np.minimum(pos, len(self.block_keys) - 1)
+        found = (pos < len(self.block_keys)) & (np.asarray(self.block_keys)[pos_clipped] == keys)
+
+        starts = np.where(found, np.asarray(self.block_offsets)[pos_clipped], 0)
+        counts = np.where(found, np.asarray(self.block_offsets)[pos_clipped + 1] - starts, 0)
+
+        att_pos = np.repeat(np.arange(len(keys)), counts)
+        run_starts = np.repeat(np.cumsum(counts) - counts, counts)
+        within = np.arange(counts.sum()) - run_starts
+        vf_rows = np.asarray(self.block_rows)[np.repeat(starts, counts) + within]
+        return att_pos, vf_rows
+
+    def take(self, rows: np.ndarray) -> pd.DataFrame:
+        """Materialize the given voterfile rows as a DataFrame."""
+        df = self.table.take(pa.array(rows, type=pa.int64())).to_pandas()
+        for col in self.meta.get("categorical_columns", []):
+            df[col] = df[col].astype("category")
+        return df
+
+    def candidate_pairs(self, att_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Candidate pairs for `att_df`, equivalent to block_candidate_pairs against
+        the full voterfile but built from index lookups.
+
+        Args:
+            att_df (pd.DataFrame): Attempts with normalized keys (last_name_att, dob_norm_att).
+
+        Returns:
+            pd.DataFrame: One row per (attempt, voter) pair sharing a block, with
+                overlapping column names suffixed _att / _vf as in the merge.
+        """
+        ensure_block_keys(att_df, "att")
+        att_pos, vf_rows = self.lookup(encode_block_keys(att_df["ln0"], att_df["dob_year"]))
+
+        return join_pair_frames(att_df.iloc[att_pos], self.take(vf_rows), key_cols=BLOCK_KEYS)
+
+
+def load_block_index(index_dir: str) -> BlockIndex:
+    """Open a blocking index written by build_block_index."""
+    return BlockIndex(index_dir)
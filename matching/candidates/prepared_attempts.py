@@ -0,0 +1,85 @@
+# matching/candidates/prepared_attempts.py
+
+# Attempts are the small, fixed side of inference: normalize them and compute
+# their block keys once per run instead of once per voterfile chunk, and keep
+# the result on disk so a restarted run skips that work too.
+
+import hashlib
+import os
+
+import pandas as pd
+
+from matching.candidates.block_candidates import add_block_keys
+from matching.gold.gold_pairs import normalize_attempt_keys
+from matching.utils.validators import require_columns
+
+
+# bump when normalize_attempt_keys / add_block_keys change what they produce,
+# so stale Parquet files are not reused
+PREPARED_ATTEMPTS_VERSION = "4"
+
+
+def file_fingerprint(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-1 of a file's bytes, read in blocks."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def prepare_attempts(att_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add normalized keys (normalize_attempt_keys) and block keys (add_block_keys)
+    to an attempts frame, in place. The blocking functions reuse block keys that
+    are already present, so the prepared frame is not recomputed per chunk.
+
+    Args:
+        att_df (pd.DataFrame): Attempts with first_name_att, last_name_att,
+            zip_raw_att and dob_raw_att.
+
+    Returns:
+        pd.DataFrame: The same frame, for chaining.
+    """
+    require_columns(att_df, ["first_name_att", "last_name_att", "zip_raw_att", "dob_raw_att"], "attempts")
+    normalize_attempt_keys(att_df)
+    add_block_keys(att_df, "att")
+    return att_df
+
+
+def prepared_attempts_path(attempts_path: str, cache_dir: str) -> str:
+    """Parquet path for `attempts_path`, keyed by its content hash and PREPARED_ATTEMPTS_VERSION."""
+    key = hashlib.sha1(f"{file_fingerprint(attempts_path)}:{PREPARED_ATTEMPTS_VERSION}".encode()).hexdigest()
+    return os.path.join(cache_dir, f"attempts_{key[:16]}.parquet")
+
+
+def load_prepared_attempts(attempts_path: str, load_fn, cache_dir: str = None) -> pd.DataFrame:
+    """
+    Load and prepare attempts, reusing a Parquet copy from an earlier run when
+    the input file is unchanged.
+
+    Args:
+        attempts_path (str): Attempts CSV.
+        load_fn (callable): Reads and filters `attempts_path` into a frame with
+            the *_att key columns (e.g. load_inference_attempts).
+        cache_dir (str, optional): Where prepared frames are kept. No caching when None.
+
+    Returns:
+        pd.DataFrame: Prepared attempts (see prepare_attempts).
+    """
+    if cache_dir is None:
+        return prepare_attempts(load_fn(attempts_path))
+
+    path = prepared_attempts_path(attempts_path, cache_dir)
+    if os.path.exists(path):
+        att_df = pd.read_parquet(path)
+        print(f"Loaded {len(att_df)} prepared attempts from {path}")
+        return att_df
+
+    att_df = prepare_attempts(load_fn(attempts_path))
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    att_df.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+    print(f"Saved {len(att_df)} prepared attempts to {path}")
+    return att_df
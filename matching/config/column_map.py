@@ -50,6 +50,31 @@ ATTEMPT_COL_MAP = {
     "eligible_voting_age": "eligible_voting_age",
 }
 
+# read types for the attempts and matches exports (matching/loaders/load_attempts.py);
+# columns not listed here are read as strings
+ATTEMPT_EXTRA_COLUMNS = ["upload_time"]     # loaded besides ATTEMPT_COL_MAP (inference filters on it)
+ATTEMPT_DATE_COLUMNS = ["upload_time"]
+ATTEMPT_FLOAT_COLUMNS = ["confidence_score", "voting_address_latitude", "voting_address_longitude"]
+# low-cardinality columns loaded as categoricals
+ATTEMPT_CATEGORICAL_COLUMNS = [
+    "type_code",
+    "name_suffix",
+    "name_prefix",
+    "voting_city",
+    "voting_state",
+    "mailing_city",
+    "gender",
+    "party",
+    "ethnicity",
+    "data_entry_county",
+    "program_state",
+    "collection_location_county",
+    "collection_location_city",
+    "address_validated",
+    "eligible_voting_age",
+]
+MATCH_COLUMNS = ["registration_form_id", "type_code", "confidence_score"]
+
 VOTERFILE_COL_MAP = {
     # identity
     "voter_id": "voter_id",
@@ -98,4 +123,37 @@ VOTERFILE_COL_MAP = {
 
     # status
     "voter_status": "voter_status",
-}
\ No newline at end of file
+}
+
+# voterfile columns the matching scripts read (stream_voterfile projection),
+# renamed to the names blocking and features expect; the address keeps its raw
+# name because addr_jw reads residence_address_1
+MATCHING_VOTERFILE_COL_MAP = {
+    "voter_id": "voter_id",
+    "first_name": "first_name_vf",
+    "last_name": "last_name_vf",
+    "residence_zipcode": "zip_raw_vf",
+    "birth_date": "dob_raw_vf",
+    "residence_address_1": "residence_address_1",
+}
+
+# column types in a voterfile Parquet snapshot (matching/loaders/voterfile_snapshot.py);
+# every other column is stored as a string, so ZIPs and ids keep leading zeros
+SNAPSHOT_DATE_COLUMNS = ["birth_date", "reg_date"]
+# low-cardinality columns stored dictionary-encoded (categorical when loaded)
+SNAPSHOT_DICTIONARY_COLUMNS = [
+    "county",
+    "residence_city_usps",
+    "residence_state",
+    "mailing_state",
+    "gender",
+    "race",
+    "party",
+    "precinct_group",
+    "congressional_district",
+    "house_district",
+    "senate_district",
+    "county_commission_district",
+    "school_board_district",
+    "voter_status",
+]
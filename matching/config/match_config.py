@@ -10,10 +10,80 @@ TRUE_MATCH_TYPES = [
     "Cross-state move",
 ]
 
-# features we use in the toy model
+# ZIP buckets for build_gold_pairs_partitioned (voterfile spilled to disk per bucket)
+GOLD_ZIP_PARTITIONS = 32
+
+# features the default model is fit on, in order (names registered in
+# matching/features/registry.FEATURES; the shipped model.pkl expects exactly these)
 FEATURE_COLS = [
     "fn_jw",
     "ln_jw",
     "dob_exact",
     "zip_exact",
-]
\ No newline at end of file
+    "dob_year_match",
+    "dob_month_match",
+    "dob_day_match",
+    "dob_levenshtein_sim",
+    "dob_month_day_swapped",
+    "addr_jw",
+]
+
+# max distinct names kept in the shared name-normalization cache
+NAME_CACHE_MAXSIZE = 500_000
+# inference persists the name cache every this many chunks (and once at the end);
+# each save re-serializes the whole cache
+NAME_CACHE_SAVE_EVERY = 20
+
+# size of the optional cross-chunk similarity cache (0 disables it).
+# Off by default: for rapidfuzz JW/Levenshtein a Python-level lookup costs more
+# than rescoring, so per-chunk deduplication alone is faster.
+PAIR_CACHE_MAXSIZE = 0
+
+# phonetic codes stored on the normalized attempts / voterfile (add_phonetic_columns):
+# "soundex", plus "metaphone" (Double Metaphone, needs the fuzzy package) if wanted
+PHONETIC_ENCODERS = ["soundex"]
+
+# name_swap feature: both crossed first/last Jaro-Winkler scores must reach this
+NAME_SWAP_THRESHOLD = 0.9
+
+# multi-pass blocking: pass name -> key columns (built by add_pass_keys).
+# Candidate pairs are the union of all passes, deduplicated on
+# (registration_form_id, voter_id).
+BLOCKING_PASSES = {
+    "ln0_dob_year": ["ln0", "dob_year"],
+    "ln_soundex_fn0": ["ln_soundex", "fn0"],
+    "zip_fn0": ["zip5", "fn0"],
+    "dob_exact": ["dob_key"],
+}
+
+# blocks with more candidate pairs than this are split on SUB_BLOCK_KEYS, in order,
+# until they fit (see capped_block_candidate_pairs)
+MAX_BLOCK_PAIRS = 2_000_000
+SUB_BLOCK_KEYS = ["ln2", "dob_month"]
+
+# match_prob at or above which a pair counts as a predicted match
+MATCH_THRESHOLD = 0.8
+
+# cascade scoring (matching/modeling/cascade.py): features computed for every
+# candidate pair; the rest are only computed for pairs that can still reach
+# MATCH_THRESHOLD. Features the model does not use are ignored.
+CASCADE_STAGE1_FEATURES = ["dob_exact", "zip_exact", "fn_jw", "ln_jw"]
+
+# candidates kept per registration_form_id by the streaming best-match reducer
+TOP_K_MATCHES = 3
+
+# address negatives only compare addresses sharing these keys (see address_index_keys);
+# ["house_number", "street_name"] also works when ZIPs are unreliable
+ADDRESS_NEGATIVE_KEYS = ["zip", "house_number"]
+
+# negatives generated per positive by each strategy in generate_hard_negatives.
+# Fractions are allowed (0.5 = one negative for a random half of the positives);
+# for "address" the value is the cap per positive on address look-alikes.
+NEGATIVE_MIX = {
+    "zip": 1,
+    "dob": 1,
+    "initials": 1,
+    "random": 1,
+    "address": 5,
+    "phonetic": 1,
+}
@@ -8,6 +8,8 @@
 # matching/features/address_features.py
 from rapidfuzz.distance import JaroWinkler
 
+from matching.features.batch_similarity import pairwise_similarity_series
+
 def compute_address_similarity(addr1: str, addr2: str) -> float:
     """
     Compute normalized similarity between two address strings using Jaro-Winkler.
@@ -15,4 +17,11 @@ def compute_address_similarity(addr1: str, addr2: str) -> float:
     """
     addr1 = addr1 or ""
     addr2 = addr2 or ""
-    return JaroWinkler.normalized_similarity(addr1, addr2)
\ No newline at end of file
+    return JaroWinkler.normalized_similarity(addr1, addr2)
+
+def compute_address_similarity_series(addr1, addr2):
+    """
+    Column-wise compute_address_similarity over two aligned Series.
+    Returns a float Series indexed like addr1.
+    """
+    return pairwise_similarity_series(addr1, addr2, JaroWinkler)
@@ -0,0 +1,209 @@
+# matching/features/batch_similarity.py
+
+# Column-wise string similarity for candidate pairs.
+# Scores whole columns in one call to rapidfuzz instead of one Python call per row.
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import process
+
+
+def coalesce_none(values) -> np.ndarray:
+    """
+    Convert a column to an object array, replacing None with "".
+
+    This mirrors the `value or ""` idiom used by the row-wise features: None
+    becomes an empty string while NaN is left alone (rapidfuzz scores NaN as 0.0).
+
+    Args:
+        values (pd.Series or array-like): Column of strings.
+
+    Returns:
+        np.ndarray: Object array safe to pass to rapidfuzz.
+    """
+    arr = np.array(values, dtype=object, copy=True)
+    arr[np.equal(arr, None)] = ""
+    return arr
+
+
+def pairwise_similarity(left, right, metric) -> np.ndarray:
+    """
+    Normalized similarity of element-wise pairs (left[i], right[i]).
+
+    The batch is scored with `metric.normalized_distance` and converted as
+    1 - distance, which is how rapidfuzz computes `normalized_similarity` for a
+    single pair. Scoring the similarity directly in cpdist can differ in the
+    last bit, and the trained models expect the scalar values.
+
+    Args:
+        left (array-like): Left-hand strings (None is treated as "").
+        right (array-like): Right-hand strings, same length as `left`.
+        metric: rapidfuzz.distance metric module, e.g. JaroWinkler or Levenshtein.
+
+    Returns:
+        np.ndarray: float64 scores, identical to `metric.normalized_similarity` pair by pair.
+    """
+    left = coalesce_none(left)
+    right = coalesce_none(right)
+    if len(left) != len(right):
+        raise ValueError(f"pairwise_similarity: length mismatch {len(left)} != {len(right)}")
+    if len(left) == 0:
+        return np.empty(0, dtype=np.float64)
+    dist = process.cpdist(left, right, scorer=metric.normalized_distance, dtype=np.float64)
+    return 1.0 - dist
+
+
+def pairwise_similarity_series(left: pd.Series, right: pd.Series, metric) -> pd.Series:
+    """Series wrapper around pairwise_similarity that keeps the left index."""
+    return pd.Series(pairwise_similarity(left, right, metric), index=left.index)
+
+
+def _factorize_values(values: np.ndarray):
+    """Factorize an object array, giving missing values (NaN) their own code."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    return codes.astype(np.int64), np.asarray(uniques, dtype=object)
+
+
+def _cache_key(value):
+    # NaN is not equal to itself, so store missing values under None
+    return None if pd.isna(value) else value
+
+
+def pairwise_ratio(left, right, scorer) -> np.ndarray:
+    """
+    Element-wise rapidfuzz.fuzz scores (0-100) rescaled to 0-1.
+
+    Args:
+        left (array-like): Left-hand strings (None is treated as "").
+        right (array-like): Right-hand strings, same length as `left`.
+        scorer: rapidfuzz.fuzz scorer, e.g. fuzz.token_sort_ratio or fuzz.partial_ratio.
+
+    Returns:
+        np.ndarray: float64 scores, equal to `scorer(a, b) / 100` pair by pair.
+    """
+    left = coalesce_none(left)
+    right = coalesce_none(right)
+    if len(left) != len(right):
+        raise ValueError(f"pairwise_ratio: length mismatch {len(left)} != {len(right)}")
+    if len(left) == 0:
+        return np.empty(0, dtype=np.float64)
+    return process.cpdist(left, right, scorer=scorer, dtype=np.float64) / 100.0
+
+
+def factorize_strings(values):
+    """
+    Codes and distinct values of a string column, with None coalesced to ""
+    and NaN kept as its own value (the same inputs the dedup scorers see).
+
+    Returns:
+        tuple: (codes int64 array, uniques object array).
+    """
+    return _factorize_values(coalesce_none(values))
+
+
+def score_code_pairs(left_codes, left_uniques, right_codes, right_uniques, score_fn, name,
+                     cache=None, stats=None) -> np.ndarray:
+    """
+    Score factorized pairs once per distinct (left, right) code combination.
+
+    Args:
+        left_codes, right_codes (np.ndarray): Codes from factorize_strings, same length.
+        left_uniques, right_uniques (np.ndarray): The matching distinct values.
+        score_fn (callable): Scores two aligned object arrays, e.g.
+            lambda a, b: pairwise_similarity(a, b, JaroWinkler).
+        name (str): Scorer name used in cache keys.
+        cache (LRUCache, optional): Scores carried across calls.
+        stats (dict, optional): Counters updated in place: pairs, unique_pairs,
+            cache_hits, scored.
+
+    Returns:
+        np.ndarray: float64 scores aligned with the codes.
+    """
+    if len(left_codes) != len(right_codes):
+        raise ValueError(f"dedup scoring: length mismatch {len(left_codes)} != {len(right_codes)}")
+    n_right = max(len(right_uniques), 1)
+    inverse, unique_codes = pd.factorize(left_codes * n_right + right_codes)
+    uniq_left = left_uniques[unique_codes // n_right]
+    uniq_right = right_uniques[unique_codes % n_right]
+
+    scores = np.empty(len(unique_codes), dtype=np.float64)
+    to_score = np.ones(len(unique_codes), dtype=bool)
+    keys = None
+    if cache is not None:
+        keys = [(name, _cache_key(a), _cache_key(b)) for a, b in zip(uniq_left, uniq_right)]
+        for i, key in enumerate(keys):
+            value = cache.get(key)
+            if value is not None:
+                scores[i] = value
+                to_score[i] = False
+
+    if to_score.any():
+        new_scores = score_fn(uniq_left[to_score], uniq_right[to_score])
+        scores[to_score] = new_scores
+        if cache is not None:
+            for i, value in zip(np.flatnonzero(to_score), new_scores):
+                cache.put(keys[i], float(value))
+
+    if stats is not None:
+        n_scored = int(to_score.sum())
+        stats["pairs"] = stats.get("pairs", 0) + len(left_codes)
+        stats["unique_pairs"] = stats.get("unique_pairs", 0) + len(unique_codes)
+        stats["cache_hits"] = stats.get("cache_hits", 0) + len(unique_codes) - n_scored
+        stats["scored"] = stats.get("scored", 0) + n_scored
+
+    return scores[inverse]
+
+
+def _dedup_scores(left, right, score_fn, name, cache=None, stats=None) -> np.ndarray:
+    """Factorize both columns and score each distinct (left, right) tuple once."""
+    left_codes, left_uniques = factorize_strings(left)
+    right_codes, right_uniques = factorize_strings(right)
+    return score_code_pairs(left_codes, left_uniques, right_codes, right_uniques, score_fn, name,
+                            cache=cache, stats=stats)
+
+
+def dedup_pairwise_similarity(left, right, metric, cache=None, stats=None) -> np.ndarray:
+    """
+    pairwise_similarity that scores each distinct (left, right) tuple only once.
+
+    The pairs are collapsed to unique tuples, tuples already in `cache` are
+    reused, the rest are scored in one cpdist call, and the scores are
+    broadcast back to every row. Output is identical to pairwise_similarity.
+
+    Args:
+        left (array-like): Left-hand strings (None is treated as "").
+        right (array-like): Right-hand strings, same length as `left`.
+        metric: rapidfuzz.distance metric module, e.g. JaroWinkler.
+        cache (LRUCache, optional): Scores carried across calls, keyed by
+            (metric name, left, right). No cross-call reuse when None.
+        stats (dict, optional): Counters updated in place: pairs, unique_pairs,
+            cache_hits, scored.
+
+    Returns:
+        np.ndarray: float64 scores aligned with the inputs.
+    """
+    return _dedup_scores(
+        left, right,
+        lambda a, b: pairwise_similarity(a, b, metric),
+        getattr(metric, "__name__", repr(metric)),
+        cache=cache,
+        stats=stats,
+    )
+
+
+def dedup_pairwise_ratio(left, right, scorer, cache=None, stats=None) -> np.ndarray:
+    """pairwise_ratio with the same per-distinct-pair deduplication and caching as dedup_pairwise_similarity."""
+    return _dedup_scores(
+        left, right,
+        lambda a, b: pairwise_ratio(a, b, scorer),
+        getattr(scorer, "__name__", repr(scorer)),
+        cache=cache,
+        stats=stats,
+    )
+
+
+def dedup_pairwise_similarity_series(left: pd.Series, right: pd.Series, metric,
+                                     cache=None, stats=None) -> pd.Series:
+    """Series wrapper around dedup_pairwise_similarity that keeps the left index."""
+    scores = dedup_pairwise_similarity(left, right, metric, cache=cache, stats=stats)
+    return pd.Series(scores, index=left.index)
@@ -2,9 +2,12 @@
 # Add boolean or similarity features comparing year, month, day separately
 
 
+import numpy as np
 import pandas as pd
 from rapidfuzz.distance import Levenshtein
 
+from matching.features.batch_similarity import dedup_pairwise_similarity
+
 def safe_str_date(d):
     """Convert date to a normalized string YYYYMMDD or empty string if NaT/NA."""
     if pd.isna(d):
@@ -48,4 +51,55 @@ def dob_month_day_swapped(dob1, dob2):
         return 0
     if dob1.year != dob2.year:
         return 0
-    return int(dob1.month == dob2.day and dob1.day == dob2.month)
\ No newline at end of file
+    return int(dob1.month == dob2.day and dob1.day == dob2.month)
+
+# Column-wise versions of the DOB features above.
+# Each takes two datetime Series and returns a Series aligned to dob1,
+# with exactly the same values as applying the scalar function row by row.
+
+def _as_datetime(d):
+    return d if pd.api.types.is_datetime64_any_dtype(d) else pd.to_datetime(d, errors="coerce")
+
+def _both_present(dob1, dob2):
+    return dob1.notna().to_numpy() & dob2.notna().to_numpy()
+
+def _masked_int(values, mask, index):
+    return pd.Series(np.where(mask, values, False).astype(np.int64), index=index)
+
+def dob_exact_match_series(dob1, dob2):
+    dob1, dob2 = _as_datetime(dob1), _as_datetime(dob2)
+    eq = dob1.to_numpy() == dob2.to_numpy()
+    return _masked_int(eq, _both_present(dob1, dob2), dob1.index)
+
+def dob_year_match_series(dob1, dob2):
+    dob1, dob2 = _as_datetime(dob1), _as_datetime(dob2)
+    eq = dob1.dt.year.to_numpy() == dob2.dt.year.to_numpy()
+    return _masked_int(eq, _both_present(dob1, dob2), dob1.index)
+
+def dob_month_match_series(dob1, dob2):
+    dob1, dob2 = _as_datetime(dob1), _as_datetime(dob2)
+    eq = dob1.dt.month.to_numpy() == dob2.dt.month.to_numpy()
+    return _masked_int(eq, _both_present(dob1, dob2), dob1.index)
+
+def dob_day_match_series(dob1, dob2):
+    dob1, dob2 = _as_datetime(dob1), _as_datetime(dob2)
+    eq = dob1.dt.day.to_numpy() == dob2.dt.day.to_numpy()
+    return _masked_int(eq, _both_present(dob1, dob2), dob1.index)
+
+def dob_levenshtein_similarity_series(dob1, dob2, cache=None, stats=None):
+    """
+    Column-wise dob_levenshtein_similarity (keeps the same /100 scaling).
+    Distinct DOB string pairs are scored once; see dedup_pairwise_similarity.
+    """
+    dob1, dob2 = _as_datetime(dob1), _as_datetime(dob2)
+    s1 = dob1.dt.strftime("%Y%m%d")
+    s2 = dob2.dt.strftime("%Y%m%d")
+    sim = dedup_pairwise_similarity(s1, s2, Levenshtein, cache=cache, stats=stats) / 100.0
+    return pd.Series(np.where(_both_present(dob1, dob2), sim, 0.0), index=dob1.index)
+
+def dob_month_day_swapped_series(dob1, dob2):
+    dob1, dob2 = _as_datetime(dob1), _as_datetime(dob2)
+    y1, m1, d1 = dob1.dt.year.to_numpy(), dob1.dt.month.to_numpy(), dob1.dt.day.to_numpy()
+    y2, m2, d2 = dob2.dt.year.to_numpy(), dob2.dt.month.to_numpy(), dob2.dt.day.to_numpy()
+    swapped = (y1 == y2) & (m1 == d2) & (d1 == m2)
+    return _masked_int(swapped, _both_present(dob1, dob2), dob1.index)
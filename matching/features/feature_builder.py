@@ -1,24 +1,46 @@
+from functools import partial
+
 import pandas as pd
 from rapidfuzz.distance import JaroWinkler
 
 from matching.config.match_config import FEATURE_COLS
 from matching.utils.validators import require_columns
-from matching.features.address_features import compute_address_similarity
+from matching.features.address_features import (
+    compute_address_similarity,
+    compute_address_similarity_series,
+)
+from matching.features.batch_similarity import pairwise_similarity, score_code_pairs
 from matching.features.date_features import (
     dob_year_match,
     dob_month_match,
     dob_day_match,
     dob_levenshtein_similarity,
     dob_month_day_swapped,
+    dob_exact_match_series,
+    dob_year_match_series,
+    dob_month_match_series,
+    dob_day_match_series,
+    dob_levenshtein_similarity_series,
+    dob_month_day_swapped_series,
 )
 
+from matching.features.name_features import NAME_FEATURE_COLS, add_name_code_columns
 from matching.features.name_normalization import normalize_name_series
+from matching.features.registry import FEATURES, Feature
 
 
 # Integration in pipeline:
 # Extend compute_similarity() to call new feature computations from these new modules.
 # Update add_features() to include these additional features columns.
 
+# The default model's features, in the order it was fit on (config.FEATURE_COLS)
+SIMILARITY_FEATURE_COLS = list(FEATURE_COLS)
+
+# Base similarity features plus the phonetic / nickname / surname / swap
+# features from name_features.py. Models trained on either list work: the
+# inference scripts build whatever columns the model was fit on.
+ALL_FEATURE_COLS = SIMILARITY_FEATURE_COLS + NAME_FEATURE_COLS
+
 def safe_equal(a, b):
     """
     Safely compare two values for equality, returning False if any value is NaN.
@@ -85,65 +107,182 @@ def compute_similarity(row):
     return row
 
 
-def add_features(df: pd.DataFrame):
+def safe_equal_series(a: pd.Series, b: pd.Series) -> pd.Series:
+    """Column-wise safe_equal: True where values are equal and neither is missing."""
+    present = a.notna().to_numpy() & b.notna().to_numpy()
+    eq = a.eq(b).fillna(False).to_numpy(dtype=bool)
+    return pd.Series(eq & present, index=a.index)
+
+
+# Registered features (the SIMILARITY_FEATURE_COLS). Each takes a FeatureContext
+# and returns values aligned with ctx.df; see matching/features/registry.py.
+NAME_INPUTS = {
+    "fn_jw": ["first_name_att", "first_name_vf"],
+    "ln_jw": ["last_name_att", "last_name_vf"],
+}
+DOB_INPUTS = ["dob_norm_att", "dob_norm_vf"]
+
+
+def _name_jw(ctx, att_col, vf_col):
+    return score_code_pairs(
+        *ctx.factorized(att_col), *ctx.factorized(vf_col),
+        lambda a, b: pairwise_similarity(a, b, JaroWinkler), JaroWinkler.__name__,
+        cache=ctx.pair_cache, stats=ctx.stats,
+    )
+
+
+for _name, (_att_col, _vf_col) in NAME_INPUTS.items():
+    FEATURES.add(Feature(_name, partial(_name_jw, att_col=_att_col, vf_col=_vf_col), inputs=[_att_col, _vf_col]))
+
+
+@FEATURES.register("dob_exact", inputs=DOB_INPUTS)
+def _dob_exact(ctx):
+    return dob_exact_match_series(ctx.df["dob_norm_att"], ctx.df["dob_norm_vf"])
+
+
+@FEATURES.register("zip_exact", inputs=["zip_norm_att", "zip_norm_vf"])
+def _zip_exact(ctx):
+    return safe_equal_series(ctx.df["zip_norm_att"], ctx.df["zip_norm_vf"]).astype(int)
+
+
+for _name, _series_fn in {
+    "dob_year_match": dob_year_match_series,
+    "dob_month_match": dob_month_match_series,
+    "dob_day_match": dob_day_match_series,
+    "dob_month_day_swapped": dob_month_day_swapped_series,
+}.items():
+    FEATURES.add(Feature(
+        _name,
+        lambda ctx, fn=_series_fn: fn(ctx.df["dob_norm_att"], ctx.df["dob_norm_vf"]),
+        inputs=DOB_INPUTS,
+    ))
+
+
+@FEATURES.register("dob_levenshtein_sim", inputs=DOB_INPUTS)
+def _dob_levenshtein_sim(ctx):
+    return dob_levenshtein_similarity_series(
+        ctx.df["dob_norm_att"], ctx.df["dob_norm_vf"], cache=ctx.pair_cache, stats=ctx.stats
+    )
+
+
+@FEATURES.register("addr_jw", optional_inputs=["voting_street_address_one", "residence_address_1"])
+def _addr_jw(ctx):
+    return compute_address_similarity_series(
+        ctx.column("voting_street_address_one"), ctx.column("residence_address_1")
+    )
+
+
+def model_feature_cols(model) -> list:
+    """
+    Feature columns a model expects, in order: a ModelBundle's feature_cols, a
+    fitted estimator's feature_names_in_, else SIMILARITY_FEATURE_COLS.
+    """
+    names = getattr(model, "feature_cols", None)
+    if names is None:
+        names = getattr(model, "feature_names_in_", None)
+    return SIMILARITY_FEATURE_COLS if names is None else list(names)
+
+
+def compute_similarity_columns(df: pd.DataFrame, pair_cache=None, stats=None,
+                               feature_cols=None, timings=None) -> pd.DataFrame:
+    """
+    Compute the compute_similarity features for every row at once.
+
+    Works on whole columns (NumPy arrays and rapidfuzz's pairwise cpdist) rather
+    than building a Series per row, and produces the same values as
+    `df.apply(compute_similarity, axis=1)`. Name and DOB-string comparisons are
+    deduplicated so each distinct pair is scored once; address pairs are nearly
+    all distinct, so they are scored directly.
+
+    Args:
+        df (pd.DataFrame): Candidate pairs with normalized name, DOB and ZIP columns.
+        pair_cache (LRUCache, optional): Similarity scores shared across chunks.
+        stats (dict, optional): Comparison counters updated in place
+            (pairs, unique_pairs, cache_hits, scored).
+        feature_cols (list of str, optional): Registered features to return
+            (see FEATURES). Defaults to SIMILARITY_FEATURE_COLS; features that
+            are not requested are not computed.
+        timings (dict, optional): Filled with seconds per computed feature.
+
+    Returns:
+        pd.DataFrame: The requested feature columns indexed like df.
+    """
+    feature_cols = SIMILARITY_FEATURE_COLS if feature_cols is None else list(feature_cols)
+    return FEATURES.compute(df, feature_cols, pair_cache=pair_cache, stats=stats, timings=timings)
+
+
+NAME_COLUMNS = ["first_name_att", "last_name_att", "first_name_vf", "last_name_vf"]
+
+
+def normalize_name_columns(df: pd.DataFrame, feature_cols=None) -> pd.DataFrame:
+    """
+    Normalize the NAME_COLUMNS present in df (in place), as add_features does.
+
+    Phonetic code columns that `feature_cols` need and df lacks are added first,
+    from the names as entered (add_name_code_columns).
+    """
+    if feature_cols is not None:
+        add_name_code_columns(df, feature_cols)
+    for col in NAME_COLUMNS:
+        if col in df.columns:
+            df[col] = normalize_name_series(df[col])
+    return df
+
+
+def add_features(df: pd.DataFrame, pair_cache=None, feature_cols=None, model=None):
     """
     Prepare the DataFrame and add similarity features.
 
     This function:
-    - Checks for required columns
+    - Resolves the features to build (from `model`, `feature_cols` or the default)
+    - Checks the input columns those features declare
     - Normalizes names
-    - Applies compute_similarity row-wise
+    - Computes the features column-wise through the feature registry, timing each one
     - Extracts feature matrix X and optional target y
 
     Args:
         df (pd.DataFrame): DataFrame containing raw columns to compute features from.
+        pair_cache (LRUCache, optional): Similarity scores carried across chunks.
+        feature_cols (list of str, optional): Feature columns to build.
+            Defaults to SIMILARITY_FEATURE_COLS.
+        model (optional): Fitted model; when given, exactly the columns it was
+            fit on are built (model_feature_cols) and `feature_cols` is ignored.
 
     Returns:
         tuple: (X, y) where X is a DataFrame of feature columns,
                and y is the target series if available, otherwise None.
     """
     print(f"add_features: processing chunk with {len(df)} rows")
+    if model is not None:
+        feature_cols = model_feature_cols(model)
+    feature_cols = SIMILARITY_FEATURE_COLS if feature_cols is None else list(feature_cols)
 
-    needed = [
-        "first_name_att", "first_name_vf",
-        "last_name_att", "last_name_vf",
-        "dob_norm_att", "dob_norm_vf",
-        "zip_norm_att", "zip_norm_vf"
-    ]
-
-    # Ensure required columns exist
-    require_columns(df, needed, "train_df")
-
-    # Normalize name columns before similarity computation
-    df["first_name_att"] = normalize_name_series(df["first_name_att"])
-    df["last_name_att"] = normalize_name_series(df["last_name_att"])
-    df["first_name_vf"] = normalize_name_series(df["first_name_vf"])
-    df["last_name_vf"] = normalize_name_series(df["last_name_vf"])
-
-    # Apply compute_similarity function to all rows
-    df = df.apply(compute_similarity, axis=1)
-    
-    feature_cols = [
-        "fn_jw",
-        "ln_jw",
-        "dob_exact",
-        "zip_exact",
-        "dob_year_match",
-        "dob_month_match",
-        "dob_day_match",
-        "dob_levenshtein_sim",
-        "dob_month_day_swapped",
-        "addr_jw"
-    ]
-
-    # If target column exists, add it to needed columns for validation
-    if "is_match" in df.columns:
-        needed.append("is_match")
-    
+    # Ensure the columns the requested features read exist
+    needed = FEATURES.required_columns(feature_cols)
     require_columns(df, needed, "train_df")
 
-    # Extract feature matrix
-    X = df[feature_cols]
+    # Phonetic codes from the names as entered, then nickname/accent normalization
+    normalize_name_columns(df, feature_cols)
+
+    # Compute the requested features over whole columns
+    stats = {}
+    timings = {}
+    X = compute_similarity_columns(df, pair_cache=pair_cache, stats=stats, feature_cols=feature_cols,
+                                   timings=timings)
+    if stats.get("pairs"):
+        saved = stats["pairs"] - stats["scored"]
+        print(
+            f"add_features: scored {stats['scored']} of {stats['pairs']} string comparisons "
+            f"({saved} saved: {stats['pairs'] - stats['unique_pairs']} duplicates, "
+            f"{stats['cache_hits']} cache hits)"
+        )
+    if timings and len(df):
+        slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)[:3]
+        print(
+            f"add_features: {len(timings)} features in {sum(timings.values()):.3f}s; slowest: "
+            + ", ".join(f"{name} {sec:.3f}s ({len(df) / sec:,.0f} rows/sec)" if sec > 0 else f"{name} 0s"
+                        for name, sec in slowest)
+        )
 
     # Extract target vector if available
     y = df["is_match"] if "is_match" in df.columns else None
@@ -0,0 +1,284 @@
+# matching/features/name_features.py
+
+# Phonetic, nickname, compound-surname and swap features for candidate pairs,
+# registered in FEATURES. Everything works on whole columns: phonetic codes and
+# nickname groups are computed once per distinct name, string scores once per
+# distinct pair.
+#
+# Phonetic features compare the fn/ln_<encoder>_att / _vf categorical code
+# columns (matching/utils/phonetic.py). Blocked candidate frames already carry
+# the PHONETIC_ENCODERS ones from normalize_attempt_keys /
+# normalize_voterfile_keys; add_name_code_columns fills in the rest before
+# nickname normalization, so codes always describe the names as entered.
+
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz
+from rapidfuzz.distance import JaroWinkler
+
+from matching.config.match_config import NAME_SWAP_THRESHOLD
+from matching.features.batch_similarity import (
+    factorize_strings,
+    pairwise_ratio,
+    pairwise_similarity,
+    score_code_pairs,
+)
+from matching.features.name_normalization import map_nickname, remove_accents
+from matching.features.registry import FEATURES, Feature
+from matching.utils.phonetic import phonetic_column, phonetic_series
+
+
+# phonetic feature -> (name prefix, name column stem, encoder)
+PHONETIC_FEATURES = {
+    f"{prefix}_{encoder}_match": (prefix, name, encoder)
+    for prefix, name in (("fn", "first_name"), ("ln", "last_name"))
+    for encoder in ("soundex", "metaphone")
+}
+
+NAME_FEATURE_COLS = [
+    "fn_soundex_match",
+    "ln_soundex_match",
+    "fn_metaphone_match",
+    "ln_metaphone_match",
+    "fn_nickname_match",
+    "ln_token_sort",
+    "ln_partial_ratio",
+    "name_swap",
+]
+
+
+def _same_group(left_codes, left_groups, right_codes, right_groups) -> np.ndarray:
+    """
+    1 where both rows map to the same non-missing group, else 0.
+
+    `*_codes` index rows into the per-distinct-name `*_groups` arrays; the two
+    sides' groups are put in one integer space so rows compare as integers.
+    """
+    ids, _ = pd.factorize(np.concatenate([left_groups, right_groups]))
+    left_ids = ids[:len(left_groups)][left_codes] if len(left_groups) else np.full(len(left_codes), -1)
+    right_ids = ids[len(left_groups):][right_codes] if len(right_groups) else np.full(len(right_codes), -1)
+    return ((left_ids == right_ids) & (left_ids >= 0)).astype(int)
+
+
+def _union_groups(left_uniques, right_uniques, group_fn):
+    """
+    group_fn over the distinct values of both sides at once (names seen on
+    both sides are grouped once), split back into per-side group arrays.
+    """
+    uniques = pd.unique(np.concatenate([left_uniques, right_uniques]))
+    groups = group_fn(uniques)
+    index = pd.Index(uniques)
+    return groups[index.get_indexer(left_uniques)], groups[index.get_indexer(right_uniques)]
+
+
+def codes_equal(left: pd.Series, right: pd.Series) -> np.ndarray:
+    """
+    1 where two categorical code columns hold the same non-missing code, else 0.
+
+    Only the categories are matched up (get_indexer); rows compare as integers.
+    """
+    left = left if isinstance(left.dtype, pd.CategoricalDtype) else left.astype("category")
+    right = right if isinstance(right.dtype, pd.CategoricalDtype) else right.astype("category")
+    left_codes = left.cat.codes.to_numpy()
+    right_codes = right.cat.codes.to_numpy()
+    if not len(left.cat.categories):
+        return np.zeros(len(left_codes), dtype=int)
+    # position of each left category among the right categories (-1 if absent)
+    in_right = right.cat.categories.get_indexer(left.cat.categories)
+    mapped = np.where(left_codes >= 0, in_right[left_codes], -1)
+    return ((mapped == right_codes) & (mapped >= 0)).astype(int)
+
+
+def add_name_code_columns(df: pd.DataFrame, feature_cols) -> pd.DataFrame:
+    """
+    Add the fn/ln_<encoder>_att / _vf code columns that the requested phonetic
+    features read and `df` does not carry yet (in place).
+
+    Codes are taken from first_name_* / last_name_* as they are, so call this
+    before nickname normalization; normalize_name_columns does. Blocked frames
+    already have the PHONETIC_ENCODERS columns, which are encoded from the same
+    names, so only other encoders (e.g. metaphone) are computed here.
+
+    Args:
+        df (pd.DataFrame): Candidate pairs.
+        feature_cols (list of str): Features that will be computed.
+
+    Returns:
+        pd.DataFrame: The same frame, for chaining.
+    """
+    for name in feature_cols:
+        if name not in PHONETIC_FEATURES:
+            continue
+        prefix, stem, encoder = PHONETIC_FEATURES[name]
+        for side in ("att", "vf"):
+            code_col = f"{prefix}_{encoder}_{side}"
+            if code_col not in df.columns and f"{stem}_{side}" in df.columns:
+                df[code_col] = phonetic_series(df[f"{stem}_{side}"], encoder)
+    return df
+
+
+def _nickname_groups(uniques: np.ndarray) -> np.ndarray:
+    return np.array(
+        [(map_nickname(remove_accents(name)) or None) if isinstance(name, str) else None for name in uniques],
+        dtype=object,
+    )
+
+
+def _surname_tokens(uniques: np.ndarray) -> np.ndarray:
+    # "garcia-lopez" and "garcia lopez" are the same two surnames
+    return np.array(
+        [name.replace("-", " ") if isinstance(name, str) else name for name in uniques],
+        dtype=object,
+    )
+
+
+def phonetic_match_series(left: pd.Series, right: pd.Series, encoder: str = "soundex") -> pd.Series:
+    """
+    Whether two name columns share a phonetic code, pair by pair.
+
+    Args:
+        left (pd.Series): Attempt-side names.
+        right (pd.Series): Voterfile-side names, aligned with `left`.
+        encoder (str): "soundex" or "metaphone".
+
+    Returns:
+        pd.Series: 1 where both names have the same code, 0 otherwise
+            (including missing names).
+    """
+    match = codes_equal(phonetic_series(left, encoder), phonetic_series(right, encoder))
+    return pd.Series(match, index=left.index)
+
+
+def nickname_match_series(left: pd.Series, right: pd.Series) -> pd.Series:
+    """1 where both first names fall in the same nickname group ("bill" / "william"), else 0."""
+    left_codes, left_uniques = factorize_strings(left)
+    right_codes, right_uniques = factorize_strings(right)
+    left_groups, right_groups = _union_groups(left_uniques, right_uniques, _nickname_groups)
+    return pd.Series(_same_group(left_codes, left_groups, right_codes, right_groups), index=left.index)
+
+
+def _jw(left_codes, left_uniques, right_codes, right_uniques, pair_cache=None, stats=None):
+    return score_code_pairs(
+        left_codes, left_uniques, right_codes, right_uniques,
+        lambda a, b: pairwise_similarity(a, b, JaroWinkler), JaroWinkler.__name__,
+        cache=pair_cache, stats=stats,
+    )
+
+
+def _name_swap(fn_att, ln_att, fn_vf, ln_vf, fn_jw, ln_jw, threshold, pair_cache=None, stats=None):
+    # Each argument is a (codes, uniques) tuple from factorize_strings
+    straight = np.minimum(np.asarray(fn_jw, dtype=np.float64), np.asarray(ln_jw, dtype=np.float64))
+    swapped = np.zeros(len(straight), dtype=int)
+    rows = np.flatnonzero(straight < threshold)
+    if len(rows):
+        crossed = np.minimum(
+            _jw(fn_att[0][rows], fn_att[1], ln_vf[0][rows], ln_vf[1], pair_cache, stats),
+            _jw(ln_att[0][rows], ln_att[1], fn_vf[0][rows], fn_vf[1], pair_cache, stats),
+        )
+        swapped[rows] = ((crossed >= threshold) & (crossed > straight[rows])).astype(int)
+    return swapped
+
+
+def name_swap_series(fn_att: pd.Series, ln_att: pd.Series, fn_vf: pd.Series, ln_vf: pd.Series,
+                     fn_jw=None, ln_jw=None, threshold: float = None,
+                     pair_cache=None, stats=None) -> pd.Series:
+    """
+    Detect first and last names entered in each other's fields.
+
+    A pair is flagged when both crossed comparisons (first vs last, last vs
+    first) reach `threshold` and beat the straight comparisons. Crossed scores
+    are only computed for rows whose straight scores are not both above the
+    threshold already.
+
+    Args:
+        fn_att, ln_att (pd.Series): Attempt-side first and last names.
+        fn_vf, ln_vf (pd.Series): Voterfile-side first and last names.
+        fn_jw, ln_jw (array-like, optional): Straight Jaro-Winkler scores, if
+            already computed.
+        threshold (float, optional): Defaults to NAME_SWAP_THRESHOLD.
+        pair_cache (LRUCache, optional): Similarity scores shared across chunks.
+        stats (dict, optional): Comparison counters (see dedup_pairwise_similarity).
+
+    Returns:
+        pd.Series: 1 for swapped pairs, 0 otherwise.
+    """
+    threshold = NAME_SWAP_THRESHOLD if threshold is None else threshold
+    columns = [factorize_strings(col) for col in (fn_att, ln_att, fn_vf, ln_vf)]
+    if fn_jw is None:
+        fn_jw = _jw(*columns[0], *columns[2], pair_cache, stats)
+    if ln_jw is None:
+        ln_jw = _jw(*columns[1], *columns[3], pair_cache, stats)
+    swapped = _name_swap(*columns, fn_jw, ln_jw, threshold, pair_cache, stats)
+    return pd.Series(swapped, index=fn_att.index)
+
+
+# Registered features. Name columns are factorized once per chunk (ctx.factorized)
+# and shared by every feature below.
+
+def _phonetic_match(ctx, prefix, name, encoder):
+    # without add_name_code_columns (direct compute_similarity_columns calls) the
+    # names passed in are encoded
+    return codes_equal(*(
+        phonetic_column(ctx.df, f"{name}_{side}", f"{prefix}_{encoder}_{side}", encoder)
+        for side in ("att", "vf")
+    ))
+
+
+def _nickname_match(ctx, name):
+    left_codes, left_uniques = ctx.factorized(f"{name}_att")
+    right_codes, right_uniques = ctx.factorized(f"{name}_vf")
+    left_groups, right_groups = _union_groups(left_uniques, right_uniques, _nickname_groups)
+    return _same_group(left_codes, left_groups, right_codes, right_groups)
+
+
+def _surname_score(ctx, scorer):
+    att_codes, att_uniques = ctx.factorized("last_name_att")
+    vf_codes, vf_uniques = ctx.factorized("last_name_vf")
+    att_tokens = ctx.memo(("tokens", "last_name_att"), lambda: _surname_tokens(att_uniques))
+    vf_tokens = ctx.memo(("tokens", "last_name_vf"), lambda: _surname_tokens(vf_uniques))
+    return score_code_pairs(
+        att_codes, att_tokens, vf_codes, vf_tokens,
+        lambda a, b: pairwise_ratio(a, b, scorer), scorer.__name__,
+        cache=ctx.pair_cache, stats=ctx.stats,
+    )
+
+
+for _feature, (_prefix, _name, _encoder) in PHONETIC_FEATURES.items():
+    FEATURES.add(Feature(
+        _feature,
+        partial(_phonetic_match, prefix=_prefix, name=_name, encoder=_encoder),
+        inputs=[f"{_name}_att", f"{_name}_vf"],
+    ))
+
+FEATURES.add(Feature(
+    "fn_nickname_match",
+    partial(_nickname_match, name="first_name"),
+    inputs=["first_name_att", "first_name_vf"],
+))
+
+# Compound surnames: word order and extra surnames should not count against a pair
+FEATURES.add(Feature(
+    "ln_token_sort",
+    partial(_surname_score, scorer=fuzz.token_sort_ratio),
+    inputs=["last_name_att", "last_name_vf"],
+))
+FEATURES.add(Feature(
+    "ln_partial_ratio",
+    partial(_surname_score, scorer=fuzz.partial_ratio),
+    inputs=["last_name_att", "last_name_vf"],
+))
+
+
+@FEATURES.register(
+    "name_swap",
+    inputs=["first_name_att", "first_name_vf", "last_name_att", "last_name_vf"],
+    depends=["fn_jw", "ln_jw"],
+)
+def _name_swap_feature(ctx):
+    columns = [ctx.factorized(c) for c in ("first_name_att", "last_name_att", "first_name_vf", "last_name_vf")]
+    return _name_swap(
+        *columns, ctx.feature("fn_jw"), ctx.feature("ln_jw"), NAME_SWAP_THRESHOLD,
+        ctx.pair_cache, ctx.stats,
+    )
@@ -3,6 +3,7 @@
 # Use mapping dictionaries for common nicknames (William → Will, Bill)
 # Consider maiden vs married surname variations, aliasesimport unicodedata
 import unicodedata
+import numpy as np
 
 
 def remove_accents(name: str) -> str:
@@ -56,7 +57,86 @@ def normalize_name(name: str) -> str:
     
 
 
+import hashlib
+import json
 import pandas as pd
 
-def normalize_name_series(series: pd.Series) -> pd.Series:
-    return series.fillna("").astype(str).str.strip().apply(normalize_name)
\ No newline at end of file
+from matching.config.match_config import NAME_CACHE_MAXSIZE
+from matching.utils.cache import LRUCache
+
+
+# Shared name -> normalized name cache. Lives for the whole process so every
+# chunk reuses earlier work; load_name_cache/save_name_cache carry it across runs.
+NAME_CACHE = LRUCache(maxsize=NAME_CACHE_MAXSIZE)
+
+
+def name_normalization_version() -> str:
+    """
+    Fingerprint of the normalization rules. A persisted cache is only reused
+    when the nickname and surname maps are unchanged.
+    """
+    rules = json.dumps([NICKNAME_MAP, MAIDEN_MARRIED_MAP], sort_keys=True)
+    return hashlib.sha1(rules.encode("utf-8")).hexdigest()[:12]
+
+
+def load_name_cache(path: str, cache: LRUCache = None) -> int:
+    """Load a persisted name cache into `cache` (default NAME_CACHE). Returns entries loaded."""
+    cache = NAME_CACHE if cache is None else cache
+    return cache.load_json(path, version=name_normalization_version())
+
+
+def save_name_cache(path: str, cache: LRUCache = None):
+    """Persist `cache` (default NAME_CACHE) so later runs start warm."""
+    cache = NAME_CACHE if cache is None else cache
+    cache.save_json(path, version=name_normalization_version())
+
+
+def name_cache_update(cache: LRUCache = None) -> dict:
+    """
+    New entries and hit/miss counts of `cache` (default NAME_CACHE) since the
+    previous call, for a worker process to hand back to the parent. The cache
+    must have track_new_entries() on; its counters are reset.
+    """
+    cache = NAME_CACHE if cache is None else cache
+    update = {"entries": cache.pop_new_entries(), "hits": cache.hits, "misses": cache.misses}
+    cache.reset_stats()
+    return update
+
+
+def merge_name_cache_update(update: dict, cache: LRUCache = None):
+    """Fold a worker's name_cache_update into `cache` (default NAME_CACHE), entries and counters."""
+    cache = NAME_CACHE if cache is None else cache
+    for key, value in update["entries"]:
+        cache.put(key, value)
+    cache.hits += update["hits"]
+    cache.misses += update["misses"]
+
+
+def normalize_name_series(series: pd.Series, cache: LRUCache = None) -> pd.Series:
+    """
+    Normalize a column of names, running normalize_name once per distinct value.
+
+    The column is factorized, unique values are looked up in the shared cache
+    (or normalized and added to it), and the results are mapped back by code.
+
+    Args:
+        series (pd.Series): Raw names.
+        cache (LRUCache, optional): Cache to use. Defaults to NAME_CACHE.
+
+    Returns:
+        pd.Series: Normalized names, same index as `series`.
+    """
+    cache = NAME_CACHE if cache is None else cache
+    cleaned = series.fillna("").astype(str).str.strip()
+    codes, uniques = pd.factorize(cleaned)
+
+    normalized = []
+    for name in uniques:
+        value = cache.get(name)
+        if value is None:
+            value = normalize_name(name)
+            cache.put(name, value)
+        normalized.append(value)
+
+    values = np.asarray(normalized, dtype=object)[codes] if len(codes) else np.empty(0, dtype=object)
+    return pd.Series(values, index=series.index, dtype=cleaned.dtype)
\ No newline at end of file
@@ -0,0 +1,189 @@
+# matching/features/registry.py
+
+# Feature registry: every feature column declares the input columns it reads
+# and a vectorized compute function. add_features asks the registry for the
+# columns a model was fit on, so only those features (and the features they
+# reuse) are computed, and each one is timed.
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from matching.features.batch_similarity import factorize_strings
+from matching.utils.validators import require_columns
+
+
+class Feature:
+    """
+    One feature column.
+
+    Args:
+        name (str): Output column name.
+        compute (callable): compute(ctx) -> array-like aligned with ctx.df.
+        inputs (list of str): Columns the feature cannot be computed without.
+        optional_inputs (list of str): Columns read when present; absent ones
+            are treated as empty strings (see FeatureContext.column).
+        depends (list of str): Other features whose values compute() reuses
+            through ctx.feature(name).
+        bounds (tuple): (min, max) of the feature's values, used to bound a
+            model's score before the feature is computed (see matching/modeling/cascade.py).
+    """
+
+    def __init__(self, name, compute, inputs=(), optional_inputs=(), depends=(), bounds=(0.0, 1.0)):
+        self.name = name
+        self.compute = compute
+        self.inputs = list(inputs)
+        self.optional_inputs = list(optional_inputs)
+        self.depends = list(depends)
+        self.bounds = tuple(bounds)
+
+    def __repr__(self):
+        return f"Feature({self.name!r}, inputs={self.inputs}, depends={self.depends})"
+
+
+class FeatureContext:
+    """
+    What a compute function sees: the candidate frame, the shared pair cache and
+    comparison counters, features computed so far, and per-chunk memos so
+    work such as factorizing a name column happens once per chunk.
+    """
+
+    def __init__(self, df: pd.DataFrame, pair_cache=None, stats=None):
+        self.df = df
+        self.pair_cache = pair_cache
+        self.stats = stats
+        self.values = {}
+        self._memo = {}
+
+    def column(self, col: str) -> pd.Series:
+        """df[col], or a column of "" when it is absent (same as row.get(col, ""))."""
+        if col in self.df.columns:
+            return self.df[col]
+        return pd.Series("", index=self.df.index, dtype=object)
+
+    def factorized(self, col: str):
+        """factorize_strings(column(col)), computed once per chunk."""
+        return self.memo(("factorized", col), lambda: factorize_strings(self.column(col)))
+
+    def memo(self, key, fn):
+        """Return fn() computed at most once per chunk under `key`."""
+        if key not in self._memo:
+            self._memo[key] = fn()
+        return self._memo[key]
+
+    def feature(self, name: str):
+        """Values (an array) of a feature computed earlier in this chunk (declare it in `depends`)."""
+        return self.values[name]
+
+
+class FeatureRegistry:
+    """
+    Registered features plus cumulative timings.
+
+    timings maps feature name -> {"seconds", "rows", "calls"} summed over every
+    compute() call in this process; timing_report() turns it into a table.
+    """
+
+    def __init__(self):
+        self.features = {}
+        self.timings = {}
+
+    def __contains__(self, name):
+        return name in self.features
+
+    def names(self) -> list:
+        return list(self.features)
+
+    def add(self, feature: Feature) -> Feature:
+        # Dependencies are checked in resolve(), so modules can register in any order
+        if feature.name in self.features:
+            raise ValueError(f"Feature {feature.name!r} is already registered")
+        self.features[feature.name] = feature
+        return feature
+
+    def register(self, name, inputs=(), optional_inputs=(), depends=(), bounds=(0.0, 1.0)):
+        """Decorator form of add(): @FEATURES.register("fn_jw", inputs=[...])."""
+        def decorator(compute):
+            self.add(Feature(name, compute, inputs, optional_inputs, depends, bounds))
+            return compute
+        return decorator
+
+    def resolve(self, feature_cols) -> list:
+        """
+        Features to compute for `feature_cols`, dependencies first.
+
+        Raises:
+            ValueError: If a requested feature is not registered.
+        """
+        unknown = [c for c in feature_cols if c not in self.features]
+        if unknown:
+            raise ValueError(f"Unknown feature columns {unknown}, registered: {self.names()}")
+        order = []
+
+        def visit(name):
+            if name in order:
+                return
+            if name not in self.features:
+                raise ValueError(f"Feature dependency {name!r} is not registered")
+            for dep in self.features[name].depends:
+                visit(dep)
+            order.append(name)
+
+        for name in feature_cols:
+            visit(name)
+        return order
+
+    def required_columns(self, feature_cols) -> list:
+        """Input columns (without optional ones) needed to compute `feature_cols`."""
+        columns = []
+        for name in self.resolve(feature_cols):
+            columns += [c for c in self.features[name].inputs if c not in columns]
+        return columns
+
+    def compute(self, df: pd.DataFrame, feature_cols, pair_cache=None, stats=None,
+                timings: dict = None) -> pd.DataFrame:
+        """
+        Compute `feature_cols` (and their dependencies) for every row of df.
+
+        Args:
+            df (pd.DataFrame): Candidate pairs.
+            feature_cols (list of str): Registered feature names, in output order.
+            pair_cache (LRUCache, optional): Similarity scores shared across chunks.
+            stats (dict, optional): Comparison counters updated in place.
+            timings (dict, optional): Filled with this call's seconds per feature.
+
+        Returns:
+            pd.DataFrame: The requested columns indexed like df.
+        """
+        order = self.resolve(feature_cols)
+        require_columns(df, self.required_columns(feature_cols), "candidates")
+        ctx = FeatureContext(df, pair_cache=pair_cache, stats=stats)
+        for name in order:
+            start = time.perf_counter()
+            values = self.features[name].compute(ctx)
+            elapsed = time.perf_counter() - start
+
+            # Kept as arrays: positional, so duplicate index labels are harmless
+            ctx.values[name] = values.to_numpy() if isinstance(values, pd.Series) else np.asarray(values)
+            total = self.timings.setdefault(name, {"seconds": 0.0, "rows": 0, "calls": 0})
+            total["seconds"] += elapsed
+            total["rows"] += len(df)
+            total["calls"] += 1
+            if timings is not None:
+                timings[name] = elapsed
+        return pd.DataFrame({name: ctx.values[name] for name in feature_cols}, index=df.index)
+
+    def timing_report(self) -> pd.DataFrame:
+        """Cumulative seconds, rows and rows/sec per feature, slowest first."""
+        report = pd.DataFrame.from_dict(self.timings, orient="index", columns=["seconds", "rows", "calls"])
+        report.index.name = "feature"
+        report["rows_per_sec"] = report["rows"] / report["seconds"].where(report["seconds"] > 0)
+        return report.sort_values("seconds", ascending=False)
+
+    def reset_timings(self):
+        self.timings = {}
+
+
+# The process-wide registry; feature_builder and name_features register into it.
+FEATURES = FeatureRegistry()
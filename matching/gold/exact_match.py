@@ -0,0 +1,159 @@
+# matching/gold/exact_match.py
+
+# Deterministic fast path for inference: attempts whose normalized
+# (first name, last name, DOB, ZIP) key matches exactly one voter across the
+# whole voterfile are resolved without blocking or model scoring. The voterfile
+# is scanned once, chunk by chunk, with a hash join against the attempt keys,
+# the same strict join build_gold_pairs uses for training positives.
+
+import hashlib
+import os
+
+import pandas as pd
+
+from matching.candidates.prepared_attempts import PREPARED_ATTEMPTS_VERSION, file_fingerprint
+from matching.gold.gold_pairs import GOLD_KEYS_ATT, GOLD_KEYS_VF
+from matching.utils.normalization import (
+    normalize_dob_series,
+    normalize_text_series,
+    normalize_zip_series,
+)
+from matching.utils.validators import require_columns
+
+
+EXACT_KEYS_ATT = GOLD_KEYS_ATT
+EXACT_KEYS_VF = GOLD_KEYS_VF
+
+# written into match_source for every pair resolved here
+EXACT_MATCH_SOURCE = "exact_key"
+
+EXACT_MATCH_COLUMNS = ["registration_form_id", "voter_id", "match_prob", "match_source", "chunk"]
+
+# bump when ExactMatchPass changes what it resolves, so saved results are not reused
+EXACT_MATCH_VERSION = "1"
+
+
+def exact_keys_vf(vf_chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    voter_id plus the EXACT_KEYS_VF columns of a renamed voterfile chunk.
+
+    Reuses the normalized columns when the chunk already has them; otherwise
+    only the four keys are normalized (no phonetic codes or block keys).
+    """
+    if all(c in vf_chunk.columns for c in EXACT_KEYS_VF):
+        return vf_chunk[["voter_id"] + EXACT_KEYS_VF]
+    require_columns(vf_chunk, ["voter_id", "first_name_vf", "last_name_vf", "dob_raw_vf", "zip_raw_vf"], "vf_chunk")
+    return pd.DataFrame({
+        "voter_id": vf_chunk["voter_id"],
+        "fn_norm_vf": normalize_text_series(vf_chunk["first_name_vf"]),
+        "ln_norm_vf": normalize_text_series(vf_chunk["last_name_vf"]),
+        "dob_norm_vf": normalize_dob_series(vf_chunk["dob_raw_vf"]),
+        "zip_norm_vf": normalize_zip_series(vf_chunk["zip_raw_vf"]),
+    })
+
+
+class ExactMatchPass:
+    """
+    Accumulates exact key hits for the attempts over a stream of voterfile chunks.
+
+    Attempts or voters missing any key never match (unlike a plain merge,
+    which would join missing values to each other). Hits are rare, so the
+    state is a small frame of (registration_form_id, voter_id, chunk).
+
+    Args:
+        attempts (pd.DataFrame): Normalized attempts with registration_form_id
+            and the EXACT_KEYS_ATT columns.
+    """
+
+    def __init__(self, attempts: pd.DataFrame):
+        require_columns(attempts, ["registration_form_id"] + EXACT_KEYS_ATT, "attempts")
+        keys = attempts[["registration_form_id"] + EXACT_KEYS_ATT].dropna(subset=EXACT_KEYS_ATT)
+        self.attempt_keys = keys.drop_duplicates()
+        self.hits = pd.DataFrame(columns=["registration_form_id", "voter_id", "chunk"])
+        self.rows_scanned = 0
+
+    def update(self, vf_chunk: pd.DataFrame, chunk_idx: int) -> int:
+        """
+        Join one voterfile chunk against the attempt keys.
+
+        Args:
+            vf_chunk (pd.DataFrame): Renamed voterfile chunk (see exact_keys_vf).
+            chunk_idx (int): Chunk index, kept as provenance.
+
+        Returns:
+            int: Hits found in this chunk.
+        """
+        vf_keys = exact_keys_vf(vf_chunk).dropna(subset=EXACT_KEYS_VF)
+        self.rows_scanned += len(vf_chunk)
+        found = self.attempt_keys.merge(vf_keys, left_on=EXACT_KEYS_ATT, right_on=EXACT_KEYS_VF, how="inner")
+        if found.empty:
+            return 0
+        found = found[["registration_form_id", "voter_id"]].assign(chunk=chunk_idx)
+        parts = [df for df in (self.hits, found) if not df.empty]
+        self.hits = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        return len(found)
+
+    def _distinct_hits(self):
+        """Hits deduplicated on (attempt, voter), with the number of distinct voters per attempt."""
+        hits = self.hits.drop_duplicates(["registration_form_id", "voter_id"])
+        return hits, hits.groupby("registration_form_id")["voter_id"].transform("nunique")
+
+    def resolved(self) -> pd.DataFrame:
+        """
+        Attempts whose key matched exactly one voter, one row each.
+
+        Returns:
+            pd.DataFrame: EXACT_MATCH_COLUMNS, with match_prob 1.0 and
+                match_source EXACT_MATCH_SOURCE; chunk is where the voter was found.
+        """
+        if self.hits.empty:
+            return pd.DataFrame(columns=EXACT_MATCH_COLUMNS)
+        hits, n_voters = self._distinct_hits()
+        unique = hits[n_voters == 1].copy()
+        unique["match_prob"] = 1.0
+        unique["match_source"] = EXACT_MATCH_SOURCE
+        return unique[EXACT_MATCH_COLUMNS].reset_index(drop=True)
+
+    def ambiguous_ids(self) -> pd.Index:
+        """registration_form_ids whose key matched several voters (left to the model)."""
+        if self.hits.empty:
+            return pd.Index([])
+        hits, n_voters = self._distinct_hits()
+        return pd.Index(hits.loc[n_voters > 1, "registration_form_id"].unique())
+
+    def summary(self) -> dict:
+        n_resolved = len(self.resolved())
+        return {
+            "attempts_with_keys": self.attempt_keys["registration_form_id"].nunique(),
+            "rows_scanned": self.rows_scanned,
+            "hits": len(self.hits),
+            "resolved": n_resolved,
+            "ambiguous": len(self.ambiguous_ids()),
+        }
+
+
+def remove_resolved(attempts: pd.DataFrame, resolved: pd.DataFrame) -> pd.DataFrame:
+    """Attempts not resolved by the exact pass (the ones left for blocking and scoring)."""
+    return attempts[~attempts["registration_form_id"].isin(resolved["registration_form_id"])]
+
+
+def exact_matches_path(attempts_path: str, voterfile_source: str, cache_dir: str) -> str:
+    """
+    Parquet path for saved exact-pass results.
+
+    Keyed like prepared_attempts_path: the attempts file's content hash, the
+    voterfile source, PREPARED_ATTEMPTS_VERSION (attempt normalization) and
+    EXACT_MATCH_VERSION, so a changed input never reuses another run's results.
+
+    Args:
+        attempts_path (str): Attempts CSV.
+        voterfile_source (str): Identifies the scanned voterfile, e.g. the SQL
+            query, a snapshot's SHA-1 or a block index's metadata hash.
+        cache_dir (str): Directory for the saved results.
+
+    Returns:
+        str: The Parquet path.
+    """
+    parts = [file_fingerprint(attempts_path), voterfile_source, PREPARED_ATTEMPTS_VERSION, EXACT_MATCH_VERSION]
+    key = hashlib.sha1("\0".join(parts).encode()).hexdigest()
+    return os.path.join(cache_dir, f"exact_{key[:16]}.parquet")
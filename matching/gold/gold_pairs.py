@@ -1,43 +1,143 @@
 # matching/gold/gold_pairs.py
 
+import os
+import tempfile
+
+import numpy as np
 import pandas as pd
 from matching.utils.normalization import (
     normalize_text_series,
     normalize_zip_series,
     normalize_dob_series,
 )
+from matching.utils.phonetic import add_phonetic_columns
 from matching.utils.validators import require_columns
-from matching.config.match_config import TRUE_MATCH_TYPES
+from matching.config.match_config import GOLD_ZIP_PARTITIONS
 
-def add_normalized_keys(att_df: pd.DataFrame, vf_df: pd.DataFrame):
-    # attempts
+
+# strict deterministic join keys for gold pairs (normalized first, last, DOB, ZIP)
+GOLD_KEYS_ATT = ["fn_norm_att", "ln_norm_att", "dob_norm_att", "zip_norm_att"]
+GOLD_KEYS_VF = ["fn_norm_vf", "ln_norm_vf", "dob_norm_vf", "zip_norm_vf"]
+
+GOLD_NEEDED_ATT = ["registration_form_id"] + GOLD_KEYS_ATT + ["type_code", "confidence_score"]
+GOLD_NEEDED_VF = ["voter_id"] + GOLD_KEYS_VF
+
+# row position of a voterfile record across all chunks (partitioned builder only)
+_VF_POS = "_gold_vf_pos"
+
+
+def normalize_attempt_keys(att_df: pd.DataFrame) -> pd.DataFrame:
+    """Add fn/ln/zip/dob normalized key columns and name phonetic codes to an attempts frame (in place)."""
     att_df["fn_norm_att"]  = normalize_text_series(att_df["first_name_att"])
     att_df["ln_norm_att"]  = normalize_text_series(att_df["last_name_att"])
     att_df["zip_norm_att"] = normalize_zip_series(att_df["zip_raw_att"])
     att_df["dob_norm_att"] = normalize_dob_series(att_df["dob_raw_att"])
     att_df["dob_year_att"] = att_df["dob_norm_att"].dt.year.astype("Int64")
+    add_phonetic_columns(att_df, "att")
+    return att_df
 
-    # voterfile
+def normalize_voterfile_keys(vf_df: pd.DataFrame) -> pd.DataFrame:
+    """Add fn/ln/zip/dob normalized key columns and name phonetic codes to a voterfile frame or chunk (in place)."""
     vf_df["fn_norm_vf"]  = normalize_text_series(vf_df["first_name_vf"])
     vf_df["ln_norm_vf"]  = normalize_text_series(vf_df["last_name_vf"])
     vf_df["zip_norm_vf"] = normalize_zip_series(vf_df["zip_raw_vf"])
     vf_df["dob_norm_vf"] = normalize_dob_series(vf_df["dob_raw_vf"])
     vf_df["dob_year_vf"] = vf_df["dob_norm_vf"].dt.year.astype("Int64")
+    add_phonetic_columns(vf_df, "vf")
+    return vf_df
+
+def add_normalized_keys(att_df: pd.DataFrame, vf_df: pd.DataFrame):
+    return normalize_attempt_keys(att_df), normalize_voterfile_keys(vf_df)
+
+def hash_key_columns(df: pd.DataFrame, cols) -> np.ndarray:
+    """
+    One 64-bit hash per row over `cols`.
+
+    Nulls hash equal to each other, as merge keys match them, and datetimes are
+    hashed at a common resolution so both sides agree.
+    """
+    keys = df[cols]
+    datetime_cols = [c for c in cols if pd.api.types.is_datetime64_any_dtype(keys[c])]
+    if datetime_cols:
+        keys = keys.astype({c: "datetime64[ns]" for c in datetime_cols})
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def _keys_equal(att_df, vf_df, att_pos, vf_pos, att_keys, vf_keys) -> np.ndarray:
+    """Row-wise check that joined positions really share their keys (rules out hash collisions)."""
+    same = np.ones(len(att_pos), dtype=bool)
+    for att_col, vf_col in zip(att_keys, vf_keys):
+        a = att_df[att_col].iloc[att_pos].reset_index(drop=True)
+        b = vf_df[vf_col].iloc[vf_pos].reset_index(drop=True)
+        same &= ((a == b).fillna(False) | (a.isna() & b.isna())).to_numpy(dtype=bool)
+    return same
+
+
+def hash_join_positions(att_df: pd.DataFrame, vf_df: pd.DataFrame, att_keys=GOLD_KEYS_ATT, vf_keys=GOLD_KEYS_VF):
+    """
+    Inner join on hashed keys, returning row positions instead of a merged frame.
+
+    Only one uint64 column per side goes through the join; candidate positions
+    are then checked on the real key values. Pairs come back in merge order
+    (attempt row, then voterfile row).
+
+    Returns:
+        tuple of np.ndarray: (att_pos, vf_pos), positional indices into att_df and vf_df.
+    """
+    joined = pd.DataFrame({"h": hash_key_columns(att_df, att_keys), "att_pos": np.arange(len(att_df))}).merge(
+        pd.DataFrame({"h": hash_key_columns(vf_df, vf_keys), "vf_pos": np.arange(len(vf_df))}),
+        on="h",
+        how="inner",
+    )
+    att_pos = joined["att_pos"].to_numpy()
+    vf_pos = joined["vf_pos"].to_numpy()
+    order = np.lexsort((vf_pos, att_pos))
+    att_pos, vf_pos = att_pos[order], vf_pos[order]
+    same = _keys_equal(att_df, vf_df, att_pos, vf_pos, att_keys, vf_keys)
+    return att_pos[same], vf_pos[same]
+
+
+def _joined_frame(att_df, vf_df, att_pos, vf_pos, suffixes=("_att", "_vf")) -> pd.DataFrame:
+    """The frame att_df.merge(vf_df, ...) would give for these joined positions."""
+    overlap = att_df.columns.intersection(vf_df.columns)
+    left = att_df.iloc[att_pos].reset_index(drop=True)
+    right = vf_df.iloc[vf_pos].reset_index(drop=True)
+    if len(overlap):
+        left = left.rename(columns={c: f"{c}{suffixes[0]}" for c in overlap})
+        right = right.rename(columns={c: f"{c}{suffixes[1]}" for c in overlap})
+    return pd.concat([left, right], axis=1)
+
+
+def _gold_outputs(clean_pairs: pd.DataFrame, att_df: pd.DataFrame):
+    """pos_df / gold_pairs from the strictly joined pairs (see build_gold_pairs)."""
+    # voter_ids per registration_form_id, counted once
+    n_voters = clean_pairs.groupby("registration_form_id")["voter_id"].transform("nunique")
+
+    # Minimal positive training frame
+    pos_df = clean_pairs[[
+        "registration_form_id",
+        "first_name_att", "last_name_att", "dob_norm_att", "zip_norm_att",
+        "first_name_vf", "last_name_vf", "dob_norm_vf", "zip_norm_vf"
+    ]].copy()
+    pos_df["is_match"] = 1
+
+    gold_pairs = clean_pairs[(n_voters == 1).to_numpy()].copy()
+    return pos_df, gold_pairs, att_df
 
-    return att_df, vf_df
 
 def build_gold_pairs(att_df: pd.DataFrame, vf_df: pd.DataFrame) -> pd.DataFrame:
     """
     Generate a set of high-confidence ("gold") positive pairs for supervised matching.
 
-    This function merges a DataFrame of normalized attempt records (e.g., from registration forms)
+    This function joins a DataFrame of normalized attempt records (e.g., from registration forms)
     with a DataFrame of normalized voterfile records using strict deterministic keys:
     first name, last name, date of birth, and ZIP code (all normalized). Only those
     registration attempts that match exactly one voterfile record (i.e., not ambiguous)
     are retained to ensure high-likelihood matches.
 
-    The resulting DataFrame is labeled with `is_match` based on predefined true match types,
-    returning only a minimal subset of columns needed for training downstream models.
+    The join runs on one 64-bit hash of the four keys (hash_join_positions), so
+    only the matched rows of either frame are ever copied. The result is the same
+    as a pandas merge on the keys, including that missing keys match each other.
 
     Parameters
     ----------
@@ -57,51 +157,85 @@ def build_gold_pairs(att_df: pd.DataFrame, vf_df: pd.DataFrame) -> pd.DataFrame:
         DataFrame containing strictly matched positive pairs with columns for both
         sides (attempt and voterfile) and an `is_match` label, suitable for training
         matching models.
+    gold_pairs : pd.DataFrame
+        All columns of both frames for the attempts that matched exactly one voter.
+    att_df : pd.DataFrame
+        The attempts, unchanged.
     """
-
-    needed_att = ["registration_form_id", "fn_norm_att", "ln_norm_att", "dob_norm_att", "zip_norm_att"]
-    needed_vf  = ["voter_id", "fn_norm_vf", "ln_norm_vf", "dob_norm_vf", "zip_norm_vf"]
-
-    require_columns(att_df, needed_att + ["type_code", "confidence_score"], "attempts")
-    require_columns(vf_df, needed_vf, "voterfile")
+    require_columns(att_df, GOLD_NEEDED_ATT, "attempts")
+    require_columns(vf_df, GOLD_NEEDED_VF, "voterfile")
 
     # Strict deterministic join
-    clean_pairs = att_df.merge(
-        vf_df,
-        left_on=["fn_norm_att", "ln_norm_att", "dob_norm_att", "zip_norm_att"],
-        right_on=["fn_norm_vf", "ln_norm_vf", "dob_norm_vf", "zip_norm_vf"],
-        how="inner",
-        suffixes=("_att", "_vf"),
-    )
-
-    # Count how many voter_ids per registration_form_id
-    match_counts = (
-        clean_pairs.groupby("registration_form_id")["voter_id"]
-        .nunique()
-        .reset_index(name="n_voters")
-    )
-
-    good_ids = match_counts[match_counts["n_voters"] == 1]["registration_form_id"]
-    gold_pairs = clean_pairs[clean_pairs["registration_form_id"].isin(good_ids)].copy()
+    att_pos, vf_pos = hash_join_positions(att_df, vf_df)
+    clean_pairs = _joined_frame(att_df, vf_df, att_pos, vf_pos)
+    return _gold_outputs(clean_pairs, att_df)
 
-    # is_match label driven by match type
-    gold_pairs["is_match"] = gold_pairs["type_code"].isin(TRUE_MATCH_TYPES).astype(int)
 
-    # Minimal positive training frame
-    pos_df = clean_pairs[[
-        "registration_form_id",
-        "first_name_att", "last_name_att", "dob_norm_att", "zip_norm_att",
-        "first_name_vf", "last_name_vf", "dob_norm_vf", "zip_norm_vf"
-    ]].copy()
-    pos_df["is_match"] = 1
-
-    attempt_match_counts = (
-        clean_pairs.groupby("registration_form_id")["voter_id"]
-        .nunique()
-        .reset_index(name="n_voters")
-    )
-    good_attempts = attempt_match_counts[attempt_match_counts["n_voters"] == 1]["registration_form_id"]
-
-    gold_pairs = clean_pairs[clean_pairs["registration_form_id"].isin(good_attempts)].copy()
-
-    return pos_df, gold_pairs, att_df  # or return att_df if you want to pass something else
\ No newline at end of file
+def build_gold_pairs_partitioned(att_df: pd.DataFrame, vf_chunks, n_partitions: int = GOLD_ZIP_PARTITIONS,
+                                 spill_dir: str = None):
+    """
+    build_gold_pairs for a voterfile that does not fit in memory.
+
+    ZIP is one of the join keys, so every attempt's matches share its ZIP. Each
+    normalized voterfile chunk is split into `n_partitions` ZIP buckets and
+    spilled to disk; the buckets are then joined one at a time against the
+    attempts with the same bucket. An attempt's matches all land in one bucket,
+    so uniqueness is still exact, and the outputs equal
+    build_gold_pairs(att_df, pd.concat(vf_chunks, ignore_index=True)).
+
+    Args:
+        att_df (pd.DataFrame): Normalized attempts (see build_gold_pairs).
+        vf_chunks (iterable of pd.DataFrame): Normalized voterfile chunks
+            (e.g. load_voterfile_chunk + normalize_voterfile_keys).
+        n_partitions (int, optional): ZIP buckets. Peak memory is about one
+            bucket of the voterfile plus one chunk.
+        spill_dir (str, optional): Parent directory for the temporary spill files.
+
+    Returns:
+        tuple: (pos_df, gold_pairs, att_df), as build_gold_pairs.
+    """
+    if n_partitions < 1:
+        raise ValueError(f"n_partitions must be at least 1, got {n_partitions}")
+    require_columns(att_df, GOLD_NEEDED_ATT, "attempts")
+    att_bucket = hash_key_columns(att_df, ["zip_norm_att"]) % np.uint64(n_partitions)
+
+    empty_chunks = []
+    matched_att, matched_vf, matched_rows = [], [], []
+    with tempfile.TemporaryDirectory(prefix="gold_partitions_", dir=spill_dir) as tmp:
+        # Spill each chunk's rows to their ZIP bucket, tagged with global row position
+        n_rows = 0
+        for chunk_idx, vf_chunk in enumerate(vf_chunks):
+            require_columns(vf_chunk, GOLD_NEEDED_VF, "vf_chunk")
+            empty_chunks.append(vf_chunk.iloc[:0])
+            bucket = hash_key_columns(vf_chunk, ["zip_norm_vf"]) % np.uint64(n_partitions)
+            tagged = vf_chunk.assign(**{_VF_POS: np.arange(n_rows, n_rows + len(vf_chunk))})
+            for b in np.unique(bucket):
+                tagged[bucket == b].to_pickle(os.path.join(tmp, f"bucket_{b:05d}_chunk_{chunk_idx:06d}.pkl"))
+            n_rows += len(vf_chunk)
+        if not empty_chunks:
+            raise ValueError("build_gold_pairs_partitioned: no voterfile chunks")
+        print(f"Spilled {n_rows} voterfile rows into {n_partitions} ZIP partitions")
+
+        spilled = sorted(os.listdir(tmp))
+        for b in range(n_partitions):
+            files = [f for f in spilled if f.startswith(f"bucket_{b:05d}_")]
+            att_rows = np.flatnonzero(att_bucket == b)
+            if not files or not len(att_rows):
+                continue
+            vf_part = pd.concat([pd.read_pickle(os.path.join(tmp, f)) for f in files], ignore_index=True)
+            att_pos, vf_pos = hash_join_positions(att_df.iloc[att_rows], vf_part)
+            matched_att.append(att_rows[att_pos])
+            matched_rows.append(vf_part.iloc[vf_pos])
+            matched_vf.append(vf_part[_VF_POS].to_numpy()[vf_pos])
+
+    # Matched voterfile rows with the dtypes the concatenated voterfile would have
+    vf_template = pd.concat(empty_chunks, ignore_index=True)
+    vf_matched = (pd.concat(matched_rows, ignore_index=True) if matched_rows else vf_template.assign(**{_VF_POS: []}))
+    vf_matched = vf_matched.drop(columns=_VF_POS).astype(vf_template.dtypes.to_dict())
+    att_pos = np.concatenate(matched_att) if matched_att else np.array([], dtype=np.int64)
+    vf_pos = np.concatenate(matched_vf) if matched_vf else np.array([], dtype=np.int64)
+
+    # Back in merge order: attempt row, then voterfile row
+    order = np.lexsort((vf_pos, att_pos))
+    clean_pairs = _joined_frame(att_df, vf_matched, att_pos[order], order)
+    return _gold_outputs(clean_pairs, att_df)
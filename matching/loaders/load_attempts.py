@@ -1,15 +1,111 @@
 # matching/loaders/load_attempts.py
 
+import csv
+import hashlib
+import os
+
 import pandas as pd
 import numpy as np
-from matching.config.column_map import ATTEMPT_COL_MAP
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from matching.config.column_map import (
+    ATTEMPT_CATEGORICAL_COLUMNS,
+    ATTEMPT_COL_MAP,
+    ATTEMPT_DATE_COLUMNS,
+    ATTEMPT_EXTRA_COLUMNS,
+    ATTEMPT_FLOAT_COLUMNS,
+    MATCH_COLUMNS,
+)
 from matching.utils.validators import require_columns
 
-def load_matches(path: str) -> pd.DataFrame:
-    return pd.read_csv(path)
+# default directory for the Parquet copies of the CSV exports
+CSV_CACHE_DIR = "csv_cache"
+# bump when the column typing changes, so stale Parquet copies are not reused
+CSV_CACHE_VERSION = "2"
+
+# trailing "Z" / "+HH:MM" / "-HHMM" UTC offset of an ISO timestamp
+_UTC_OFFSET = r"(?:Z|[+-]\d{2}:?\d{2})$"
+
+
+def csv_cache_path(path: str, columns, cache_dir: str) -> str:
+    """Parquet path for `path`, keyed by its mtime and size, the columns read and CSV_CACHE_VERSION."""
+    st = os.stat(path)
+    key = f"{os.path.abspath(path)}:{st.st_mtime_ns}:{st.st_size}:{CSV_CACHE_VERSION}:{','.join(columns)}"
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{stem}_{hashlib.sha1(key.encode()).hexdigest()[:16]}.parquet")
+
+
+def read_csv_typed(path: str, columns, cache_dir: str = None) -> pd.DataFrame:
+    """
+    Read only `columns` of a CSV export with explicit types.
+
+    Columns in ATTEMPT_FLOAT_COLUMNS are floats, ATTEMPT_CATEGORICAL_COLUMNS
+    categoricals and ATTEMPT_DATE_COLUMNS naive datetimes in the wall-clock time
+    they were written in (an offset is dropped, not applied, so the date and year
+    are the ones in the file; unparseable values are NaT); everything else is a
+    string, so ids and ZIPs keep leading zeros. Requested columns missing from
+    the file are skipped. Parsed by the pyarrow CSV reader.
 
-def load_attempts(path: str) -> pd.DataFrame:
-    return pd.read_csv(path)
+    Args:
+        path (str): CSV file.
+        columns (list of str): Columns to keep.
+        cache_dir (str, optional): Keep a Parquet copy here, reused while the
+            file's mtime and size are unchanged. No caching when None.
+
+    Returns:
+        pd.DataFrame: The typed columns, in file order.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        header = next(csv.reader(f), [])
+    usecols = [c for c in header if c in set(columns)]
+
+    if cache_dir is not None:
+        cache_path = csv_cache_path(path, usecols, cache_dir)
+        if os.path.exists(cache_path):
+            df = pd.read_parquet(cache_path)
+            print(f"Loaded {len(df)} rows of {path} from {cache_path}")
+            return df
+
+    # Types are fixed at parse time (pandas' dtype= casts after inference, which
+    # would already have turned "03125" into 3125)
+    column_types = {}
+    for col in usecols:
+        if col in ATTEMPT_FLOAT_COLUMNS:
+            column_types[col] = pa.float64()
+        elif col in ATTEMPT_CATEGORICAL_COLUMNS:
+            column_types[col] = pa.dictionary(pa.int32(), pa.string())
+        else:
+            column_types[col] = pa.string()
+    table = pa_csv.read_csv(
+        path,
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=usecols, column_types=column_types, strings_can_be_null=True
+        ),
+    )
+    df = table.to_pandas()
+    for col in usecols:
+        if col in ATTEMPT_DATE_COLUMNS:
+            # exports mix "YYYY-MM-DD HH:MM:SS" and ISO timestamps with offsets;
+            # converting those to UTC would move late-December uploads into the next year
+            local = df[col].str.strip().str.replace(_UTC_OFFSET, "", regex=True)
+            df[col] = pd.to_datetime(local, errors="coerce", format="mixed")
+
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cache_path)
+        print(f"Saved {len(df)} rows of {path} to {cache_path}")
+    return df
+
+
+def load_matches(path: str, cache_dir: str = None) -> pd.DataFrame:
+    """The MATCH_COLUMNS of the match export (vr_match_export.csv)."""
+    return read_csv_typed(path, MATCH_COLUMNS, cache_dir=cache_dir)
+
+def load_attempts(path: str, cache_dir: str = None) -> pd.DataFrame:
+    """The ATTEMPT_COL_MAP (+ ATTEMPT_EXTRA_COLUMNS) columns of the attempts export (vr_blocks_export*.csv), raw names."""
+    return read_csv_typed(path, list(ATTEMPT_COL_MAP) + ATTEMPT_EXTRA_COLUMNS, cache_dir=cache_dir)
 
 def attach_match_labels(attempts_df, matches_df):
     keep = ["registration_form_id", "type_code", "confidence_score"]
@@ -18,43 +114,77 @@ def attach_match_labels(attempts_df, matches_df):
 
 def standardize_attempt_columns(att_labeled: pd.DataFrame) -> pd.DataFrame:
     # keep only the columns we care about and rename
+    # (load_attempts already reads only these columns; rename builds the new frame)
     cols_present = [c for c in ATTEMPT_COL_MAP.keys() if c in att_labeled.columns]
-    att_small = att_labeled[cols_present].copy()
-    att_small.rename(columns=ATTEMPT_COL_MAP, inplace=True)
-    return att_small
+    return att_labeled[cols_present].rename(columns=ATTEMPT_COL_MAP)
+
+
+
 
+# values treated as missing after stripping whitespace (case-insensitive)
+NULL_TOKENS = ["", "na", "nan", "null", "none", "undefined"]
 
 
+def clean_null_tokens(series: pd.Series):
+    """
+    Strip whitespace and turn NULL_TOKENS into missing values in one column.
+
+    The work is done once per distinct value: categoricals use their categories
+    and codes, other columns are factorized first, and the cleaned values are
+    taken back through the codes. Missing values stay missing instead of
+    passing through the text "nan".
+
+    Args:
+        series (pd.Series): Column to clean.
+
+    Returns:
+        tuple: (cleaned str Series, boolean numpy mask of missing values after cleaning).
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
+    stripped = pd.Series(uniques).astype("str").str.strip()
+    unique_null = (stripped.isna() | stripped.str.lower().isin(NULL_TOKENS)).to_numpy(dtype=bool)
+
+    null = (codes == -1) | unique_null[codes]
+    values = pd.api.extensions.take(stripped.array, np.where(null, -1, codes), allow_fill=True)
+    return pd.Series(values, index=series.index, name=series.name), null
 
-def filter_dataframe_by_columns(df: pd.DataFrame, columns: list, unique_col: str = None) -> pd.DataFrame:
+
+def filter_dataframe_by_columns(df: pd.DataFrame, columns: list, unique_col: str = None,
+                                null_counts: dict = None) -> pd.DataFrame:
     """
     Filters the dataframe removing rows where any of the specified columns contain missing or invalid data.
 
+    The checked columns come back stripped, with null tokens (NULL_TOKENS) as
+    missing values; other columns are untouched. Only the checked columns are
+    rebuilt and the kept rows selected once, so the full frame is not copied first.
+
     Args:
         df (pd.DataFrame): Input dataframe to filter
         columns (list of str): List of column names to check for missing data
         unique_col (str, optional): Column name to keep unique values for. Defaults to None.
+        null_counts (dict, optional): Filled with the number of missing values
+            (real nulls plus null tokens) found per checked column.
 
     Returns:
         pd.DataFrame: Filtered dataframe with rows having no missing/invalid data in given columns
     """
-
-    def clean_column(series):
-        cleaned = series.astype(str).str.strip()
-        cleaned_lower = cleaned.str.lower()
-        null_equivalents = ['', 'na', 'nan', 'null', 'none', 'undefined']
-        cleaned[cleaned_lower.isin(null_equivalents)] = np.nan
-        return cleaned
-
-    df_cleaned = df.copy()
-
     for col in columns:
-        if col in df_cleaned.columns:
-            df_cleaned[col] = clean_column(df_cleaned[col])
-        else:
+        if col not in df.columns:
             raise ValueError(f"Column '{col}' not found in dataframe")
 
-    filtered_df = df_cleaned.dropna(subset=columns)
+    cleaned = {}
+    keep = np.ones(len(df), dtype=bool)
+    for col in columns:
+        cleaned[col], null = clean_null_tokens(df[col])
+        keep &= ~null
+        if null_counts is not None:
+            null_counts[col] = int(null.sum())
+
+    # One new frame of the kept rows with the cleaned columns (no writes into a slice)
+    filtered_df = df.loc[keep].assign(**{col: values[keep] for col, values in cleaned.items()})
 
     if unique_col:
         if unique_col in filtered_df.columns:
@@ -62,4 +192,4 @@ def filter_dataframe_by_columns(df: pd.DataFrame, columns: list, unique_col: str
         else:
             raise ValueError(f"Unique column '{unique_col}' not found in dataframe")
 
-    return filtered_df
\ No newline at end of file
+    return filtered_df
@@ -1,10 +1,13 @@
 # matching/loaders/load_voterfile.py
 
+import time
+
 import pandas as pd
 from matching.config.column_map import VOTERFILE_COL_MAP
 from matching.config.match_config import MIAMI_DADE_CODE
+from matching.loaders.voterfile_snapshot import stream_voterfile_snapshot
 from matching.utils.validators import require_columns
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 import matching.utils.db as db  # your existing helper
 
 def load_voterfile_2018_miami() -> pd.DataFrame:
@@ -22,4 +25,102 @@ def standardize_voterfile_columns(vf_raw: pd.DataFrame) -> pd.DataFrame:
 def load_voterfile_chunk(engine, sql_query, chunksize=100000):
     """Yield chunks of voterfile data from database."""
     # engine: SQLAlchemy engine
-    yield from pd.read_sql_query(sql_query, engine, chunksize=chunksize)
\ No newline at end of file
+    yield from pd.read_sql_query(sql_query, engine, chunksize=chunksize)
+
+
+def voterfile_query_columns(conn, sql_query: str) -> list:
+    """Column names `sql_query` returns, without fetching any rows."""
+    sql_query = sql_query.strip().rstrip(";")
+    return list(conn.execute(text(f"SELECT * FROM ({sql_query}) AS vf LIMIT 0")).keys())
+
+
+def projected_voterfile_sql(sql_query: str, columns, col_map: dict, dialect) -> str:
+    """
+    Wrap `sql_query` so it returns only the `col_map` columns it has, already
+    renamed (`SELECT "first_name" AS "first_name_vf", ... FROM (<sql_query>) AS vf`).
+
+    Args:
+        sql_query (str): Voterfile query, e.g. "SELECT * FROM voterfile.election_detail_2024".
+        columns (list of str): Columns `sql_query` returns (voterfile_query_columns).
+        col_map (dict): Source column -> output name; source columns not in `columns` are skipped.
+        dialect: SQLAlchemy dialect used to quote identifiers.
+
+    Returns:
+        str: The projecting query.
+
+    Raises:
+        ValueError: If none of the col_map columns are present.
+    """
+    quote = dialect.identifier_preparer.quote
+    present = [c for c in col_map if c in columns]
+    if not present:
+        raise ValueError(f"Voterfile query returns none of the mapped columns {list(col_map)}")
+    select_list = ", ".join(f"vf.{quote(c)} AS {quote(col_map[c])}" for c in present)
+    return f"SELECT {select_list} FROM ({sql_query.strip().rstrip(';')}) AS vf"
+
+
+def stream_voterfile(engine, sql_query, col_map=VOTERFILE_COL_MAP, chunksize=100000, stats=None):
+    """
+    Yield voterfile chunks through a server-side cursor, projected and renamed.
+
+    The query runs with `stream_results`, so the driver fetches rows as they are
+    consumed (a named cursor on psycopg2) instead of pulling the whole result
+    set to the client before the first chunk; client memory stays around one
+    chunk. Only the `col_map` columns are selected, renamed in the same SELECT.
+
+    Args:
+        engine: SQLAlchemy engine.
+        sql_query (str): Voterfile query (any SELECT; it is wrapped as a subquery).
+        col_map (dict, optional): Source column -> output name. Defaults to
+            VOTERFILE_COL_MAP, as standardize_voterfile_columns uses.
+        chunksize (int, optional): Rows per chunk.
+        stats (dict, optional): Updated in place with chunks, rows, bytes
+            (in-memory size of the chunks) and seconds. The query's fetch time
+            and rows also go into db.QUERY_METRICS.
+
+    Yields:
+        pd.DataFrame: Chunks with the renamed columns.
+    """
+    stats = {} if stats is None else stats
+    for key in ("chunks", "rows", "bytes", "seconds"):
+        stats.setdefault(key, 0)
+    rows_before, seconds_before = stats["rows"], stats["seconds"]
+
+    with engine.connect() as conn:
+        columns = voterfile_query_columns(conn, sql_query)
+        select_sql = projected_voterfile_sql(sql_query, columns, col_map, engine.dialect)
+        conn = conn.execution_options(stream_results=True, max_row_buffer=chunksize)
+        start = time.perf_counter()
+        result = conn.execute(text(select_sql))
+        out_columns = list(result.keys())
+        partitions = result.partitions(chunksize)
+        while True:
+            # time only the fetch and frame build, not the caller's work between chunks
+            rows = next(partitions, None)
+            if rows is None:
+                break
+            chunk = pd.DataFrame.from_records(rows, columns=out_columns, coerce_float=True)
+            stats["chunks"] += 1
+            stats["rows"] += len(chunk)
+            stats["bytes"] += int(chunk.memory_usage(deep=True).sum())
+            stats["seconds"] += time.perf_counter() - start
+            rate = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+            print(
+                f"Voterfile chunk {stats['chunks'] - 1}: {len(chunk)} rows, "
+                f"{stats['bytes'] / 1e6:.1f} MB read so far, {rate:,.0f} rows/sec"
+            )
+            yield chunk
+            start = time.perf_counter()
+    db.record_query(stats["seconds"] - seconds_before, stats["rows"] - rows_before)
+
+
+def voterfile_chunks(engine, sql_query, col_map=VOTERFILE_COL_MAP, chunksize=100000, stats=None, snapshot_path=None):
+    """
+    Voterfile chunks from a local snapshot when `snapshot_path` is given
+    (stream_voterfile_snapshot), otherwise from the database (stream_voterfile).
+    Both project and rename with `col_map` and fill the same `stats`.
+    """
+    if snapshot_path:
+        print(f"Reading voterfile from snapshot {snapshot_path}")
+        return stream_voterfile_snapshot(snapshot_path, col_map=col_map, chunksize=chunksize, stats=stats)
+    return stream_voterfile(engine, sql_query, col_map=col_map, chunksize=chunksize, stats=stats)
@@ -0,0 +1,241 @@
+# matching/loaders/voterfile_snapshot.py
+
+# Local columnar copy of a voterfile query, so training and inference runs do
+# not re-read the table over the network.
+#
+# A snapshot is two files in the snapshot directory:
+#   <name>.parquet  the query result with an explicit schema: dates as date32,
+#                   SNAPSHOT_DICTIONARY_COLUMNS dictionary-encoded, everything
+#                   else string (no per-block type inference)
+#   <name>.json     source query, row count, columns and the SHA-1 of the
+#                   exported CSV bytes (also stored in the Parquet metadata)
+#
+# Export is one `COPY (<query>) TO STDOUT` (psycopg2 copy_expert) into a CSV
+# file, converted to Parquet block by block; loading memory-maps the file.
+
+import csv
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from matching.config.column_map import SNAPSHOT_DATE_COLUMNS, SNAPSHOT_DICTIONARY_COLUMNS, VOTERFILE_COL_MAP
+
+
+# bump when the snapshot layout or column typing changes
+SNAPSHOT_VERSION = "1"
+SNAPSHOT_DIR = "snapshots"
+
+# bytes per CSV block read during conversion; one Parquet row group each
+_CSV_BLOCK_SIZE = 64 << 20
+
+
+class _HashingWriter:
+    """File wrapper that hashes and counts everything written through it."""
+
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.sha1()
+        self.n_bytes = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.digest.update(data)
+        self.n_bytes += len(data)
+        return self.f.write(data)
+
+
+def snapshot_paths(name: str, snapshot_dir: str = SNAPSHOT_DIR):
+    """(parquet_path, meta_path) for snapshot `name`."""
+    return os.path.join(snapshot_dir, f"{name}.parquet"), os.path.join(snapshot_dir, f"{name}.json")
+
+
+def copy_query_to_csv(engine, sql_query: str, csv_path: str) -> dict:
+    """
+    Export `sql_query` to a CSV file (with header) through COPY ... TO STDOUT.
+
+    Args:
+        engine: SQLAlchemy engine on a psycopg2 (Postgres) connection.
+        sql_query (str): Query to export.
+        csv_path (str): Output CSV path.
+
+    Returns:
+        dict: sha1 (hex digest of the CSV bytes), bytes and seconds.
+    """
+    sql_query = sql_query.strip().rstrip(";")
+    start = time.perf_counter()
+    conn = engine.raw_connection()
+    try:
+        with open(csv_path, "wb") as f:
+            writer = _HashingWriter(f)
+            cursor = conn.cursor()
+            cursor.copy_expert(f"COPY ({sql_query}) TO STDOUT WITH (FORMAT csv, HEADER true)", writer)
+            cursor.close()
+    finally:
+        conn.close()
+    return {"sha1": writer.digest.hexdigest(), "bytes": writer.n_bytes, "seconds": time.perf_counter() - start}
+
+
+def snapshot_column_types(columns) -> dict:
+    """Arrow type per CSV column: date32, dictionary-encoded string, or string."""
+    types = {}
+    for col in columns:
+        if col in SNAPSHOT_DATE_COLUMNS:
+            types[col] = pa.date32()
+        elif col in SNAPSHOT_DICTIONARY_COLUMNS:
+            types[col] = pa.dictionary(pa.int32(), pa.string())
+        else:
+            types[col] = pa.string()
+    return types
+
+
+def csv_to_parquet_snapshot(csv_path: str, parquet_path: str, metadata: dict = None) -> int:
+    """
+    Convert an exported CSV to a typed Parquet snapshot, one block at a time.
+
+    Args:
+        csv_path (str): CSV with a header row, as written by copy_query_to_csv.
+        parquet_path (str): Output path; written to a temporary file and moved into place.
+        metadata (dict, optional): String key/values stored in the Parquet schema metadata.
+
+    Returns:
+        int: Rows written.
+    """
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        header = next(csv.reader(f))
+    reader = pa_csv.open_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(block_size=_CSV_BLOCK_SIZE),
+        convert_options=pa_csv.ConvertOptions(column_types=snapshot_column_types(header), strings_can_be_null=True),
+    )
+    schema = reader.schema.with_metadata({k: str(v) for k, v in (metadata or {}).items()})
+
+    tmp_path = f"{parquet_path}.tmp"
+    n_rows = 0
+    with pq.ParquetWriter(tmp_path, schema) as writer:
+        for batch in reader:
+            writer.write_table(pa.Table.from_batches([batch], schema=schema))
+            n_rows += batch.num_rows
+    os.replace(tmp_path, parquet_path)
+    return n_rows
+
+
+def export_voterfile_snapshot(engine, sql_query: str, name: str, snapshot_dir: str = SNAPSHOT_DIR) -> dict:
+    """
+    Export a voterfile query once and store it as a local Parquet snapshot.
+
+    Args:
+        engine: SQLAlchemy engine (Postgres, for COPY).
+        sql_query (str): Voterfile query, e.g.
+            "SELECT * FROM voterfile.election_detail_2024 WHERE county = 'DAD'".
+        name (str): Snapshot name (file stem).
+        snapshot_dir (str, optional): Directory for the snapshot files.
+
+    Returns:
+        dict: The snapshot metadata (also written to <name>.json).
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    parquet_path, meta_path = snapshot_paths(name, snapshot_dir)
+    csv_path = os.path.join(snapshot_dir, f"{name}.csv.tmp")
+    try:
+        copied = copy_query_to_csv(engine, sql_query, csv_path)
+        print(f"Snapshot {name}: copied {copied['bytes'] / 1e6:.1f} MB in {copied['seconds']:.1f}s")
+        meta = {
+            "name": name,
+            "sql": sql_query,
+            "sha1": copied["sha1"],
+            "version": SNAPSHOT_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        meta["rows"] = csv_to_parquet_snapshot(csv_path, parquet_path, metadata=meta)
+    finally:
+        if os.path.exists(csv_path):
+            os.remove(csv_path)
+
+    meta["columns"] = pq.read_schema(parquet_path).names
+    tmp_meta = f"{meta_path}.tmp"
+    with open(tmp_meta, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_meta, meta_path)
+    print(f"Snapshot {name}: {meta['rows']} rows written to {parquet_path} (sha1 {meta['sha1'][:12]})")
+    return meta
+
+
+def load_snapshot_meta(parquet_path: str) -> dict:
+    """Metadata stored in a snapshot's Parquet schema (name, sql, sha1, version, ...)."""
+    raw = pq.read_schema(parquet_path).metadata or {}
+    return {k.decode(): v.decode() for k, v in raw.items() if not k.startswith(b"ARROW") and k != b"pandas"}
+
+
+def _projection(parquet_path: str, col_map: dict):
+    """Snapshot columns to read for `col_map` (all when None), after a version check."""
+    meta = load_snapshot_meta(parquet_path)
+    if meta.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(
+            f"Snapshot {parquet_path} has version {meta.get('version')!r}, expected {SNAPSHOT_VERSION!r}; re-export it"
+        )
+    if col_map is None:
+        return None
+    names = pq.read_schema(parquet_path).names
+    columns = [c for c in col_map if c in names]
+    if not columns:
+        raise ValueError(f"Snapshot {parquet_path} has none of the mapped columns {list(col_map)}")
+    return columns
+
+
+def load_voterfile_snapshot(parquet_path: str, col_map=VOTERFILE_COL_MAP) -> pd.DataFrame:
+    """
+    Read a snapshot into one DataFrame (memory-mapped), projected and renamed.
+
+    Args:
+        parquet_path (str): Snapshot Parquet file.
+        col_map (dict, optional): Source column -> output name, as stream_voterfile;
+            None reads every column under its original name.
+
+    Returns:
+        pd.DataFrame: The voterfile; dictionary columns load as categoricals.
+    """
+    columns = _projection(parquet_path, col_map)
+    df = pq.read_table(parquet_path, columns=columns, memory_map=True).to_pandas()
+    return df.rename(columns=col_map) if col_map is not None else df
+
+
+def stream_voterfile_snapshot(parquet_path: str, col_map=VOTERFILE_COL_MAP, chunksize=100000, stats=None):
+    """
+    Yield a snapshot in chunks, like stream_voterfile does from the database.
+
+    Args:
+        parquet_path (str): Snapshot Parquet file.
+        col_map (dict, optional): Source column -> output name; None keeps all columns.
+        chunksize (int, optional): Rows per chunk.
+        stats (dict, optional): Updated in place with chunks, rows, bytes and seconds.
+
+    Yields:
+        pd.DataFrame: Chunks with the renamed columns.
+    """
+    stats = {} if stats is None else stats
+    for key in ("chunks", "rows", "bytes", "seconds"):
+        stats.setdefault(key, 0)
+
+    columns = _projection(parquet_path, col_map)
+    parquet_file = pq.ParquetFile(parquet_path, memory_map=True)
+    batches = parquet_file.iter_batches(batch_size=chunksize, columns=columns)
+    while True:
+        start = time.perf_counter()
+        batch = next(batches, None)
+        if batch is None:
+            break
+        chunk = batch.to_pandas()
+        if col_map is not None:
+            chunk = chunk.rename(columns=col_map)
+        stats["chunks"] += 1
+        stats["rows"] += len(chunk)
+        stats["bytes"] += int(chunk.memory_usage(deep=True).sum())
+        stats["seconds"] += time.perf_counter() - start
+        yield chunk
@@ -0,0 +1,152 @@
+# matching/modeling/cascade.py
+
+# Two-stage scoring. Stage 1 computes a few cheap features for every candidate
+# pair; for a linear model the remaining features can add at most a known
+# amount to the score, so pairs whose best possible match_prob is still below
+# the threshold are dropped before the expensive features are built. Pruning
+# is exact: every dropped pair would have scored below the threshold.
+
+import numpy as np
+import pandas as pd
+
+from matching.config.match_config import CASCADE_STAGE1_FEATURES, MATCH_THRESHOLD
+from matching.features.feature_builder import compute_similarity_columns, normalize_name_columns
+from matching.features.registry import FEATURES
+
+
+# slack on the pruning bound so float rounding never drops a pair at the threshold
+_LOGIT_TOLERANCE = 1e-9
+
+
+class CascadeScorer:
+    """
+    Cascade scoring for a ModelBundle whose estimator is linear in its features
+    (coef_ / intercept_, e.g. LogisticRegression).
+
+    Args:
+        bundle (ModelBundle): The model; its feature_cols are split into stages.
+        threshold (float, optional): match_prob a pair must be able to reach to
+            survive stage 1. Defaults to MATCH_THRESHOLD.
+        stage1 (list of str, optional): Cheap features computed for every pair.
+            Defaults to CASCADE_STAGE1_FEATURES; names the model does not use are ignored.
+
+    Raises:
+        ValueError: If the estimator is not a linear binary classifier or the
+            threshold is outside (0, 1).
+    """
+
+    def __init__(self, bundle, threshold: float = None, stage1=None):
+        coef = getattr(bundle.estimator, "coef_", None)
+        intercept = getattr(bundle.estimator, "intercept_", None)
+        if coef is None or intercept is None or np.ndim(coef) != 2 or np.shape(coef)[0] != 1:
+            raise ValueError(
+                f"Cascade scoring needs a linear binary model with coef_ and intercept_, "
+                f"got {type(bundle.estimator).__name__}"
+            )
+        self.threshold = MATCH_THRESHOLD if threshold is None else threshold
+        if not 0.0 < self.threshold < 1.0:
+            raise ValueError(f"Cascade threshold must be between 0 and 1, got {self.threshold}")
+        stage1 = CASCADE_STAGE1_FEATURES if stage1 is None else stage1
+
+        self.bundle = bundle
+        weights = dict(zip(bundle.feature_cols, np.asarray(coef[0], dtype=np.float64)))
+        self.stage1 = [c for c in stage1 if c in weights]
+        self.stage2 = [c for c in bundle.feature_cols if c not in self.stage1]
+        self.stage1_weights = np.array([weights[c] for c in self.stage1], dtype=np.float64)
+
+        # Most the stage-2 features can add to the logit, from each feature's bounds
+        stage2_max = sum(
+            max(weights[c] * FEATURES.features[c].bounds[0], weights[c] * FEATURES.features[c].bounds[1])
+            for c in self.stage2
+        )
+        logit_threshold = np.log(self.threshold / (1.0 - self.threshold))
+        # A pair survives when its stage-1 contribution can still reach the threshold
+        self.min_stage1_score = logit_threshold - float(np.ravel(intercept)[0]) - stage2_max
+        self.stats = {"pairs": 0, "pruned": 0}
+
+    @property
+    def feature_cols(self):
+        return self.bundle.feature_cols
+
+    def pruning_rate(self) -> float:
+        """Share of all pairs seen so far that stage 1 dropped."""
+        return self.stats["pruned"] / self.stats["pairs"] if self.stats["pairs"] else 0.0
+
+    def survivors(self, X1: pd.DataFrame) -> np.ndarray:
+        """Boolean mask of pairs whose stage-1 features (columns self.stage1) can still reach the threshold."""
+        score = X1[self.stage1].to_numpy(dtype=np.float64) @ self.stage1_weights
+        return score >= self.min_stage1_score - _LOGIT_TOLERANCE
+
+    def score(self, candidates: pd.DataFrame, pair_cache=None, stats=None) -> pd.DataFrame:
+        """
+        Score candidate pairs, dropping those that cannot reach the threshold.
+
+        Names are normalized in place first, as add_features does.
+
+        Args:
+            candidates (pd.DataFrame): Candidate pairs from blocking.
+            pair_cache (LRUCache, optional): Similarity scores shared across chunks.
+            stats (dict, optional): Comparison counters updated in place.
+
+        Returns:
+            pd.DataFrame: The surviving pairs with match_prob.
+        """
+        normalize_name_columns(candidates, self.feature_cols)
+        X1 = compute_similarity_columns(candidates, pair_cache=pair_cache, stats=stats, feature_cols=self.stage1)
+        keep = self.survivors(X1)
+        survivors = candidates[keep].copy()
+
+        self.stats["pairs"] += len(candidates)
+        self.stats["pruned"] += int((~keep).sum())
+        print(
+            f"cascade: {len(survivors)} of {len(candidates)} pairs survive stage 1 "
+            f"({1 - len(survivors) / max(len(candidates), 1):.1%} pruned, threshold {self.threshold})"
+        )
+        if survivors.empty:
+            survivors["match_prob"] = pd.Series(dtype=np.float64)
+            return survivors
+
+        X = compute_similarity_columns(survivors, pair_cache=pair_cache, stats=stats, feature_cols=self.stage2)
+        for col in self.stage1:
+            X[col] = X1[col].to_numpy()[keep]
+        survivors["match_prob"] = self.bundle.predict_proba(X[self.feature_cols])[:, 1]
+        return survivors
+
+
+def verify_cascade_recall(scorer: CascadeScorer, pairs_df: pd.DataFrame) -> dict:
+    """
+    Check the cascade against labelled pairs (e.g. gold positives plus negatives).
+
+    Every pair is scored with the full model and with the stage-1 filter, so
+    the report shows how much the cascade prunes and whether any pair the full
+    model would accept (match_prob >= threshold) is lost.
+
+    Args:
+        scorer (CascadeScorer): The cascade.
+        pairs_df (pd.DataFrame): Pairs with the model's input columns and is_match.
+
+    Returns:
+        dict: pairs, pruned, pruning_rate, gold_pairs, gold_pruned,
+            gold_recall_full (gold pairs at or above the threshold with the full
+            model), gold_recall_cascade (the same after stage 1) and lost_matches
+            (pairs at or above the threshold that stage 1 drops; 0 when the
+            bounds hold).
+    """
+    df = normalize_name_columns(pairs_df.copy(), scorer.feature_cols)
+    X = compute_similarity_columns(df, feature_cols=scorer.feature_cols)
+    probs = scorer.bundle.predict_proba(X)[:, 1]
+    keep = scorer.survivors(X)
+    accepted = probs >= scorer.threshold
+    gold = df["is_match"].to_numpy() == 1
+    n_gold = int(gold.sum())
+
+    return {
+        "pairs": len(df),
+        "pruned": int((~keep).sum()),
+        "pruning_rate": float((~keep).mean()) if len(df) else 0.0,
+        "gold_pairs": n_gold,
+        "gold_pruned": int((gold & ~keep).sum()),
+        "gold_recall_full": float((gold & accepted).sum() / n_gold) if n_gold else float("nan"),
+        "gold_recall_cascade": float((gold & accepted & keep).sum() / n_gold) if n_gold else float("nan"),
+        "lost_matches": int((accepted & ~keep).sum()),
+    }
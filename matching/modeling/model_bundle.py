@@ -0,0 +1,152 @@
+# matching/modeling/model_bundle.py
+
+# A trained model saved together with the schema it was fit on:
+#
+#   estimator              the fitted sklearn-style classifier
+#   feature_cols           feature names, in the order the estimator expects
+#   normalization_version  name_normalization_version() at training time
+#   metrics                evaluation metrics from training
+#
+# At inference the bundle decides which features add_features computes
+# (features the model does not use are never built) and rejects feature frames
+# or normalization rules that do not match what the model was trained on.
+
+import joblib
+import pandas as pd
+
+from matching.features.feature_builder import SIMILARITY_FEATURE_COLS
+from matching.features.name_normalization import name_normalization_version
+from matching.features.registry import FEATURES
+
+
+MODEL_BUNDLE_VERSION = "1"
+
+
+class ModelBundle:
+    """
+    Estimator plus its feature schema.
+
+    Args:
+        estimator: Fitted classifier with predict_proba.
+        feature_cols (list of str): Registered feature names, in training order.
+        normalization_version (str, optional): Name-normalization fingerprint the
+            training features were built with. Defaults to the current one.
+        metrics (dict, optional): Training / evaluation metrics.
+
+    Raises:
+        ValueError: If a feature is not registered or the estimator was fit on
+            different columns.
+    """
+
+    def __init__(self, estimator, feature_cols, normalization_version=None, metrics=None):
+        self.estimator = estimator
+        self.feature_cols = list(feature_cols)
+        self.normalization_version = (
+            name_normalization_version() if normalization_version is None else normalization_version
+        )
+        self.metrics = metrics or {}
+        self.validate()
+
+    def validate(self):
+        """Check the schema against the feature registry and the estimator itself."""
+        unknown = [c for c in self.feature_cols if c not in FEATURES]
+        if unknown:
+            raise ValueError(f"Model bundle uses unregistered features {unknown}")
+        fitted = getattr(self.estimator, "feature_names_in_", None)
+        if fitted is not None and list(fitted) != self.feature_cols:
+            raise ValueError(
+                f"Estimator was fit on {list(fitted)}, but the bundle lists {self.feature_cols}"
+            )
+        n_fitted = getattr(self.estimator, "n_features_in_", None)
+        if n_fitted is not None and n_fitted != len(self.feature_cols):
+            raise ValueError(
+                f"Estimator expects {n_fitted} features, but the bundle lists {len(self.feature_cols)}"
+            )
+
+    def check_normalization(self):
+        """
+        Raises:
+            ValueError: If the name-normalization rules changed since training.
+        """
+        current = name_normalization_version()
+        if self.normalization_version != current:
+            raise ValueError(
+                f"Model was trained with name normalization {self.normalization_version}, "
+                f"current rules are {current}; retrain or restore the nickname/surname maps"
+            )
+
+    def check_features(self, X: pd.DataFrame):
+        """
+        Raises:
+            ValueError: If X does not have exactly feature_cols, in order.
+        """
+        if list(X.columns) != self.feature_cols:
+            missing = [c for c in self.feature_cols if c not in X.columns]
+            extra = [c for c in X.columns if c not in self.feature_cols]
+            raise ValueError(
+                f"Feature frame does not match the model schema "
+                f"(missing {missing}, unexpected {extra}, expected order {self.feature_cols})"
+            )
+
+    def predict_proba(self, X: pd.DataFrame):
+        """Estimator probabilities for X after checking its columns against the schema."""
+        self.check_features(X)
+        return self.estimator.predict_proba(X)
+
+    def to_dict(self) -> dict:
+        return {
+            "bundle_version": MODEL_BUNDLE_VERSION,
+            "estimator": self.estimator,
+            "feature_cols": self.feature_cols,
+            "normalization_version": self.normalization_version,
+            "metrics": self.metrics,
+        }
+
+
+def save_model_bundle(bundle: ModelBundle, path: str):
+    """Write the bundle as a joblib pickle of ModelBundle.to_dict()."""
+    joblib.dump(bundle.to_dict(), path)
+
+
+def load_model_bundle(path: str, check_normalization: bool = True) -> ModelBundle:
+    """
+    Load a model saved by save_model_bundle.
+
+    A bare estimator pickle (the older format) is wrapped with its
+    feature_names_in_, or SIMILARITY_FEATURE_COLS when it has none; its
+    normalization rules are unknown, so that check is skipped.
+
+    Args:
+        path (str): Bundle or estimator pickle.
+        check_normalization (bool): Reject bundles whose normalization version
+            differs from the current rules.
+
+    Returns:
+        ModelBundle: The loaded bundle.
+
+    Raises:
+        ValueError: If the file's schema is inconsistent or does not match the
+            current code.
+    """
+    obj = joblib.load(path)
+    if not isinstance(obj, dict):
+        fitted = getattr(obj, "feature_names_in_", None)
+        feature_cols = SIMILARITY_FEATURE_COLS if fitted is None else list(fitted)
+        print(f"load_model_bundle: {path} is a bare estimator, assuming features {feature_cols}")
+        return ModelBundle(obj, feature_cols)
+
+    if obj.get("bundle_version") != MODEL_BUNDLE_VERSION:
+        raise ValueError(
+            f"Unsupported model bundle version {obj.get('bundle_version')!r} in {path}, "
+            f"expected {MODEL_BUNDLE_VERSION!r}"
+        )
+    bundle = ModelBundle(
+        obj["estimator"],
+        obj["feature_cols"],
+        normalization_version=obj["normalization_version"],
+        metrics=obj.get("metrics"),
+    )
+    if check_normalization:
+        bundle.check_normalization()
+    print(f"load_model_bundle: {path} uses {len(bundle.feature_cols)} features: {bundle.feature_cols}")
+    return bundle
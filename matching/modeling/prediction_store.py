@@ -0,0 +1,146 @@
+# matching/modeling/prediction_store.py
+
+# Scored candidate pairs as one partitioned Parquet dataset:
+#
+#   <dataset_dir>/chunk=<idx>/part-0.parquet   one file per voterfile chunk / batch
+#   <dataset_dir>/_metadata                    combined footers (write_dataset_metadata)
+#
+# Every file has PREDICTION_SCHEMA, so chunks can be read together without
+# type reconciliation, and rewriting a chunk on resume replaces its file.
+
+import os
+from glob import glob
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+PREDICTION_FILE = "part-0.parquet"
+DATASET_METADATA_FILE = "_metadata"
+
+# repeated low-cardinality strings are stored dictionary-encoded
+_dict_string = pa.dictionary(pa.int32(), pa.string())
+
+# columns kept from the candidate frame; anything else is dropped on write
+PREDICTION_SCHEMA = pa.schema([
+    ("registration_form_id", pa.string()),
+    ("voter_id", pa.string()),
+    ("first_name_att", _dict_string),
+    ("last_name_att", _dict_string),
+    ("dob_norm_att", pa.date32()),
+    ("zip_norm_att", _dict_string),
+    ("first_name_vf", _dict_string),
+    ("last_name_vf", _dict_string),
+    ("dob_norm_vf", pa.date32()),
+    ("zip_norm_vf", _dict_string),
+    ("block_pass", _dict_string),
+    ("match_prob", pa.float64()),
+])
+
+ID_COLUMNS = ["registration_form_id", "voter_id"]
+
+
+def prediction_table(candidates_df: pd.DataFrame, schema: pa.Schema = None) -> pa.Table:
+    """
+    Project a scored candidate frame onto the prediction schema.
+
+    Columns missing from the frame (e.g. block_pass without multi-pass blocking)
+    are written as nulls; IDs are stored as strings whatever their source type.
+
+    Args:
+        candidates_df (pd.DataFrame): Candidate pairs with match_prob.
+        schema (pa.Schema, optional): Target schema. Defaults to PREDICTION_SCHEMA.
+
+    Returns:
+        pa.Table: Table with exactly the schema's columns and types.
+    """
+    schema = PREDICTION_SCHEMA if schema is None else schema
+    columns = {}
+    for field in schema:
+        if field.name in candidates_df.columns:
+            values = candidates_df[field.name]
+            if field.name in ID_COLUMNS:
+                values = values.astype("string")
+            columns[field.name] = values.reset_index(drop=True)
+        else:
+            columns[field.name] = pd.Series([None] * len(candidates_df), dtype=object)
+    return pa.Table.from_pandas(pd.DataFrame(columns), schema=schema, preserve_index=False)
+
+
+def chunk_path(dataset_dir: str, chunk_idx: int) -> str:
+    """Path of the file holding chunk `chunk_idx`."""
+    return os.path.join(dataset_dir, f"chunk={chunk_idx}", PREDICTION_FILE)
+
+
+def write_prediction_chunk(candidates_df: pd.DataFrame, chunk_idx: int, dataset_dir: str) -> str:
+    """
+    Write one chunk's predictions into the dataset, replacing any earlier copy.
+
+    Args:
+        candidates_df (pd.DataFrame): Candidate pairs with match_prob.
+        chunk_idx (int): Chunk (or batch) index; becomes the `chunk` partition.
+        dataset_dir (str): Dataset root directory.
+
+    Returns:
+        str: Path of the written file.
+    """
+    path = chunk_path(dataset_dir, chunk_idx)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(prediction_table(candidates_df), tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def prediction_files(dataset_dir: str) -> list:
+    """Chunk files in the dataset, in chunk order."""
+    files = glob(os.path.join(dataset_dir, "chunk=*", PREDICTION_FILE))
+    return sorted(files, key=lambda f: int(os.path.basename(os.path.dirname(f)).split("=", 1)[1]))
+
+
+def write_dataset_metadata(dataset_dir: str) -> dict:
+    """
+    Combine the footers of every chunk file into `<dataset_dir>/_metadata`.
+
+    Only Parquet footers are read, never row data, so this is the whole
+    "merge" step: readers open the dataset through the _metadata file.
+
+    Args:
+        dataset_dir (str): Dataset root directory.
+
+    Returns:
+        dict: n_files and n_rows covered by the metadata file.
+    """
+    files = prediction_files(dataset_dir)
+    if not files:
+        raise ValueError(f"write_dataset_metadata: no prediction files under {dataset_dir}")
+
+    collected = []
+    n_rows = 0
+    for path in files:
+        metadata = pq.read_metadata(path)
+        metadata.set_file_path(os.path.relpath(path, dataset_dir).replace(os.sep, "/"))
+        collected.append(metadata)
+        n_rows += metadata.num_rows
+
+    pq.write_metadata(
+        PREDICTION_SCHEMA,
+        os.path.join(dataset_dir, DATASET_METADATA_FILE),
+        metadata_collector=collected,
+    )
+    return {"n_files": len(files), "n_rows": n_rows}
+
+
+def open_prediction_dataset(dataset_dir: str) -> ds.Dataset:
+    """
+    Open the predictions as a lazy pyarrow dataset (with the `chunk` partition
+    column). Uses the _metadata file when present, else discovers the files.
+    Read only what you need, e.g. `.to_table(columns=[...])`.
+    """
+    metadata_path = os.path.join(dataset_dir, DATASET_METADATA_FILE)
+    if os.path.exists(metadata_path):
+        return ds.parquet_dataset(metadata_path, partitioning="hive")
+    return ds.dataset(dataset_dir, format="parquet", partitioning="hive",
+                      exclude_invalid_files=True)
@@ -0,0 +1,126 @@
+# matching/modeling/top_k.py
+
+# Best matches without the full candidate set: fold each scored chunk into the
+# k highest-probability candidates per registration_form_id as it finishes.
+
+import hashlib
+import os
+
+import pandas as pd
+
+from matching.candidates.prepared_attempts import PREPARED_ATTEMPTS_VERSION, file_fingerprint
+from matching.config.match_config import TOP_K_MATCHES
+from matching.modeling.prediction_store import PREDICTION_SCHEMA
+from matching.utils.validators import require_columns
+
+
+class TopKReducer:
+    """
+    Running top-k candidates per registration_form_id.
+
+    State is at most k rows per attempt, so memory does not grow with the
+    number of chunks. Folding a chunk again (e.g. re-run after a crash)
+    replaces that chunk's earlier rows instead of adding to them. Ties keep the
+    candidate from the earliest chunk, like groupby(...).idxmax() over the
+    merged chunks.
+    """
+
+    def __init__(self, k: int = None, columns: list = None):
+        self.k = TOP_K_MATCHES if k is None else k
+        if self.k < 1:
+            raise ValueError(f"TopKReducer k must be at least 1, got {self.k}")
+        self.columns = list(PREDICTION_SCHEMA.names) if columns is None else list(columns)
+        self.state = pd.DataFrame(columns=self.columns + ["chunk"])
+
+    def __len__(self):
+        return len(self.state)
+
+    def _top_k(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = df.sort_values("match_prob", ascending=False, kind="stable")
+        return df.groupby("registration_form_id", sort=False).head(self.k)
+
+    def update(self, candidates_df: pd.DataFrame, chunk_idx: int):
+        """
+        Fold one scored chunk into the running top-k.
+
+        Args:
+            candidates_df (pd.DataFrame): Candidate pairs with registration_form_id,
+                voter_id and match_prob.
+            chunk_idx (int): Chunk index, kept with each row. Rows already held
+                for this index are replaced.
+        """
+        if candidates_df.empty:
+            # a re-folded chunk that now has no candidates drops its earlier rows
+            self.state = self.state[self.state["chunk"] != chunk_idx].reset_index(drop=True)
+            return
+        require_columns(candidates_df, ["registration_form_id", "voter_id", "match_prob"], "candidates_df")
+        chunk = candidates_df[[c for c in self.columns if c in candidates_df.columns]].copy()
+        chunk["registration_form_id"] = chunk["registration_form_id"].astype("string")
+        chunk["voter_id"] = chunk["voter_id"].astype("string")
+        chunk["chunk"] = chunk_idx
+        chunk = self._top_k(chunk.dropna(subset=["match_prob"]))
+
+        kept = self.state[self.state["chunk"] != chunk_idx]
+        parts = [df for df in (kept, chunk) if not df.empty]
+        if not parts:
+            self.state = kept.reset_index(drop=True)
+            return
+        merged = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        # chunk order decides ties, also when an earlier chunk is re-folded last
+        merged = merged.sort_values("chunk", kind="stable")
+        merged = merged.drop_duplicates(["registration_form_id", "voter_id"], keep="first")
+        self.state = self._top_k(merged).reset_index(drop=True)
+
+    def best_matches(self) -> pd.DataFrame:
+        """
+        Highest-probability candidate per registration_form_id.
+
+        Returns:
+            pd.DataFrame: One row per attempt with second_prob (runner-up's
+                match_prob, NaN without one) and margin (match_prob - second_prob,
+                or match_prob when there is no runner-up).
+        """
+        ranked = self.state.sort_values("match_prob", ascending=False, kind="stable")
+        rank = ranked.groupby("registration_form_id", sort=False).cumcount()
+        best = ranked[rank == 0].set_index("registration_form_id")
+        second = ranked[rank == 1].set_index("registration_form_id")["match_prob"]
+
+        best["second_prob"] = second.reindex(best.index)
+        best["margin"] = best["match_prob"] - best["second_prob"].fillna(0.0)
+        return best.reset_index()
+
+    def save(self, path: str):
+        """Persist the state as Parquet (written to a temp file, then renamed)."""
+        tmp_path = f"{path}.tmp"
+        self.state.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> int:
+        """Restore state saved by save(). Returns the number of rows loaded (0 if no file)."""
+        if not os.path.exists(path):
+            return 0
+        self.state = self._top_k(pd.read_parquet(path)).reset_index(drop=True)
+        return len(self.state)
+
+
+def top_k_state_path(attempts_path: str, model_path: str, run_key: str, state_dir: str) -> str:
+    """
+    Parquet path for a reducer's saved state.
+
+    Keyed like exact_matches_path: the attempts file's and the model file's
+    content hashes, PREPARED_ATTEMPTS_VERSION and `run_key` (voterfile source
+    and whatever else decides the chunks and their scores), so a run never
+    resumes from probabilities another model or input produced.
+
+    Args:
+        attempts_path (str): Attempts CSV.
+        model_path (str): Model bundle file.
+        run_key (str): Everything else that changes the scored chunks.
+        state_dir (str): Directory for the state files.
+
+    Returns:
+        str: The Parquet path.
+    """
+    parts = [file_fingerprint(attempts_path), file_fingerprint(model_path), PREPARED_ATTEMPTS_VERSION, run_key]
+    key = hashlib.sha1("\0".join(parts).encode()).hexdigest()
+    return os.path.join(state_dir, f"top_k_{key[:16]}.parquet")
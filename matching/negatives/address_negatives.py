@@ -1,40 +1,114 @@
-from matching.features.address_features import compute_address_similarity
+# matching/negatives/address_negatives.py
+
+import numpy as np
 import pandas as pd
+from rapidfuzz.distance import JaroWinkler
+
+from matching.config.match_config import ADDRESS_NEGATIVE_KEYS
+from matching.features.batch_similarity import pairwise_similarity
+from matching.utils.validators import require_columns
+
+
+NEGATIVE_COLUMNS = [
+    "registration_form_id",
+    "first_name_att", "last_name_att", "dob_norm_att", "zip_norm_att",
+    "first_name_vf", "last_name_vf", "dob_norm_vf", "zip_norm_vf",
+]
+
+
+def address_index_keys(addresses: pd.Series, zips: pd.Series) -> pd.DataFrame:
+    """
+    Cheap keys for narrowing address comparisons.
+
+    Args:
+        addresses (pd.Series): Street address lines.
+        zips (pd.Series): Normalized ZIP codes, aligned with addresses.
+
+    Returns:
+        pd.DataFrame: zip, house_number (leading digits) and street_name (first
+            word after the house number), positionally aligned with the inputs.
+            Missing parts are NA.
+    """
+    addr = addresses.astype("string").str.lower().str.strip()
+    parts = addr.str.extract(r"^(?P<house_number>\d+)\w*\s+(?P<street_name>[a-z0-9]+)")
+    keys = pd.DataFrame({
+        "zip": zips.astype("string").to_numpy(),
+        "house_number": parts["house_number"].to_numpy(),
+        "street_name": parts["street_name"].to_numpy(),
+    })
+    return keys.replace("", pd.NA)
 
 
-def generate_address_negatives(pos_df, vf_df, threshold=0.8):
+def generate_address_negatives(pos_df, vf_df, threshold=0.8, max_per_positive=5, max_total=5000,
+                               keys=None, seed=None):
     """
     Generate negatives where address similarity is above a threshold,
     but names or DOB differ enough to qualify as negatives.
+
+    Candidates are narrowed with an index join on `keys` (by default ZIP and
+    house number) before any address is scored, and all surviving pairs are
+    scored in one batch. Positives without a usable address or key get no
+    address negatives, and none are generated if either frame has no address column.
+
+    Args:
+        pos_df (pd.DataFrame): Positive pairs with voting_street_address_one and
+            the *_att columns.
+        vf_df (pd.DataFrame): Normalized voterfile with residence_address_1 and
+            the *_vf columns.
+        threshold (float): Minimum Jaro-Winkler address similarity.
+        max_per_positive (int): Most negatives kept per positive.
+        max_total (int): Most negatives overall (positives are filled in order).
+        keys (list of str, optional): Index keys from address_index_keys.
+            Defaults to ADDRESS_NEGATIVE_KEYS.
+        seed (int, optional): Seed for choosing among candidates above the caps.
+
+    Returns:
+        pd.DataFrame: Negative pairs with is_match = 0.
     """
-    negatives = []
-    for _, row in pos_df.iterrows():
-        vf_candidates = vf_df  # You could filter candidates by ZIP or region for efficiency
-
-        for _, vf_row in vf_candidates.iterrows():
-            addr_sim = compute_address_similarity(
-                row.get("voting_street_address_one", ""),
-                vf_row.get("residence_address_1", "")
-            )
-            # Basic filters - high address similarity but name or DOB mismatch
-            if addr_sim >= threshold:
-                # Check name or dob differences (you can expand this)
-                if row["first_name_att"] != vf_row["first_name_vf"] or row["dob_norm_att"] != vf_row["dob_norm_vf"]:
-                    negatives.append({
-                        "registration_form_id": row["registration_form_id"],
-                        "first_name_att": row["first_name_att"],
-                        "last_name_att": row["last_name_att"],
-                        "dob_norm_att": row["dob_norm_att"],
-                        "zip_norm_att": row["zip_norm_att"],
-                        "first_name_vf": vf_row["first_name_vf"],
-                        "last_name_vf": vf_row["last_name_vf"],
-                        "dob_norm_vf": vf_row["dob_norm_vf"],
-                        "zip_norm_vf": vf_row["zip_norm_vf"],
-                        "is_match": 0,
-                    })
-                    # Optional: limit negatives per positive here
-                    if len(negatives) > 5:  # for example max 5 per positive
-                        break
-        if len(negatives) > 5000:  # global cap, adjust as needed
-            break
-    return pd.DataFrame(negatives)
\ No newline at end of file
+    keys = ADDRESS_NEGATIVE_KEYS if keys is None else keys
+    require_columns(pos_df, NEGATIVE_COLUMNS[:5], "pos_df")
+    require_columns(vf_df, NEGATIVE_COLUMNS[5:], "vf_df")
+    if "voting_street_address_one" not in pos_df.columns or "residence_address_1" not in vf_df.columns:
+        print("generate_address_negatives: no address columns, skipping address negatives")
+        return pd.DataFrame(columns=NEGATIVE_COLUMNS + ["is_match"])
+    rng = np.random.default_rng(seed)
+
+    # Index join: only pairs sharing every key are ever scored
+    pos_keys = address_index_keys(pos_df["voting_street_address_one"], pos_df["zip_norm_att"])
+    vf_keys = address_index_keys(vf_df["residence_address_1"], vf_df["zip_norm_vf"])
+    left = pos_keys[keys].assign(pos_pos=np.arange(len(pos_df))).dropna(subset=keys)
+    right = vf_keys[keys].assign(vf_pos=np.arange(len(vf_df))).dropna(subset=keys)
+    pairs = left.merge(right, on=keys, how="inner")[["pos_pos", "vf_pos"]]
+    if pairs.empty:
+        return pd.DataFrame(columns=NEGATIVE_COLUMNS + ["is_match"])
+
+    pos_idx = pairs["pos_pos"].to_numpy()
+    vf_idx = pairs["vf_pos"].to_numpy()
+
+    # Basic filters - high address similarity but name or DOB mismatch
+    addr_sim = pairwise_similarity(
+        pos_df["voting_street_address_one"].to_numpy(dtype=object)[pos_idx],
+        vf_df["residence_address_1"].to_numpy(dtype=object)[vf_idx],
+        JaroWinkler,
+    )
+    fn_differs = (
+        pos_df["first_name_att"].iloc[pos_idx].reset_index(drop=True)
+        != vf_df["first_name_vf"].iloc[vf_idx].reset_index(drop=True)
+    ).to_numpy()
+    dob_differs = (
+        pos_df["dob_norm_att"].iloc[pos_idx].reset_index(drop=True)
+        != vf_df["dob_norm_vf"].iloc[vf_idx].reset_index(drop=True)
+    ).to_numpy()
+    keep = (addr_sim >= threshold) & (fn_differs | dob_differs)
+    pairs = pairs[keep]
+
+    # Caps: random pick within each positive, positives in their original order
+    pairs = pairs.iloc[rng.permutation(len(pairs))]
+    pairs = pairs.sort_values("pos_pos", kind="stable")
+    pairs = pairs.groupby("pos_pos", sort=False).head(max_per_positive).head(max_total)
+
+    att = pos_df[NEGATIVE_COLUMNS[:5]].iloc[pairs["pos_pos"].to_numpy()].reset_index(drop=True)
+    vf = vf_df[NEGATIVE_COLUMNS[5:]].iloc[pairs["vf_pos"].to_numpy()].reset_index(drop=True)
+    negatives = pd.concat([att, vf], axis=1)
+    negatives["is_match"] = 0
+    return negatives
@@ -1,13 +1,24 @@
 # matching/negatives/hard_negatives.py
 
-import random
-from collections import defaultdict
+import numpy as np
 import pandas as pd
 
-from matching.utils.normalization import safe_first_letter
+from matching.config.match_config import NEGATIVE_MIX
 from matching.utils.validators import require_columns
 from matching.negatives.address_negatives import generate_address_negatives
-from matching.negatives.phonetic_negatives import generate_phonetic_negatives
+from matching.negatives.phonetic_negatives import phonetic_sampling_spec
+from matching.negatives.sampling import (
+    ATT_COLUMNS,
+    PositionIndex,
+    assemble_negatives,
+    differs,
+    first_letter_series,
+    sample_excluding,
+)
+
+
+# strategies drawn in the batched pass, in their per-positive output order
+DRAW_STRATEGIES = ["zip", "dob", "initials", "random", "phonetic"]
 
 
 # Same ZIP, different DOB
@@ -22,106 +33,127 @@ from matching.negatives.phonetic_negatives import generate_phonetic_negatives
 
 def build_vf_indexes(vf_df: pd.DataFrame):
     """
-    Create dicts keyed by zip, dob, and (fn0, ln0).
+    Create position indexes keyed by zip, dob, and (fn0, ln0).
     Assumes vf_df already has fn_norm_vf, ln_norm_vf, zip_norm_vf, dob_norm_vf.
+    Each index maps a key to the voterfile row positions sharing it.
     """
-    zip_index  = defaultdict(list)
-    dob_index  = defaultdict(list)
-    name_index = defaultdict(list)
+    zip_index = PositionIndex(vf_df["zip_norm_vf"])
+    dob_index = PositionIndex(vf_df["dob_norm_vf"])
+    name_index = PositionIndex(pd.DataFrame({
+        "fn0": first_letter_series(vf_df["fn_norm_vf"]),
+        "ln0": first_letter_series(vf_df["ln_norm_vf"]),
+    }))
+    return zip_index, dob_index, name_index
 
-    for _, r in vf_df.iterrows():
-        zip_index[r["zip_norm_vf"]].append(r)
-        dob_index[r["dob_norm_vf"]].append(r)
 
-        fn0 = safe_first_letter(r["fn_norm_vf"])
-        ln0 = safe_first_letter(r["ln_norm_vf"])
-        if fn0 and ln0:
-            name_index[(fn0, ln0)].append(r)
+def negative_counts(n_pos: int, ratio: float, rng: np.random.Generator) -> np.ndarray:
+    """
+    Negatives per positive for one strategy: floor(ratio) each, plus one more
+    for a random fraction (ratio - floor(ratio)) of the positives.
+    """
+    base = int(np.floor(ratio))
+    return base + (rng.random(n_pos) < ratio - base).astype(np.int64)
 
-    return zip_index, dob_index, name_index
 
-def generate_hard_negatives(pos_df: pd.DataFrame, vf_df: pd.DataFrame) -> pd.DataFrame:
+def generate_hard_negatives(pos_df: pd.DataFrame, vf_df: pd.DataFrame, seed=None, mix=None) -> pd.DataFrame:
     """
     For each positive pair, generate several hard negatives:
-      - same ZIP, different DOB
-      - same DOB, different last name
-      - similar first/last initial
-      - one pure random
+      - zip: same ZIP, different DOB
+      - dob: same DOB, different last name
+      - initials: similar first/last initial
+      - random: pure random, for generalization
+      - phonetic: same last-name sound, different DOB
+      - address: similar address, different first name or DOB
+
+    All index-based and random draws happen in one batched pass and the output
+    is assembled column by column with `take`, so `seed` makes it reproducible.
+
+    Args:
+        pos_df (pd.DataFrame): Positive pairs.
+        vf_df (pd.DataFrame): Normalized voterfile.
+        seed (int, optional): Random seed.
+        mix (dict, optional): Strategy -> negatives per positive (see NEGATIVE_MIX,
+            which fills in any strategy not given). 0 disables a strategy.
+
+    Returns:
+        pd.DataFrame: Negative pairs with is_match = 0, grouped by positive.
     """
-    require_columns(
-        pos_df,
-        ["registration_form_id", "first_name_att", "last_name_att",
-         "dob_norm_att", "zip_norm_att"],
-        "pos_df",
-    )
-
+    require_columns(pos_df, ATT_COLUMNS, "pos_df")
     require_columns(
         vf_df,
         ["first_name_vf", "last_name_vf", "fn_norm_vf", "ln_norm_vf",
          "dob_norm_vf", "zip_norm_vf"],
         "vf_df",
     )
+    mix = {**NEGATIVE_MIX, **(mix or {})}
+    unknown = sorted(set(mix) - set(NEGATIVE_MIX))
+    if unknown:
+        raise ValueError(f"generate_hard_negatives: unknown negative strategies {unknown}")
+    if any(ratio < 0 for ratio in mix.values()):
+        raise ValueError(f"generate_hard_negatives: negative ratios must be >= 0, got {mix}")
+    rng = np.random.default_rng(seed)
+    n_pos = len(pos_df)
+    pos_dob = pos_df["dob_norm_att"]
+    pos_ln = pos_df["last_name_att"]
+
+    # (index, group per positive, validity filter) for each stratified strategy
+    specs = {}
+    if mix["zip"] or mix["dob"] or mix["initials"]:
+        zip_index, dob_index, name_index = build_vf_indexes(vf_df)
+        specs["zip"] = (
+            zip_index, zip_index.groups(pos_df["zip_norm_att"]),
+            lambda p, r: differs(vf_df["dob_norm_vf"].iloc[r], pos_dob.iloc[p]),
+        )
+        specs["dob"] = (
+            dob_index, dob_index.groups(pos_dob),
+            lambda p, r: differs(vf_df["last_name_vf"].iloc[r], pos_ln.iloc[p]),
+        )
+        specs["initials"] = (
+            name_index,
+            name_index.groups(pd.DataFrame({
+                "fn0": first_letter_series(pos_df["first_name_att"]),
+                "ln0": first_letter_series(pos_df["last_name_att"]),
+            })),
+            None,
+        )
+    if mix["phonetic"]:
+        specs["phonetic"] = phonetic_sampling_spec(pos_df, vf_df)
+
+    empty = np.empty(0, dtype=np.int64)
+    pos_parts, vf_parts, order_parts = [empty], [empty], [empty]
+    for order, strategy in enumerate(DRAW_STRATEGIES):
+        if not mix[strategy]:
+            continue
+        queries = np.repeat(np.arange(n_pos), negative_counts(n_pos, mix[strategy], rng))
+        if strategy == "random":
+            rows = rng.integers(0, len(vf_df), len(queries)) if len(vf_df) else np.full(len(queries), -1)
+        else:
+            index, groups, is_valid = specs[strategy]
+            if is_valid is None:
+                rows = index.draw(groups[queries], rng)
+            else:
+                rows = sample_excluding(
+                    index, groups[queries],
+                    lambda q, r: is_valid(queries[q], r),
+                    rng,
+                )
+        found = rows >= 0
+        pos_parts.append(queries[found])
+        vf_parts.append(rows[found])
+        order_parts.append(np.full(found.sum(), order))
+
+    pos_rows = np.concatenate(pos_parts)
+    vf_rows = np.concatenate(vf_parts)
+    # group by positive, strategies in DRAW_STRATEGIES order within each
+    layout = np.lexsort((np.concatenate(order_parts), pos_rows))
+    negatives = assemble_negatives(pos_df, pos_rows[layout], vf_df, vf_rows[layout])
 
-    zip_index, dob_index, name_index = build_vf_indexes(vf_df)
-    
-    negatives = []
-    for _, row in pos_df.iterrows():
-        # A) same ZIP, different DOB
-        zip_list = zip_index.get(row["zip_norm_att"], [])
-        zip_matches = [r for r in zip_list if r["dob_norm_vf"] != row["dob_norm_att"]]
-
-        # B) same DOB, different last name
-        dob_list = dob_index.get(row["dob_norm_att"], [])
-        dob_matches = [r for r in dob_list if r["last_name_vf"] != row["last_name_att"]]
-
-        # C) similar name initials
-        fn0 = safe_first_letter(row["first_name_att"])
-        ln0 = safe_first_letter(row["last_name_att"])
-        name_matches = name_index.get((fn0, ln0), []) if fn0 and ln0 else []
-
-        candidate_groups = [zip_matches, dob_matches, name_matches]
-
-        for group in candidate_groups:
-            if group:
-                wrong = random.choice(group)
-                negatives.append({
-                    "registration_form_id": row["registration_form_id"],
-                    "first_name_att": row["first_name_att"],
-                    "last_name_att":  row["last_name_att"],
-                    "dob_norm_att":   row["dob_norm_att"],
-                    "zip_norm_att":   row["zip_norm_att"],
-
-                    "first_name_vf": wrong["first_name_vf"],
-                    "last_name_vf":  wrong["last_name_vf"],
-                    "dob_norm_vf":   wrong["dob_norm_vf"],
-                    "zip_norm_vf":   wrong["zip_norm_vf"],
-                    "is_match": 0,
-                })
-
-        # one pure random negative
-        wrong = vf_df.sample(1).iloc[0]
-        negatives.append({
-            "registration_form_id": row["registration_form_id"],
-            "first_name_att": row["first_name_att"],
-            "last_name_att":  row["last_name_att"],
-            "dob_norm_att":   row["dob_norm_att"],
-            "zip_norm_att":   row["zip_norm_att"],
-
-            "first_name_vf": wrong["first_name_vf"],
-            "last_name_vf":  wrong["last_name_vf"],
-            "dob_norm_vf":   wrong["dob_norm_vf"],
-            "zip_norm_vf":   wrong["zip_norm_vf"],
-            "is_match": 0,
-        })
-    
     # Now generate address-based negatives
-    address_negatives = generate_address_negatives(pos_df, vf_df, threshold=0.95)
-
-    phonetic_negatives = generate_phonetic_negatives(pos_df, vf_df)
+    parts = [negatives]
+    if mix["address"]:
+        parts.append(generate_address_negatives(
+            pos_df, vf_df, threshold=0.95, max_per_positive=int(np.ceil(mix["address"])), seed=seed,
+        ))
 
     # Combine all negatives into one DataFrame
-    all_negatives = pd.concat(
-        [pd.DataFrame(negatives), address_negatives, phonetic_negatives],
-        ignore_index=True
-    )
-    return all_negatives
+    return pd.concat(parts, ignore_index=True)
@@ -1,59 +1,66 @@
-import random
-import fuzzy
-from collections import defaultdict
-import pandas as pd
-
-
+# matching/negatives/phonetic_negatives.py
 
+import numpy as np
+import pandas as pd
 
+from matching.negatives.sampling import (
+    PositionIndex,
+    assemble_negatives,
+    differs,
+    sample_excluding,
+)
+from matching.utils.phonetic import phonetic_column, phonetic_series, soundex
 
-soundex = fuzzy.Soundex(4)
 
 def phonetic_code(name: str) -> str:
-    if not name or not isinstance(name, str):
-        return ""
-    return soundex(name.lower())
-
+    """Soundex code of a single name ("" when missing)."""
+    return soundex(name)
 
 
-def build_phonetic_indexes(vf_df: pd.DataFrame) -> dict:
-    last_name_index = defaultdict(list)
-    first_name_index = defaultdict(list)
-    for _, row in vf_df.iterrows():
-        ln_code = phonetic_code(row["last_name_vf"])
-        fn_code = phonetic_code(row["first_name_vf"])
-        last_name_index[ln_code].append(row)
-        first_name_index[fn_code].append(row)
+def build_phonetic_indexes(vf_df: pd.DataFrame):
+    """
+    Position indexes of voterfile rows keyed by first- and last-name Soundex,
+    reusing the fn_soundex_vf / ln_soundex_vf columns from normalize_voterfile_keys.
+    """
+    first_name_index = PositionIndex(phonetic_column(vf_df, "first_name_vf", "fn_soundex_vf"))
+    last_name_index = PositionIndex(phonetic_column(vf_df, "last_name_vf", "ln_soundex_vf"))
     return first_name_index, last_name_index
 
 
 
-def generate_phonetic_negatives(pos_df: pd.DataFrame, vf_df: pd.DataFrame) -> pd.DataFrame:
+def phonetic_sampling_spec(pos_df: pd.DataFrame, vf_df: pd.DataFrame):
+    """
+    Index, per-positive groups and validity filter for phonetic negatives:
+    voters whose last name sounds the same but whose DOB differs (and, when
+    vf_df carries registration_form_id, that belong to another attempt).
+
+    Returns:
+        tuple: (last_name_index, groups, is_valid) for sample_excluding.
+    """
     first_name_index, last_name_index = build_phonetic_indexes(vf_df)
-    negatives = []
-    for _, row in pos_df.iterrows():
-        fn_code = phonetic_code(row["first_name_att"])
-        ln_code = phonetic_code(row["last_name_att"])
+    pos_dob = pos_df["dob_norm_att"]
+    pos_ids = pos_df["registration_form_id"]
 
+    def is_valid(p, r):
         # Phonetic candidates with same last name sound, different DOB
-        candidates = [
-            r for r in last_name_index.get(ln_code, [])
-            if r["dob_norm_vf"] != row["dob_norm_att"] and r["registration_form_id"] != row["registration_form_id"]
-        ]
-        if candidates:
-            wrong = random.choice(candidates)
-            negatives.append({
-                "registration_form_id": row["registration_form_id"],
-                "first_name_att": row["first_name_att"],
-                "last_name_att": row["last_name_att"],
-                "dob_norm_att": row["dob_norm_att"],
-                "zip_norm_att": row["zip_norm_att"],
-                "first_name_vf": wrong["first_name_vf"],
-                "last_name_vf": wrong["last_name_vf"],
-                "dob_norm_vf": wrong["dob_norm_vf"],
-                "zip_norm_vf": wrong["zip_norm_vf"],
-                "is_match": 0,
-            })
-        # You can add more logic for first name phonetic matches similarly
-
-    return pd.DataFrame(negatives)
+        ok = differs(vf_df["dob_norm_vf"].iloc[r], pos_dob.iloc[p])
+        if "registration_form_id" in vf_df.columns:
+            ok &= differs(vf_df["registration_form_id"].iloc[r], pos_ids.iloc[p])
+        return ok
+
+    groups = last_name_index.groups(phonetic_series(pos_df["last_name_att"]))
+    # You can add more logic for first name phonetic matches similarly
+    return last_name_index, groups, is_valid
+
+
+def generate_phonetic_negatives(pos_df: pd.DataFrame, vf_df: pd.DataFrame, seed=None) -> pd.DataFrame:
+    """
+    One phonetic negative per positive (see phonetic_sampling_spec). All
+    positives are sampled at once; `seed` makes it reproducible.
+    """
+    rng = np.random.default_rng(seed)
+    last_name_index, groups, is_valid = phonetic_sampling_spec(pos_df, vf_df)
+    vf_rows = sample_excluding(last_name_index, groups, is_valid, rng)
+
+    found = vf_rows >= 0
+    return assemble_negatives(pos_df, np.flatnonzero(found), vf_df, vf_rows[found])
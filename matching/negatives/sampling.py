@@ -0,0 +1,167 @@
+# matching/negatives/sampling.py
+
+# Shared pieces of the negative samplers. Voterfile lookups use PositionIndex,
+# which maps each key to row positions in flat integer arrays (not dicts of row
+# objects), so every positive's candidates can be looked up and drawn at once.
+
+import numpy as np
+import pandas as pd
+
+
+ATT_COLUMNS = ["registration_form_id", "first_name_att", "last_name_att", "dob_norm_att", "zip_norm_att"]
+VF_COLUMNS = ["first_name_vf", "last_name_vf", "dob_norm_vf", "zip_norm_vf"]
+
+
+def first_letter_series(s: pd.Series) -> pd.Series:
+    """Column-wise safe_first_letter: lowercased first character, NA when missing or blank."""
+    letters = s.astype("string").str.strip().str.lower().str[0]
+    return letters.mask(letters == "")
+
+
+def _key_frame(keys) -> pd.DataFrame:
+    if isinstance(keys, pd.Series):
+        keys = keys.to_frame()
+    return keys.reset_index(drop=True)
+
+
+class PositionIndex:
+    """
+    Row positions grouped by key.
+
+    Group g owns rows[offsets[g]:offsets[g + 1]]. Rows with a missing key
+    component are left out, so they never match a query.
+    """
+
+    def __init__(self, keys):
+        """
+        Args:
+            keys (pd.Series or pd.DataFrame): One key (or key tuple) per row.
+        """
+        keys = _key_frame(keys)
+        self.columns = list(keys.columns)
+        present = keys.notna().all(axis=1).to_numpy()
+        codes = np.full(len(keys), -1, dtype=np.int64)
+        if present.any():
+            if len(self.columns) == 1:
+                group_codes, uniques = pd.factorize(keys.iloc[:, 0][present])
+                self.keys = pd.Index(uniques)
+            else:
+                index = pd.MultiIndex.from_frame(keys[present])
+                group_codes, uniques = index.factorize()
+                self.keys = uniques
+            codes[present] = group_codes
+        else:
+            self.keys = pd.Index([])
+
+        self.rows = np.argsort(codes, kind="stable")[np.count_nonzero(codes < 0):].astype(np.int64)
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.keys))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def groups(self, query) -> np.ndarray:
+        """Group id for each query key (-1 when the key is missing or unknown)."""
+        query = _key_frame(query)
+        if len(self.keys) == 0:
+            return np.full(len(query), -1, dtype=np.int64)
+        if len(self.columns) == 1:
+            ids = self.keys.get_indexer(query.iloc[:, 0])
+        else:
+            ids = self.keys.get_indexer(pd.MultiIndex.from_frame(query))
+        ids = np.asarray(ids, dtype=np.int64)
+        ids[~query.notna().all(axis=1).to_numpy()] = -1
+        return ids
+
+    def sizes(self, groups: np.ndarray) -> np.ndarray:
+        """Number of rows in each group (0 for -1)."""
+        groups = np.asarray(groups)
+        sizes = np.zeros(len(groups), dtype=np.int64)
+        found = groups >= 0
+        sizes[found] = self.offsets[groups[found] + 1] - self.offsets[groups[found]]
+        return sizes
+
+    def draw(self, groups: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """One uniformly random row position per group (-1 for empty / unknown groups)."""
+        groups = np.asarray(groups)
+        sizes = self.sizes(groups)
+        rows = np.full(len(groups), -1, dtype=np.int64)
+        found = sizes > 0
+        picks = (rng.random(found.sum()) * sizes[found]).astype(np.int64)
+        rows[found] = self.rows[self.offsets[groups[found]] + picks]
+        return rows
+
+    def expand(self, groups: np.ndarray):
+        """
+        Every (query, row) pair for the given groups.
+
+        Returns:
+            tuple: (query_pos, rows) aligned arrays.
+        """
+        groups = np.asarray(groups)
+        sizes = self.sizes(groups)
+        query_pos = np.repeat(np.arange(len(groups)), sizes)
+        starts = np.repeat(np.where(sizes > 0, self.offsets[np.maximum(groups, 0)], 0), sizes)
+        within = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        return query_pos, self.rows[starts + within]
+
+
+def sample_excluding(index: PositionIndex, groups: np.ndarray, is_valid, rng: np.random.Generator,
+                     max_tries: int = 8) -> np.ndarray:
+    """
+    Draw one row per query from its group, uniformly among rows passing `is_valid`.
+
+    Draws are batched: every query draws at once, invalid draws are redrawn up
+    to `max_tries` times, and the few queries still unresolved enumerate their
+    group to pick among the valid rows (or get -1 if there are none).
+
+    Args:
+        index (PositionIndex): Index to draw from.
+        groups (np.ndarray): Group id per query, from index.groups().
+        is_valid (callable): is_valid(query_pos, rows) -> bool array, vectorized.
+        rng (np.random.Generator): Random source.
+        max_tries (int): Batched redraw rounds before falling back to enumeration.
+
+    Returns:
+        np.ndarray: Row position per query, -1 where no valid row exists.
+    """
+    groups = np.asarray(groups)
+    result = np.full(len(groups), -1, dtype=np.int64)
+    pending = np.flatnonzero(index.sizes(groups) > 0)
+
+    for _ in range(max_tries):
+        if len(pending) == 0:
+            return result
+        rows = index.draw(groups[pending], rng)
+        ok = is_valid(pending, rows)
+        result[pending[ok]] = rows[ok]
+        pending = pending[~ok]
+
+    if len(pending):
+        query_pos, rows = index.expand(groups[pending])
+        ok = is_valid(pending[query_pos], rows)
+        query_pos, rows = query_pos[ok], rows[ok]
+        if len(rows):
+            # random priority per pair, then keep the first pair of each query
+            order = np.lexsort((rng.random(len(rows)), query_pos))
+            query_pos, rows = query_pos[order], rows[order]
+            first = np.concatenate([[True], query_pos[1:] != query_pos[:-1]])
+            result[pending[query_pos[first]]] = rows[first]
+    return result
+
+
+def differs(left: pd.Series, right: pd.Series) -> np.ndarray:
+    """Element-wise `left != right` on aligned values; a missing value always differs."""
+    left = left.reset_index(drop=True)
+    right = right.reset_index(drop=True)
+    return (left != right).fillna(True).to_numpy(dtype=bool) | left.isna().to_numpy() | right.isna().to_numpy()
+
+
+def assemble_negatives(pos_df: pd.DataFrame, pos_rows: np.ndarray, vf_df: pd.DataFrame,
+                       vf_rows: np.ndarray) -> pd.DataFrame:
+    """Negative pairs from aligned positive / voterfile row positions, built column by column."""
+    att = pos_df[ATT_COLUMNS].iloc[pos_rows].reset_index(drop=True)
+    vf = vf_df[VF_COLUMNS].iloc[vf_rows].reset_index(drop=True)
+    negatives = pd.concat([att, vf], axis=1)
+    negatives["is_match"] = 0
+    return negatives
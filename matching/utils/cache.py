@@ -0,0 +1,110 @@
+# matching/utils/cache.py
+
+import json
+import os
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used mapping with hit/miss counters.
+
+    Used to share work (normalized names, similarity scores) across voterfile
+    chunks without letting memory grow with the size of the voterfile.
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        if maxsize <= 0:
+            raise ValueError(f"LRUCache maxsize must be positive, got {maxsize}")
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # entries inserted since the last pop_new_entries, once tracking is on
+        self._new = None
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """Return the cached value (marking it recently used), or default on a miss."""
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Insert or refresh a value, evicting the least recently used entries if full."""
+        if self._new is not None and key not in self._data:
+            self._new[key] = value
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def track_new_entries(self):
+        """Start recording inserted keys, so another process can merge them (pop_new_entries)."""
+        if self._new is None:
+            self._new = {}
+
+    def pop_new_entries(self) -> list:
+        """Entries inserted since tracking started or the previous call, as (key, value) pairs."""
+        if self._new is None:
+            return []
+        entries, self._new = list(self._new.items()), {}
+        return entries
+
+    def items(self):
+        return self._data.items()
+
+    def clear(self):
+        self._data.clear()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """Return size and hit-rate counters since the last reset."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def save_json(self, path: str, version: str = ""):
+        """
+        Persist entries (oldest first) to a JSON file.
+        Keys and values must be JSON-serializable strings.
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": version, "entries": list(self._data.items())}, f)
+        os.replace(tmp_path, path)
+
+    def load_json(self, path: str, version: str = "") -> int:
+        """
+        Load entries saved by save_json. Files written under a different version
+        are ignored. Returns the number of entries loaded.
+        """
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r") as f:
+            payload = json.load(f)
+        if payload.get("version") != version:
+            print(f"Cache file {path} has version {payload.get('version')!r}, expected {version!r}; ignoring")
+            return 0
+        for key, value in payload.get("entries", []):
+            self.put(key, value)
+        return len(payload.get("entries", []))
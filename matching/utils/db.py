@@ -1,27 +1,120 @@
 # db.py
-from sqlalchemy import create_engine
+import os
+import threading
+import time
+from glob import glob
+
 import pandas as pd
+from sqlalchemy import create_engine
+
+# --- Basic connection config (override with ENGAGE_DB_* environment variables) ---
+DB_USER = os.environ.get("ENGAGE_DB_USER", "postgres")
+DB_PASSWORD = os.environ.get("ENGAGE_DB_PASSWORD", "1434")          # <- change if needed
+DB_HOST = os.environ.get("ENGAGE_DB_HOST", "100.64.23.82")      # Tailscale IP
+DB_PORT = int(os.environ.get("ENGAGE_DB_PORT", 5432))                # change if your Postgres runs on a different port
+DB_NAME = os.environ.get("ENGAGE_DB_NAME", "fl_election")
+# full SQLAlchemy URL; when set it replaces the settings above
+DB_URL = os.environ.get("ENGAGE_DB_URL")
+
+# --- Pool config ---
+DB_POOL_SIZE = int(os.environ.get("ENGAGE_DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("ENGAGE_DB_MAX_OVERFLOW", 5))
+DB_POOL_RECYCLE = int(os.environ.get("ENGAGE_DB_POOL_RECYCLE", 1800))   # seconds before a connection is replaced
 
-# --- Basic connection config ---
-DB_USER = "postgres"
-DB_PASSWORD = "1434"          # <- change if needed
-DB_HOST = "100.64.23.82"      # Tailscale IP
-DB_PORT = 5432                # change if your Postgres runs on a different port
-DB_NAME = "fl_election"
+# Process-wide engines, one per URL. Each engine owns a connection pool, so
+# building one per query paid connection setup every time.
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
 
-# Build SQLAlchemy engine
-def get_engine():
-    conn_str = (
+_METRICS_LOCK = threading.Lock()
+QUERY_METRICS = {"queries": 0, "rows": 0, "seconds": 0.0, "max_seconds": 0.0, "engines_created": 0}
+
+
+def database_url() -> str:
+    """SQLAlchemy URL from ENGAGE_DB_URL, or from the DB_* settings."""
+    if DB_URL:
+        return DB_URL
+    return (
         f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@"
         f"{DB_HOST}:{DB_PORT}/{DB_NAME}"
     )
-    return create_engine(conn_str)
+
+
+# Shared SQLAlchemy engine
+def get_engine(url: str = None):
+    """
+    Return the process-wide engine for `url` (default database_url()), creating
+    it on first use with a QueuePool of DB_POOL_SIZE (+ DB_MAX_OVERFLOW)
+    connections, pre-ping and DB_POOL_RECYCLE. Later calls reuse the engine and
+    its pooled connections.
+
+    A forked child process (e.g. a worker pool) gets its own engine instead of
+    sharing the parent's sockets.
+    """
+    url = url or database_url()
+    pid = os.getpid()
+    with _ENGINES_LOCK:
+        entry = _ENGINES.get(url)
+        if entry is not None and entry[0] == pid:
+            return entry[1]
+        if entry is not None:
+            # inherited from the parent: drop its pool without closing the parent's connections
+            entry[1].dispose(close=False)
+        engine = create_engine(
+            url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+        _ENGINES[url] = (pid, engine)
+    with _METRICS_LOCK:
+        QUERY_METRICS["engines_created"] += 1
+    return engine
+
+
+def dispose_engines():
+    """Close every pooled connection and forget the engines (e.g. at shutdown or in tests)."""
+    with _ENGINES_LOCK:
+        for pid, engine in _ENGINES.values():
+            if pid == os.getpid():
+                engine.dispose()
+        _ENGINES.clear()
+
+
+def record_query(seconds: float, rows: int):
+    """Add one query's latency and row count to QUERY_METRICS."""
+    with _METRICS_LOCK:
+        QUERY_METRICS["queries"] += 1
+        QUERY_METRICS["rows"] += int(rows)
+        QUERY_METRICS["seconds"] += seconds
+        QUERY_METRICS["max_seconds"] = max(QUERY_METRICS["max_seconds"], seconds)
+
+
+def query_metrics() -> dict:
+    """Copy of QUERY_METRICS with the mean latency and rows/sec added."""
+    with _METRICS_LOCK:
+        metrics = dict(QUERY_METRICS)
+    metrics["mean_seconds"] = metrics["seconds"] / metrics["queries"] if metrics["queries"] else 0.0
+    metrics["rows_per_sec"] = metrics["rows"] / metrics["seconds"] if metrics["seconds"] else 0.0
+    return metrics
+
+
+def reset_query_metrics():
+    with _METRICS_LOCK:
+        for key in QUERY_METRICS:
+            QUERY_METRICS[key] = 0.0 if key in ("seconds", "max_seconds") else 0
+
 
 # Simple helper to run a query and return a DataFrame
-def run_query(sql: str) -> pd.DataFrame:
-    engine = get_engine()
+def run_query(sql: str, engine=None) -> pd.DataFrame:
+    """Run `sql` on a pooled connection (get_engine() unless `engine` is given) and record its metrics."""
+    engine = engine or get_engine()
+    start = time.perf_counter()
     with engine.connect() as conn:
-        return pd.read_sql(sql, conn)
+        df = pd.read_sql(sql, conn)
+    record_query(time.perf_counter() - start, len(df))
+    return df
 
 # Optional: helper to load a voterfile table by name
 def load_voterfile(table_name: str, limit: int | None = None) -> pd.DataFrame:
@@ -35,10 +128,6 @@ def load_voterfile(table_name: str, limit: int | None = None) -> pd.DataFrame:
     return run_query(sql)
 
 
-import os
-import pandas as pd
-from glob import glob
-
 def merge_chunk_csvs(output_path="predicted_matches_full.csv", chunk_folder=".", chunk_pattern="predicted_matches_chunk_*.csv"):
     """
     Merge chunk CSV files into one CSV.
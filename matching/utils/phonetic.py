@@ -0,0 +1,149 @@
+# matching/utils/phonetic.py
+
+# Phonetic codes for name columns, shared by blocking, negatives and features.
+# Each distinct name is encoded once (and cached across chunks); codes are
+# stored as categorical columns so a multi-million-row voterfile carries only
+# small integer codes.
+
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from matching.config.match_config import NAME_CACHE_MAXSIZE, PHONETIC_ENCODERS
+from matching.utils.cache import LRUCache
+
+try:
+    import fuzzy
+    _dmetaphone = fuzzy.DMetaphone()
+except ImportError:  # metaphone is optional; soundex needs nothing extra
+    _dmetaphone = None
+
+
+_SOUNDEX_DIGITS = {
+    **dict.fromkeys("BFPV", "1"),
+    **dict.fromkeys("CGJKQSXZ", "2"),
+    **dict.fromkeys("DT", "3"),
+    "L": "4",
+    **dict.fromkeys("MN", "5"),
+    "R": "6",
+    **dict.fromkeys("AEIOUY", "0"),
+}
+
+_NON_LETTERS = re.compile("[^A-Z]+")
+
+PHONETIC_CACHE = LRUCache(maxsize=NAME_CACHE_MAXSIZE)
+
+
+def _ascii_letters(name: str) -> str:
+    if not name.isascii():
+        name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return _NON_LETTERS.sub("", name.upper())
+
+
+def soundex(name: str, length: int = 4) -> str:
+    """
+    American Soundex code of a name ("" for missing or letter-less names).
+
+    Accents are stripped first, so "José" and "Jose" share a code.
+    """
+    if not isinstance(name, str):
+        return ""
+    letters = _ascii_letters(name)
+    if not letters:
+        return ""
+    code = letters[0]
+    prev = _SOUNDEX_DIGITS.get(letters[0], "")
+    for c in letters[1:]:
+        if c in "HW":
+            # H and W do not separate letters with the same digit
+            continue
+        digit = _SOUNDEX_DIGITS[c]
+        if digit != "0" and digit != prev:
+            code += digit
+        prev = digit
+    return (code + "0" * length)[:length]
+
+
+def double_metaphone(name: str) -> str:
+    """Primary Double Metaphone code of a name ("" for missing names). Requires `fuzzy`."""
+    if _dmetaphone is None:
+        raise ValueError("double_metaphone needs the `fuzzy` package")
+    if not isinstance(name, str):
+        return ""
+    letters = _ascii_letters(name)
+    if not letters:
+        return ""
+    primary = _dmetaphone(letters)[0]
+    return primary.decode("ascii") if primary else ""
+
+
+ENCODERS = {
+    "soundex": soundex,
+    "metaphone": double_metaphone,
+}
+
+
+def phonetic_series(names: pd.Series, encoder: str = "soundex", cache: LRUCache = None) -> pd.Series:
+    """
+    Encode a name column, running the encoder once per distinct name.
+
+    Args:
+        names (pd.Series): Names.
+        encoder (str): "soundex" or "metaphone".
+        cache (LRUCache, optional): Codes shared across calls. Defaults to PHONETIC_CACHE.
+
+    Returns:
+        pd.Series: Categorical codes aligned with `names`; missing where the
+            name is missing or has no code.
+    """
+    if encoder not in ENCODERS:
+        raise ValueError(f"Unknown phonetic encoder {encoder!r}, expected one of {sorted(ENCODERS)}")
+    encode = ENCODERS[encoder]
+    cache = PHONETIC_CACHE if cache is None else cache
+
+    name_codes, uniques = pd.factorize(names)
+    encoded = np.empty(len(uniques), dtype=object)
+    # plain Python strings: iterating an Arrow-backed Index boxes one value at a time
+    for i, name in enumerate(uniques.tolist()):
+        key = (encoder, name)
+        code = cache.get(key)
+        if code is None:
+            code = encode(name)
+            cache.put(key, code)
+        encoded[i] = code or None
+
+    code_ids, categories = pd.factorize(encoded)
+    row_codes = np.where(name_codes >= 0, code_ids[name_codes], -1) if len(uniques) else name_codes
+    return pd.Series(
+        pd.Categorical.from_codes(row_codes, categories=pd.Index(categories, dtype="str")),
+        index=names.index,
+    )
+
+
+def add_phonetic_columns(df: pd.DataFrame, side: str, encoders=None) -> pd.DataFrame:
+    """
+    Add fn_<encoder>_<side> and ln_<encoder>_<side> code columns (in place),
+    encoded from the fn_norm_<side> / ln_norm_<side> columns.
+
+    Args:
+        df (pd.DataFrame): Normalized attempts ("att") or voterfile ("vf").
+        side (str): "att" or "vf".
+        encoders (list of str, optional): Defaults to PHONETIC_ENCODERS.
+
+    Returns:
+        pd.DataFrame: The same frame, for chaining.
+    """
+    encoders = PHONETIC_ENCODERS if encoders is None else encoders
+    for encoder in encoders:
+        df[f"fn_{encoder}_{side}"] = phonetic_series(df[f"fn_norm_{side}"], encoder)
+        df[f"ln_{encoder}_{side}"] = phonetic_series(df[f"ln_norm_{side}"], encoder)
+    return df
+
+
+def phonetic_column(df: pd.DataFrame, name_col: str, code_col: str, encoder: str = "soundex") -> pd.Series:
+    """Reuse the precomputed `code_col` when the frame has it, else encode `name_col`."""
+    if code_col in df.columns:
+        return df[code_col]
+    return phonetic_series(df[name_col], encoder)
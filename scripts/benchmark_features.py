@@ -0,0 +1,172 @@
+# scripts/benchmark_features.py
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from script_helper import add_repo_root_to_syspath; add_repo_root_to_syspath()
+from matching.candidates.block_candidates import block_candidate_pairs
+from matching.features.feature_builder import (
+    compute_similarity,
+    compute_similarity_columns,
+    normalize_name_columns,
+    ALL_FEATURE_COLS,
+    SIMILARITY_FEATURE_COLS,
+)
+from matching.features.name_normalization import NAME_CACHE
+from matching.gold.gold_pairs import normalize_attempt_keys, normalize_voterfile_keys
+from matching.utils.phonetic import PHONETIC_CACHE
+
+
+# common names and the spelling variants the name features are for
+FIRST_NAMES = ["maria", "mario", "jose", "josé", "juan", "ana", "bill", "william",
+               "liz", "elizabeth", "carlos", "luis", "rosa"]
+LAST_NAMES = ["garcia", "garcía", "rodriguez", "gonzalez", "hernandez", "lopez",
+              "perez", "martinez", "smith-jones", "fernandez", "diaz", "garcia lopez",
+              "lopez garcia", "rodriguez-diaz"]
+SYLLABLES = ["ma", "ri", "jo", "se", "an", "lu", "is", "ca", "los", "ro", "sa", "el", "ena",
+             "gar", "cia", "lo", "pez", "di", "az", "fer", "nan", "dez", "ber", "to", "mi",
+             "gu", "ra", "mon", "ki", "ty", "wil", "son", "beth", "ny", "ha", "ru"]
+
+# the extended name features may add at most this share to feature time
+MAX_NAME_FEATURE_OVERHEAD = 0.20
+ADDRESSES = ["123 main st", "123 main street", "45 ocean dr", "4500 nw 7th st apt 2",
+             "4500 nw 7 st", "900 brickell ave", "", None]
+
+
+def make_vocabulary(rng, known, n_names: int) -> np.ndarray:
+    """`known` plus generated names, n_names distinct in all, most common first."""
+    names = list(dict.fromkeys(known))
+    seen = set(names)
+    while len(names) < n_names:
+        name = "".join(rng.choice(SYLLABLES, rng.integers(2, 5)))
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return np.array(names, dtype=object)
+
+
+def sample_names(rng, vocabulary: np.ndarray, n: int, missing: float = 0.02) -> np.ndarray:
+    """Zipf-like draw from `vocabulary` (rank r has weight 1/r), with some names missing."""
+    weights = 1.0 / np.arange(1, len(vocabulary) + 1)
+    names = rng.choice(vocabulary, n, p=weights / weights.sum())
+    names[rng.random(n) < missing] = None
+    return names
+
+
+def make_candidate_frame(n_attempts: int = 2000, n_voters: int = 50000, n_names: int = 5000,
+                         seed: int = 42) -> pd.DataFrame:
+    """
+    Block a synthetic attempts frame against a synthetic voterfile chunk.
+
+    Names are drawn from vocabularies of `n_names` distinct first and last
+    names with a long tail, like a voterfile chunk, and the frames go through
+    normalize_attempt_keys / normalize_voterfile_keys and block_candidate_pairs,
+    so the result has the same columns (phonetic codes included) as a real
+    candidate chunk.
+
+    Args:
+        n_attempts (int): Attempts rows.
+        n_voters (int): Voterfile chunk rows.
+        n_names (int): Distinct first names, and distinct last names.
+        seed (int): RNG seed so runs are comparable.
+
+    Returns:
+        pd.DataFrame: Candidate pairs.
+    """
+    rng = np.random.default_rng(seed)
+    first_names = make_vocabulary(rng, FIRST_NAMES, n_names)
+    last_names = make_vocabulary(rng, LAST_NAMES, n_names)
+    zips = np.array(["33125", "33130", "33135", "33142", None], dtype=object)
+
+    def make_side(n, side, id_col):
+        dob = pd.Series(pd.to_datetime(rng.integers(0, 25000, n), unit="D", origin="1930-01-01"))
+        dob[rng.random(n) < 0.03] = pd.NaT
+        return pd.DataFrame({
+            id_col: [f"{side}{i}" for i in range(n)],
+            f"first_name_{side}": sample_names(rng, first_names, n),
+            f"last_name_{side}": sample_names(rng, last_names, n),
+            f"dob_raw_{side}": dob.dt.strftime("%Y-%m-%d"),
+            f"zip_raw_{side}": rng.choice(zips, n),
+        })
+
+    att = normalize_attempt_keys(make_side(n_attempts, "att", "registration_form_id"))
+    att["voting_street_address_one"] = rng.choice(np.array(ADDRESSES, dtype=object), n_attempts)
+    vf = normalize_voterfile_keys(make_side(n_voters, "vf", "voter_id"))
+    vf["residence_address_1"] = rng.choice(np.array(ADDRESSES, dtype=object), n_voters)
+    return block_candidate_pairs(att, vf)
+
+
+def time_call(fn, *args, repeat=1):
+    """Return (best wall time in seconds, last result) over `repeat` runs."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def build_features(df: pd.DataFrame, feature_cols) -> pd.DataFrame:
+    """
+    What add_features does per chunk, from cold name caches: phonetic codes and
+    nickname normalization (normalize_name_columns), then the features.
+    """
+    NAME_CACHE.clear()
+    PHONETIC_CACHE.clear()
+    chunk = normalize_name_columns(df.copy(), feature_cols)
+    return compute_similarity_columns(chunk, feature_cols=feature_cols)
+
+
+def check_rowwise(df: pd.DataFrame, n_rows: int = 2000):
+    """The columnar engine must reproduce the row-wise values exactly (on a sample; apply is slow)."""
+    sample = normalize_name_columns(df.head(n_rows).copy())
+    rowwise_time, rowwise = time_call(
+        lambda d: d.apply(compute_similarity, axis=1)[SIMILARITY_FEATURE_COLS], sample
+    )
+    columnar_time, columnar = time_call(compute_similarity_columns, sample)
+    pd.testing.assert_frame_equal(rowwise, columnar, check_exact=True)
+    print(f"row-wise  df.apply(compute_similarity): {rowwise_time:8.3f}s  {len(sample) / rowwise_time:12,.0f} rows/sec")
+    print(f"columnar  compute_similarity_columns:   {columnar_time:8.3f}s  {len(sample) / columnar_time:12,.0f} rows/sec")
+    print(f"speedup on {len(sample)} pairs: {rowwise_time / columnar_time:.1f}x (outputs identical)")
+
+
+def main(n_attempts=2000, n_voters=50000, n_names=5000, seed=42, repeat=5):
+    df = make_candidate_frame(n_attempts, n_voters, n_names, seed)
+    n_rows = len(df)
+    distinct = df[["first_name_att", "first_name_vf", "last_name_att", "last_name_vf"]].nunique()
+    print(f"Benchmarking {n_rows} candidate pairs "
+          f"({', '.join(f'{col} {count}' for col, count in distinct.items())} distinct)")
+
+    check_rowwise(df)
+
+    # alternate the two so machine load affects both alike
+    base_time = extended_time = float("inf")
+    for _ in range(repeat):
+        seconds, base = time_call(build_features, df, SIMILARITY_FEATURE_COLS)
+        base_time = min(base_time, seconds)
+        seconds, extended = time_call(build_features, df, ALL_FEATURE_COLS)
+        extended_time = min(extended_time, seconds)
+    pd.testing.assert_frame_equal(base, extended[SIMILARITY_FEATURE_COLS], check_exact=True)
+    overhead = extended_time / base_time - 1
+    print(f"base      {len(SIMILARITY_FEATURE_COLS)} features:               {base_time:8.3f}s  "
+          f"{n_rows / base_time:12,.0f} rows/sec")
+    print(f"extended  + name features ({len(ALL_FEATURE_COLS)} cols):  {extended_time:8.3f}s  "
+          f"{n_rows / extended_time:12,.0f} rows/sec")
+    print(f"name feature overhead: {overhead:+.1%} (budget {MAX_NAME_FEATURE_OVERHEAD:.0%})")
+    if overhead > MAX_NAME_FEATURE_OVERHEAD:
+        raise SystemExit(f"Name features add {overhead:.1%} to feature time, over the "
+                         f"{MAX_NAME_FEATURE_OVERHEAD:.0%} budget")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--attempts", type=int, default=2000, help="Synthetic attempts rows")
+    parser.add_argument("--voters", type=int, default=50000, help="Synthetic voterfile chunk rows")
+    parser.add_argument("--names", type=int, default=5000, help="Distinct first names and last names")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5, help="Repeats for the feature timings")
+    args = parser.parse_args()
+
+    main(n_attempts=args.attempts, n_voters=args.voters, n_names=args.names, seed=args.seed,
+         repeat=args.repeat)
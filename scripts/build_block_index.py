@@ -0,0 +1,35 @@
+# scripts/build_block_index.py
+import argparse
+from script_helper import add_repo_root_to_syspath; add_repo_root_to_syspath()
+from matching.loaders.load_voterfile import voterfile_chunks
+from matching.config.column_map import MATCHING_VOTERFILE_COL_MAP
+from matching.candidates.block_index import build_block_index
+import matching.utils.db as db
+
+
+def main(sql, index_dir, chunksize=100000, snapshot_path=None):
+    """
+    Stream the voterfile once and write the blocking index used by
+    stream_inference_indexed.
+
+    Args:
+        sql (str): Voterfile query.
+        index_dir (str): Output directory for the index.
+        chunksize (int, optional): Rows per SQL chunk while building.
+        snapshot_path (str, optional): Read this local Parquet snapshot instead of `sql`.
+    """
+    engine = None if snapshot_path else db.get_engine()
+    chunks = voterfile_chunks(engine, sql, col_map=MATCHING_VOTERFILE_COL_MAP, chunksize=chunksize,
+                              snapshot_path=snapshot_path)
+    return build_block_index(chunks, index_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sql", default="SELECT * FROM voterfile.election_detail_2024 WHERE county = 'DAD'")
+    parser.add_argument("--index-dir", default="block_index")
+    parser.add_argument("--chunksize", type=int, default=100000)
+    parser.add_argument("--snapshot", default=None, help="Voterfile Parquet snapshot to read instead of --sql")
+    args = parser.parse_args()
+
+    main(args.sql, args.index_dir, chunksize=args.chunksize, snapshot_path=args.snapshot)
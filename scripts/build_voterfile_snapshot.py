@@ -0,0 +1,25 @@
+# scripts/build_voterfile_snapshot.py
+import argparse
+from script_helper import add_repo_root_to_syspath; add_repo_root_to_syspath()
+from matching.loaders.voterfile_snapshot import SNAPSHOT_DIR, export_voterfile_snapshot
+import matching.utils.db as db
+
+
+def main(sql, name, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Export the voterfile query once (COPY ... TO STDOUT) into a local Parquet
+    snapshot. Pass the resulting <snapshot_dir>/<name>.parquet as --snapshot to
+    training_model.py, inference_streaming.py, build_block_index.py or
+    evaluate_blocking.py to skip the database.
+    """
+    return export_voterfile_snapshot(db.get_engine(), sql, name, snapshot_dir=snapshot_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sql", default="SELECT * FROM voterfile.election_detail_2024 WHERE county = 'DAD'")
+    parser.add_argument("--name", default="election_detail_2024_dad", help="Snapshot file stem")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    main(args.sql, args.name, snapshot_dir=args.snapshot_dir)
@@ -0,0 +1,59 @@
+# scripts/evaluate_blocking.py
+import argparse
+import pandas as pd
+from script_helper import add_repo_root_to_syspath; add_repo_root_to_syspath()
+from matching.loaders.load_attempts import CSV_CACHE_DIR, load_attempts, load_matches
+from matching.gold.gold_pairs import add_normalized_keys, build_gold_pairs
+from matching.candidates.block_candidates import multi_pass_candidate_pairs
+from matching.loaders.voterfile_snapshot import load_voterfile_snapshot
+import matching.utils.db as db
+
+
+def main(voterfile_sql, attempts_path, matches_path, output_path=None, snapshot_path=None):
+    """
+    Run every blocking pass against the full voterfile and report reduction
+    ratio, pair completeness on gold pairs and pairs/sec per pass. The voterfile
+    comes from `snapshot_path` (a local Parquet snapshot) when given.
+    """
+    matches = load_matches(matches_path, cache_dir=CSV_CACHE_DIR)
+    attempts = load_attempts(attempts_path, cache_dir=CSV_CACHE_DIR)
+    att = attempts.merge(
+        matches[["registration_form_id", "type_code", "confidence_score"]],
+        on="registration_form_id",
+        how="inner",
+    ).rename(columns={
+        "first_name": "first_name_att",
+        "last_name": "last_name_att",
+        "date_of_birth": "dob_raw_att",
+        "voting_zipcode": "zip_raw_att",
+    })
+    vf_df = load_voterfile_snapshot(snapshot_path, col_map=None) if snapshot_path else db.run_query(voterfile_sql)
+    vf_df = vf_df.rename(columns={
+        "first_name": "first_name_vf",
+        "last_name": "last_name_vf",
+        "residence_zipcode": "zip_raw_vf",
+        "birth_date": "dob_raw_vf",
+    })
+
+    att, vf_df = add_normalized_keys(att, vf_df)
+    _, gold_pairs, _ = build_gold_pairs(att, vf_df)
+    print(f"Gold pairs: {len(gold_pairs)}")
+
+    _, stats = multi_pass_candidate_pairs(att, vf_df, gold_pairs=gold_pairs)
+    with pd.option_context("display.width", 200):
+        print(stats.to_string(index=False))
+    if output_path:
+        stats.to_csv(output_path, index=False)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sql", default="SELECT * FROM voterfile.election_detail_2024 WHERE county = 'DAD'")
+    parser.add_argument("--attempts", default="/Users/borismartinez/Documents/GitHub/engage/data/vr_blocks_export_no_na.csv")
+    parser.add_argument("--matches", default="/Users/borismartinez/Documents/GitHub/engage/data/vr_match_export.csv")
+    parser.add_argument("--output", default=None, help="Optional CSV path for the stats table")
+    parser.add_argument("--snapshot", default=None, help="Voterfile Parquet snapshot to read instead of --sql")
+    args = parser.parse_args()
+
+    main(args.sql, args.attempts, args.matches, output_path=args.output, snapshot_path=args.snapshot)
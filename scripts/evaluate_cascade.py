@@ -0,0 +1,39 @@
+# scripts/evaluate_cascade.py
+import argparse
+import pandas as pd
+from script_helper import add_repo_root_to_syspath; add_repo_root_to_syspath()
+from matching.config.match_config import MATCH_THRESHOLD
+from matching.modeling.cascade import CascadeScorer, verify_cascade_recall
+from matching.modeling.model_bundle import load_model_bundle
+
+
+def main(model_path, pairs_path, threshold=MATCH_THRESHOLD):
+    """
+    Report the cascade's pruning rate and recall on labelled pairs, e.g. the
+    train_df_modular.parquet (gold positives plus hard negatives) written by
+    training_model.py. Fails if stage 1 drops any pair the full model accepts.
+    """
+    scorer = CascadeScorer(load_model_bundle(model_path), threshold=threshold)
+    pairs_df = pd.read_parquet(pairs_path)
+    print(f"Stage 1 features: {scorer.stage1}; stage 2: {scorer.stage2}")
+
+    report = verify_cascade_recall(scorer, pairs_df)
+    print(f"Pairs: {report['pairs']}, pruned by stage 1: {report['pruned']} ({report['pruning_rate']:.1%})")
+    print(f"Gold pairs: {report['gold_pairs']}, pruned by stage 1: {report['gold_pruned']}")
+    print(f"Gold recall at {threshold}: full model {report['gold_recall_full']:.4f}, "
+          f"cascade {report['gold_recall_cascade']:.4f}")
+    if report["lost_matches"]:
+        raise SystemExit(f"Cascade dropped {report['lost_matches']} pairs the full model scores >= {threshold}")
+    print("No pair at or above the threshold was pruned.")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="models/model.pkl", help="Model bundle (linear model)")
+    parser.add_argument("--pairs", default="train_df_modular.parquet",
+                        help="Labelled pairs with is_match (from training_model.py)")
+    parser.add_argument("--threshold", type=float, default=MATCH_THRESHOLD)
+    args = parser.parse_args()
+
+    main(args.model, args.pairs, threshold=args.threshold)
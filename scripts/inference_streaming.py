@@ -1,157 +1,535 @@
 import os
 import json
-import joblib
+import shutil
 import pandas as pd
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from script_helper import add_repo_root_to_syspath; add_repo_root_to_syspath()
 from matching.loaders.load_attempts import load_attempts, filter_dataframe_by_columns
-from matching.loaders.load_voterfile import load_voterfile_chunk
-from matching.candidates.block_candidates import block_candidate_pairs
+from matching.loaders.load_voterfile import voterfile_chunks
+from matching.loaders.voterfile_snapshot import load_snapshot_meta
+from matching.config.column_map import MATCHING_VOTERFILE_COL_MAP
+from matching.candidates.block_candidates import (
+    block_candidate_pairs,
+    capped_block_candidate_pairs,
+    multi_pass_candidate_pairs,
+)
+from matching.candidates.block_index import INDEX_META_FILE, load_block_index
 from matching.features.feature_builder import add_features
+from matching.features.registry import FEATURES
+from matching.gold.exact_match import EXACT_KEYS_VF, ExactMatchPass, exact_matches_path, remove_resolved
+from matching.modeling.cascade import CascadeScorer
+from matching.modeling.model_bundle import load_model_bundle
 from matching.modeling.predict import predict_chunk
-from matching.gold.gold_pairs import add_normalized_keys
+from matching.modeling.prediction_store import write_prediction_chunk
+from matching.modeling.top_k import TopKReducer, top_k_state_path
+from matching.gold.gold_pairs import normalize_voterfile_keys
+from matching.candidates.prepared_attempts import file_fingerprint, load_prepared_attempts
+from matching.features.name_normalization import (
+    NAME_CACHE,
+    load_name_cache,
+    merge_name_cache_update,
+    name_cache_update,
+    save_name_cache,
+)
+from matching.config.match_config import MATCH_THRESHOLD, NAME_CACHE_SAVE_EVERY, PAIR_CACHE_MAXSIZE, TOP_K_MATCHES
+from matching.utils.cache import LRUCache
 
 
 PROGRESS_FILE = "progress.json"
-
-
-def load_progress():
+INDEXED_PROGRESS_FILE = "progress_indexed.json"
+NAME_CACHE_FILE = "name_cache.json"
+PREPARED_ATTEMPTS_DIR = "prepared_attempts"
+TOP_K_DIR = "top_k"
+BEST_MATCHES_FILE = "predicted_best_matches.parquet"
+EXACT_MATCHES_DIR = "exact_matches"
+# voterfile rows per batch when the exact pass scans a block index
+EXACT_PASS_BATCH_ROWS = 500_000
+PREDICTIONS_DIR = "/Users/borismartinez/Documents/GitHub/engage/chunk_folder/predictions"
+
+ATTEMPT_RENAME = {
+    "first_name": "first_name_att",
+    "last_name": "last_name_att",
+    "date_of_birth": "dob_raw_att",
+    "voting_zipcode": "zip_raw_att",
+}
+
+# key columns only, for the exact pass's extra voterfile scan
+EXACT_PASS_COL_MAP = {k: v for k, v in MATCHING_VOTERFILE_COL_MAP.items() if k != "residence_address_1"}
+
+VOTERFILE_RENAME = {
+    "first_name": "first_name_vf",
+    "last_name": "last_name_vf",
+    "residence_zipcode": "zip_raw_vf",
+    "birth_date": "dob_raw_vf",
+}
+
+
+def load_progress(path=PROGRESS_FILE):
     """
     Load the progress state from a JSON file if it exists.
 
+    Args:
+        path (str, optional): Progress file. Defaults to PROGRESS_FILE.
+
     Returns:
         dict: Progress mapping chunk indices (as strings) to booleans indicating processing done.
     """
-    if os.path.exists(PROGRESS_FILE):
-        with open(PROGRESS_FILE, "r") as f:
+    if os.path.exists(path):
+        with open(path, "r") as f:
             return json.load(f)
     else:
         return {}
 
 
-def save_progress(progress):
+def save_progress(progress, path=PROGRESS_FILE):
     """
     Save the progress state dict to a JSON file.
 
     Args:
         progress (dict): Mapping of chunk indices (as strings) to processed booleans.
+        path (str, optional): Progress file. Defaults to PROGRESS_FILE.
     """
-    with open(PROGRESS_FILE, "w") as f:
+    with open(path, "w") as f:
         json.dump(progress, f)
 
 
-def save_chunk_results(candidates_df, chunk_idx, output_dir="/Users/borismartinez/Documents/GitHub/engage/chunk_folder"):
-    """
-    Save candidate match predictions for a specific chunk to a CSV file.
-
-    Args:
-        candidates_df (pd.DataFrame): DataFrame containing candidate pairs and prediction results.
-        chunk_idx (int): Index of the current chunk.
-        output_dir (str, optional): Directory to save chunk files. Defaults to a fixed path.
-    """
-    os.makedirs(output_dir, exist_ok=True)
-    filename = os.path.join(output_dir, f"predicted_matches_chunk_{chunk_idx}.csv")
-    candidates_df.to_csv(filename, index=False)
-    print(f"Chunk {chunk_idx}: Saved {len(candidates_df)} rows to {filename}")
+def rename_voterfile_chunk(vf_chunk):
+    """Rename raw voterfile columns to the *_vf names used for matching."""
+    return vf_chunk.rename(columns=VOTERFILE_RENAME)
 
 
-def stream_inference(attempts_path, db_engine, sql, model_path, chunksize=5000):
+def load_inference_attempts(attempts_path):
     """
-    Stream voterfile data chunks and run inference on generated candidate pairs.
+    Load the attempts CSV and apply the inference filters.
 
-    This function:
-    - Loads attempts data and filters necessary columns
-    - Iterates over voterfile chunks from a SQL query
-    - Generates candidate pairs by blocking
-    - Computes features and runs model predictions
-    - Saves progress and results incrementally
+    Renames the key columns, drops rows missing first or last name, and keeps
+    attempts uploaded in 2025.
 
     Args:
         attempts_path (str): Path to CSV file containing attempts data.
-        db_engine: Database engine for querying voterfile chunks.
-        sql (str): SQL query string to select voterfile chunk data.
-        model_path (str): Path to the trained model pickle file.
-        chunksize (int, optional): Number of rows to load per voterfile chunk. Defaults to 5000.
+
+    Returns:
+        pd.DataFrame: Filtered attempts with *_att key columns.
     """
     # Load attempts data
     attempts = load_attempts(attempts_path)
     # Rename columns to normalized names for matching
-    attempts = attempts.rename(columns={
-        "first_name": "first_name_att",
-        "last_name": "last_name_att",
-        "date_of_birth": "dob_raw_att",
-        "voting_zipcode": "zip_raw_att",
-    })
+    attempts = attempts.rename(columns=ATTEMPT_RENAME)
 
     # Filter attempts dataframe to required columns
     required_columns = ["first_name_att", "last_name_att"]
-    attempts = filter_dataframe_by_columns(attempts, required_columns)
-    print(f"Attempts after required columns filter: {len(attempts)}")
+    null_counts = {}
+    attempts = filter_dataframe_by_columns(attempts, required_columns, null_counts=null_counts)
+    print(f"Attempts after required columns filter: {len(attempts)} (missing per column: {null_counts})")
 
-    # Filter attempts by upload_time containing 2025
-    attempts = attempts[attempts["upload_time"].astype(str).str.contains("2025", na=False)]
-    print(f"Attempts after 'upload_time' filter: {len(attempts)}")
+    # Keep attempts uploaded in 2025 (upload_time is parsed at load, in the
+    # time zone it was written in). Unparseable or missing times are dropped.
+    n_unparsed = int(attempts["upload_time"].isna().sum())
+    attempts = attempts[attempts["upload_time"].dt.year == 2025]
+    print(f"Attempts after 'upload_time' filter: {len(attempts)} ({n_unparsed} without a parseable upload_time dropped)")
 
     # Print sample registration ids for verification
     print(f"Sample registration_form_id: {attempts['registration_form_id'].unique()}")
+    return attempts
 
-    # Load prediction model
-    model = joblib.load(model_path)
-    # Load processing progress from previous runs
-    progress = load_progress()
 
-    chunks_processed = 0
+def save_chunk_results(candidates_df, chunk_idx, output_dir=PREDICTIONS_DIR):
+    """
+    Save candidate match predictions for a specific chunk into the Parquet prediction dataset.
+
+    Only the columns in PREDICTION_SCHEMA are kept. Re-running a chunk replaces its file.
 
-    # Iterate over SQL chunk generator
-    for idx, vf_chunk in enumerate(load_voterfile_chunk(db_engine, sql, chunksize=chunksize)):
+    Args:
+        candidates_df (pd.DataFrame): DataFrame containing candidate pairs and prediction results.
+        chunk_idx (int): Index of the current chunk.
+        output_dir (str, optional): Dataset root directory. Defaults to a fixed path.
+    """
+    filename = write_prediction_chunk(candidates_df, chunk_idx, output_dir)
+    print(f"Chunk {chunk_idx}: Saved {len(candidates_df)} rows to {filename}")
+
+
+def pending_chunks(vf_chunks, progress):
+    """Yield (idx, vf_chunk) for chunks not yet marked done in `progress`."""
+    for idx, vf_chunk in enumerate(vf_chunks):
         # Skip chunk if already processed (according to progress file)
         if str(idx) in progress:
             print(f"Chunk {idx}: already processed, skipping")
             continue
+        yield idx, vf_chunk
 
-        print(f"Chunk {idx}: processing ...")
 
-        # Rename voterfile chunk columns to normalized names
-        vf_chunk = vf_chunk.rename(columns={
-            "first_name": "first_name_vf",
-            "last_name": "last_name_vf",
-            "residence_zipcode": "zip_raw_vf",
-            "birth_date": "dob_raw_vf",
-        })
+def process_chunk(idx, vf_chunk, attempts, model, pair_cache=None, multi_pass=False, max_block_pairs=None):
+    """
+    Block, featurize and score one voterfile chunk against the attempts.
 
-        # Add normalized keys for attempts and voterfile chunks
-        attempts_norm, vf_chunk_norm = add_normalized_keys(attempts, vf_chunk)
+    Args:
+        idx (int): Chunk index (for logging).
+        vf_chunk (pd.DataFrame): Raw voterfile chunk.
+        attempts (pd.DataFrame): Attempts from load_prepared_attempts.
+        model (ModelBundle or CascadeScorer): Trained model; only its features are
+            computed. A CascadeScorer also drops pairs that cannot reach its threshold.
+        pair_cache (LRUCache, optional): Similarity cache shared across chunks.
+        multi_pass (bool, optional): Use multi_pass_candidate_pairs.
+        max_block_pairs (int, optional): Use capped_block_candidate_pairs with this cap.
 
-        # Generate candidate pairs via blocking
-        candidates = block_candidate_pairs(attempts_norm, vf_chunk_norm)
-        print(f"Chunk {idx}: Generated {len(candidates)} candidate pairs")
-        print(f"Chunk {idx}: Unique registration_form_id in candidates: {candidates['registration_form_id'].nunique() if not candidates.empty else 0}")
+    Returns:
+        pd.DataFrame: Candidate pairs with match_prob; empty if blocking found none.
+    """
+    print(f"Chunk {idx}: processing ...")
+
+    # Rename voterfile chunk columns to normalized names
+    vf_chunk = rename_voterfile_chunk(vf_chunk)
+
+    # Attempts arrive prepared (normalized, block keys set); only the chunk needs normalizing
+    vf_chunk = normalize_voterfile_keys(vf_chunk)
+
+    # Generate candidate pairs via blocking
+    if multi_pass:
+        candidates, block_stats = multi_pass_candidate_pairs(attempts, vf_chunk)
+        print(f"Chunk {idx}: blocking passes\n{block_stats.to_string(index=False)}")
+    elif max_block_pairs:
+        candidates, block_report = capped_block_candidate_pairs(
+            attempts, vf_chunk, max_block_pairs=max_block_pairs
+        )
+        print(f"Chunk {idx}: block sizes\n{block_report['histogram'].to_string(index=False)}")
+        print(
+            f"Chunk {idx}: {block_report['oversized_blocks']} oversized blocks, "
+            f"pairs {block_report['pairs_before']} -> {block_report['pairs_after']}, "
+            f"largest block {block_report['largest_block_before']} -> {block_report['largest_block_after']}, "
+            f"est. candidate frame {block_report['est_candidate_bytes'] / 1e6:.1f} MB"
+        )
+    else:
+        candidates = block_candidate_pairs(attempts, vf_chunk)
+    print(f"Chunk {idx}: Generated {len(candidates)} candidate pairs")
+    print(f"Chunk {idx}: Unique registration_form_id in candidates: {candidates['registration_form_id'].nunique() if not candidates.empty else 0}")
 
-        # If no candidates, mark chunk done and continue
-        if candidates.empty:
-            print(f"Chunk {idx}: No candidate pairs generated, skipping feature build and prediction")
-            progress[str(idx)] = True
-            save_progress(progress)
-            continue
+    # If no candidates, there is nothing to featurize
+    if candidates.empty:
+        print(f"Chunk {idx}: No candidate pairs generated, skipping feature build and prediction")
+        return candidates
 
-        # Compute features for candidates
-        X, _ = add_features(candidates)
-        print(f"Chunk {idx}: Features computed for {X.shape[0]} candidates")
+    # Cascade: cheap features first, full features and model only for the survivors
+    if isinstance(model, CascadeScorer):
+        candidates = model.score(candidates, pair_cache=pair_cache)
+        print(f"Chunk {idx}: Predictions made for {len(candidates)} cascade survivors")
+        return candidates
 
-        # Make predictions using loaded model
-        probs = predict_chunk(model, X)
-        candidates['match_prob'] = probs
-        print(f"Chunk {idx}: Predictions made")
+    # Compute features for candidates
+    X, _ = add_features(candidates, pair_cache=pair_cache, model=model)
+    print(f"Chunk {idx}: Features computed for {X.shape[0]} candidates")
 
-        # Save results for this chunk
+    # Make predictions using loaded model
+    probs = predict_chunk(model, X)
+    candidates['match_prob'] = probs
+    print(f"Chunk {idx}: Predictions made")
+    return candidates
+
+
+def write_chunk_result(idx, candidates, progress, reducer=None, top_k_path=None, progress_path=PROGRESS_FILE):
+    """
+    Save a chunk's results (if any), fold them into the top-k reducer, and mark
+    the chunk done in the progress file. The reducer is saved before progress,
+    so a crash in between only re-folds the chunk, which replaces its rows in the reducer.
+    """
+    if not candidates.empty:
         save_chunk_results(candidates, idx)
+        if reducer is not None:
+            reducer.update(candidates, idx)
+            if top_k_path:
+                reducer.save(top_k_path)
+
+    # Update progress file
+    progress[str(idx)] = True
+    save_progress(progress, progress_path)
+
+
+def load_top_k(top_k, top_k_path, progress):
+    """
+    Create the best-match reducer, resuming from `top_k_path` if it exists. A run
+    with no progress starts from scratch, so it never inherits another run's scores.
+    """
+    reducer = TopKReducer(k=top_k)
+    if top_k_path and not progress and os.path.exists(top_k_path):
+        print(f"No progress recorded; ignoring saved best matches in {top_k_path}")
+    elif top_k_path:
+        n_loaded = reducer.load(top_k_path)
+        if n_loaded:
+            print(f"Resumed top-{top_k} best matches ({n_loaded} rows) from {top_k_path}")
+    return reducer
+
+
+def save_best_matches(reducer, path=BEST_MATCHES_FILE, exact_matches=None):
+    """
+    Write the best match per registration_form_id (with margin) from the reducer,
+    plus the attempts resolved by the exact pass. match_source tells them apart
+    ("model" or "exact_key").
+    """
+    best_matches = reducer.best_matches()
+    best_matches["match_source"] = "model"
+    if exact_matches is not None and not exact_matches.empty:
+        exact = exact_matches.assign(registration_form_id=exact_matches["registration_form_id"].astype("string"),
+                                     voter_id=exact_matches["voter_id"].astype("string"))
+        best_matches = pd.concat([best_matches, exact], ignore_index=True) if not best_matches.empty else exact
+    best_matches.to_parquet(path, index=False)
+    print(f"Best matches saved to {path} with {len(best_matches)} rows.")
 
-        # Update progress file
-        progress[str(idx)] = True
-        save_progress(progress)
+
+def run_exact_pass(attempts, vf_chunks, path=None):
+    """
+    Resolve attempts whose normalized (first, last, DOB, ZIP) key matches exactly
+    one voter, scanning `vf_chunks` once (see matching/gold/exact_match.py).
+
+    The resolved pairs are saved to `path`; a later (resumed) run with the same
+    path reuses the file instead of scanning again, so it removes the same
+    attempts. Build `path` with exact_matches_path so it changes with the inputs.
+
+    Args:
+        attempts (pd.DataFrame): Prepared attempts.
+        vf_chunks (iterable of pd.DataFrame): Renamed voterfile chunks.
+        path (str, optional): Parquet file for the resolved pairs, or None.
+
+    Returns:
+        pd.DataFrame: One row per resolved attempt (EXACT_MATCH_COLUMNS).
+    """
+    if path and os.path.exists(path):
+        resolved = pd.read_parquet(path)
+        print(f"Exact pass: reusing {len(resolved)} resolved attempts from {path}")
+        return resolved
+
+    exact = ExactMatchPass(attempts)
+    for idx, vf_chunk in enumerate(vf_chunks):
+        n_hits = exact.update(vf_chunk, idx)
+        print(f"Exact pass chunk {idx}: {n_hits} key hits")
+    resolved = exact.resolved()
+    summary = exact.summary()
+    print(
+        f"Exact pass: scanned {summary['rows_scanned']} voterfile rows, "
+        f"resolved {summary['resolved']} of {len(attempts)} attempts "
+        f"({summary['ambiguous']} ambiguous keys left to the model)"
+    )
+    if path:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        resolved.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    return resolved
+
+
+# Per-process state for parallel workers, set once by _init_worker so the
+# attempts frame and model are not pickled with every chunk.
+_WORKER_STATE = {}
+
+
+def _init_worker(attempts, model, name_cache_path, pair_cache_size, multi_pass, max_block_pairs):
+    if name_cache_path:
+        load_name_cache(name_cache_path)
+    # Names this worker normalizes go back to the writer with each result
+    NAME_CACHE.track_new_entries()
+    NAME_CACHE.reset_stats()
+    _WORKER_STATE.update(
+        attempts=attempts,
+        model=model,
+        pair_cache=LRUCache(maxsize=pair_cache_size) if pair_cache_size else None,
+        multi_pass=multi_pass,
+        max_block_pairs=max_block_pairs,
+    )
+
+
+def _process_chunk_in_worker(idx, vf_chunk):
+    state = _WORKER_STATE
+    candidates = process_chunk(
+        idx, vf_chunk, state["attempts"], state["model"],
+        pair_cache=state["pair_cache"],
+        multi_pass=state["multi_pass"],
+        max_block_pairs=state["max_block_pairs"],
+    )
+    return idx, candidates, name_cache_update()
+
+
+def _parallel_results(vf_chunks, workers, max_in_flight, init_args):
+    """
+    Run process_chunk over `vf_chunks` in a process pool and yield
+    (idx, candidates, cache_update) in submission order, where cache_update is the
+    worker's name_cache_update for that chunk. At most `max_in_flight` chunks are
+    read but not yet yielded; the reader waits for the writer once that many are
+    outstanding.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+        order = deque()
+        finished = {}
+        running = set()
+
+        def collect():
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                running.discard(future)
+                idx, candidates, cache_update = future.result()
+                finished[idx] = (candidates, cache_update)
+
+        for idx, vf_chunk in vf_chunks:
+            while len(order) >= max_in_flight:
+                if order[0] not in finished:
+                    collect()
+                while order and order[0] in finished:
+                    head = order.popleft()
+                    yield (head, *finished.pop(head))
+            running.add(pool.submit(_process_chunk_in_worker, idx, vf_chunk))
+            order.append(idx)
+
+        while order:
+            if order[0] not in finished:
+                collect()
+            while order and order[0] in finished:
+                head = order.popleft()
+                yield (head, *finished.pop(head))
+
+
+def print_feature_timings():
+    """Print cumulative per-feature time and rows/sec (features computed in this process only)."""
+    if not FEATURES.timings:
+        return
+    report = FEATURES.timing_report()
+    print("Feature timings (slowest first):")
+    for name, row in report.iterrows():
+        print(f"  {name:24s} {row['seconds']:8.3f}s  {row['rows_per_sec']:14,.0f} rows/sec")
+
+
+def stream_inference(attempts_path, db_engine, sql, model_path, chunksize=5000, name_cache_path=NAME_CACHE_FILE,
+                     name_cache_save_every=NAME_CACHE_SAVE_EVERY, pair_cache_size=PAIR_CACHE_MAXSIZE, multi_pass=False, max_block_pairs=None,
+                     workers=1, max_in_flight=None, prepared_dir=PREPARED_ATTEMPTS_DIR,
+                     top_k=TOP_K_MATCHES, top_k_dir=TOP_K_DIR, cascade_threshold=None,
+                     exact_pass=False, exact_dir=EXACT_MATCHES_DIR, snapshot_path=None):
+    """
+    Stream voterfile data chunks and run inference on generated candidate pairs.
+
+    This function:
+    - Loads attempts data and filters necessary columns
+    - Iterates over voterfile chunks from a SQL query
+    - Generates candidate pairs by blocking
+    - Computes features and runs model predictions
+    - Saves progress and results incrementally
+
+    Args:
+        attempts_path (str): Path to CSV file containing attempts data.
+        db_engine: Database engine for querying voterfile chunks.
+        sql (str): SQL query string to select voterfile chunk data.
+        model_path (str): Model bundle (see load_model_bundle; a bare estimator pickle also works).
+        chunksize (int, optional): Number of rows to load per voterfile chunk. Defaults to 5000.
+        name_cache_path (str, optional): JSON file holding the name-normalization cache shared
+            across runs. Pass None to keep the cache in memory only.
+        name_cache_save_every (int, optional): Save the name cache every this many processed
+            chunks; it is always saved once at the end.
+        pair_cache_size (int, optional): Entries kept in the similarity cache shared across
+            chunks. 0 disables it (each chunk still scores every distinct pair only once).
+        multi_pass (bool, optional): Block with every pass in BLOCKING_PASSES instead of
+            the single (ln0, dob_year) join, and print per-pass stats. Defaults to False.
+        max_block_pairs (int, optional): If set, split (ln0, dob_year) blocks larger than this
+            many pairs on SUB_BLOCK_KEYS and print the block-size histogram per chunk.
+        workers (int, optional): Worker processes for block -> features -> predict. 1 (default)
+            runs everything in this process. With more, this process reads chunks and writes
+            results and progress.json in chunk order, so resuming works the same way, and
+            merges the names each worker normalized into the name cache it saves.
+        max_in_flight (int, optional): Most chunks read but not yet written at any time,
+            bounding memory in parallel mode. Defaults to 2 * workers.
+        prepared_dir (str, optional): Directory for the prepared-attempts Parquet cache,
+            keyed by a hash of the attempts file. None re-prepares on every run.
+        top_k (int, optional): Candidates kept per registration_form_id by the streaming
+            best-match reducer. Best matches are written to BEST_MATCHES_FILE at the end.
+        top_k_dir (str, optional): Where the reducer state is saved after every chunk so a
+            resumed run continues from it, keyed by the attempts and model files and the
+            run settings (top_k_state_path). None keeps it in memory only.
+        cascade_threshold (float, optional): Score through a CascadeScorer with this
+            threshold; pairs that cannot reach it are dropped, not written.
+        exact_pass (bool, optional): First resolve unique exact key matches with one
+            extra voterfile scan (run_exact_pass) and leave them out of blocking and scoring.
+        exact_dir (str, optional): Where the exact pass saves its resolved pairs, keyed by
+            the attempts file and the voterfile source (exact_matches_path). None re-scans
+            on every run.
+        snapshot_path (str, optional): Read the voterfile from this local Parquet
+            snapshot (scripts/build_voterfile_snapshot.py) instead of `sql`.
+    """
+    # Normalize attempts and compute their block keys once for the whole run
+    attempts = load_prepared_attempts(attempts_path, load_inference_attempts, cache_dir=prepared_dir)
+
+    # A snapshot is identified by its content hash; a live table only by its query
+    source = f"snapshot:{load_snapshot_meta(snapshot_path)['sha1']}" if snapshot_path else f"sql:{sql}"
+
+    exact_matches = None
+    if exact_pass:
+        vf_key_chunks = voterfile_chunks(db_engine, sql, col_map=EXACT_PASS_COL_MAP, chunksize=chunksize,
+                                         snapshot_path=snapshot_path)
+        exact_path = exact_matches_path(attempts_path, source, exact_dir) if exact_dir else None
+        exact_matches = run_exact_pass(attempts, vf_key_chunks, exact_path)
+        attempts = remove_resolved(attempts, exact_matches)
+        print(f"{len(attempts)} attempts left for blocking and scoring")
+
+    # Load the model bundle; its feature list decides which features are computed
+    model = load_model_bundle(model_path)
+    if cascade_threshold is not None:
+        model = CascadeScorer(model, threshold=cascade_threshold)
+        print(f"Cascade scoring: stage 1 {model.stage1}, stage 2 {model.stage2}")
+    # Load processing progress from previous runs
+    progress = load_progress()
+
+    # Warm the name-normalization cache from earlier runs
+    if name_cache_path:
+        n_loaded = load_name_cache(name_cache_path)
+        print(f"Loaded {n_loaded} cached name normalizations from {name_cache_path}")
+
+    # Saved best matches are only valid for the same inputs, model and chunking
+    run_key = (f"{source}|chunksize={chunksize}|exact={exact_pass}|multi_pass={multi_pass}|"
+               f"max_block_pairs={max_block_pairs}|cascade={cascade_threshold}|k={top_k}")
+    top_k_path = top_k_state_path(attempts_path, model_path, run_key, top_k_dir) if top_k_dir else None
+    if top_k_dir:
+        os.makedirs(top_k_dir, exist_ok=True)
+    reducer = load_top_k(top_k, top_k_path, progress)
+
+    # Server-side cursor (or local snapshot), only the columns matching needs
+    read_stats = {}
+    vf_stream = voterfile_chunks(db_engine, sql, col_map=MATCHING_VOTERFILE_COL_MAP, chunksize=chunksize,
+                                 stats=read_stats, snapshot_path=snapshot_path)
+    vf_chunks = pending_chunks(vf_stream, progress)
+
+    if workers > 1:
+        init_args = (attempts, model, name_cache_path, pair_cache_size, multi_pass, max_block_pairs)
+        results = _parallel_results(vf_chunks, workers, max_in_flight or 2 * workers, init_args)
+    else:
+        pair_cache = LRUCache(maxsize=pair_cache_size) if pair_cache_size else None
+        results = (
+            (idx, process_chunk(idx, vf_chunk, attempts, model, pair_cache=pair_cache,
+                                multi_pass=multi_pass, max_block_pairs=max_block_pairs), None)
+            for idx, vf_chunk in vf_chunks
+        )
+
+    chunks_processed = 0
+
+    # Single writer: results arrive in chunk order in both modes
+    for idx, candidates, cache_update in results:
+        # Workers normalize names in their own caches; fold their new entries in here
+        if cache_update is not None:
+            merge_name_cache_update(cache_update)
+        write_chunk_result(idx, candidates, progress, reducer, top_k_path)
+        if candidates.empty:
+            continue
+
+        stats = NAME_CACHE.stats()
+        print(f"Chunk {idx}: name cache size {stats['size']}, hit rate {stats['hit_rate']:.1%}")
 
         chunks_processed += 1
+        if name_cache_path and chunks_processed % name_cache_save_every == 0:
+            save_name_cache(name_cache_path)
 
+    if name_cache_path:
+        save_name_cache(name_cache_path)
     print(f"Processing complete. Total chunks processed: {chunks_processed}")
+    if read_stats.get("seconds"):
+        print(f"Voterfile read: {read_stats['rows']} rows, {read_stats['bytes'] / 1e6:.1f} MB in "
+              f"{read_stats['seconds']:.1f}s ({read_stats['rows'] / read_stats['seconds']:,.0f} rows/sec)")
+    print_feature_timings()
+    if isinstance(model, CascadeScorer) and workers == 1:
+        print(f"Cascade pruned {model.stats['pruned']} of {model.stats['pairs']} pairs ({model.pruning_rate():.1%})")
+    save_best_matches(reducer, exact_matches=exact_matches)
 
     # Optional: remove progress file if all chunks processed
     # Use total_chunks to verify
@@ -160,11 +538,118 @@ def stream_inference(attempts_path, db_engine, sql, model_path, chunksize=5000):
     #     print("All chunks processed. Progress file deleted.")
 
 
+def stream_inference_indexed(attempts_path, index_dir, model_path, batch_size=5000,
+                             name_cache_path=NAME_CACHE_FILE, name_cache_save_every=NAME_CACHE_SAVE_EVERY,
+                             pair_cache_size=PAIR_CACHE_MAXSIZE, progress_path=INDEXED_PROGRESS_FILE, prepared_dir=PREPARED_ATTEMPTS_DIR,
+                             top_k=TOP_K_MATCHES, top_k_dir=TOP_K_DIR,
+                             exact_pass=False, exact_dir=EXACT_MATCHES_DIR):
+    """
+    Run inference against a prebuilt blocking index instead of streaming the voterfile.
+
+    Attempts are normalized once, split into batches, and each batch looks up its
+    candidate voter rows in the index (see scripts/build_block_index.py). Work is
+    O(attempts x block size) and the voterfile is never rescanned. Results are
+    written with save_chunk_results, one partition per attempt batch, so
+    merge_chunks.py works unchanged.
+
+    Args:
+        attempts_path (str): Path to CSV file containing attempts data.
+        index_dir (str): Directory written by build_block_index.
+        model_path (str): Model bundle (see load_model_bundle; a bare estimator pickle also works).
+        batch_size (int, optional): Attempts per batch. Defaults to 5000.
+        name_cache_path (str, optional): JSON name-normalization cache, or None.
+        name_cache_save_every (int, optional): Save the name cache every this many
+            processed batches, and once at the end.
+        pair_cache_size (int, optional): Cross-batch similarity cache size, 0 disables it.
+        progress_path (str, optional): Progress file for this mode. Kept separate from
+            PROGRESS_FILE because batch indices are not voterfile chunk indices.
+        prepared_dir (str, optional): Prepared-attempts Parquet cache directory, or None.
+        top_k (int, optional): Candidates kept per registration_form_id for best matches.
+        top_k_dir (str, optional): Directory for the reducer state used when resuming
+            (top_k_state_path), or None.
+        exact_pass (bool, optional): First resolve unique exact key matches by scanning
+            the index's key columns, and leave them out of the batches.
+        exact_dir (str, optional): Where the exact pass saves its resolved pairs, keyed by
+            the attempts file and the index build (exact_matches_path), or None.
+    """
+    attempts = load_prepared_attempts(attempts_path, load_inference_attempts, cache_dir=prepared_dir)
+
+    index = load_block_index(index_dir)
+    print(f"Loaded block index with {len(index)} voterfile rows and {len(index.block_keys)} blocks")
+
+    # Every rebuild writes a new meta.json (row count, build time)
+    source = f"index:{file_fingerprint(os.path.join(index_dir, INDEX_META_FILE))}"
+
+    exact_matches = None
+    if exact_pass:
+        # The index already holds the normalized keys; read only those columns
+        key_table = index.table.select(["voter_id"] + EXACT_KEYS_VF)
+        vf_key_chunks = (batch.to_pandas() for batch in key_table.to_batches(max_chunksize=EXACT_PASS_BATCH_ROWS))
+        exact_path = exact_matches_path(attempts_path, source, exact_dir) if exact_dir else None
+        exact_matches = run_exact_pass(attempts, vf_key_chunks, exact_path)
+        attempts = remove_resolved(attempts, exact_matches)
+        print(f"{len(attempts)} attempts left for the index lookup")
+
+    model = load_model_bundle(model_path)
+    progress = load_progress(progress_path)
+
+    if name_cache_path:
+        n_loaded = load_name_cache(name_cache_path)
+        print(f"Loaded {n_loaded} cached name normalizations from {name_cache_path}")
+
+    pair_cache = LRUCache(maxsize=pair_cache_size) if pair_cache_size else None
+    run_key = f"{source}|batch_size={batch_size}|exact={exact_pass}|k={top_k}"
+    top_k_path = top_k_state_path(attempts_path, model_path, run_key, top_k_dir) if top_k_dir else None
+    if top_k_dir:
+        os.makedirs(top_k_dir, exist_ok=True)
+    reducer = load_top_k(top_k, top_k_path, progress)
+
+    batches_processed = 0
+    for idx, start in enumerate(range(0, len(attempts), batch_size)):
+        if str(idx) in progress:
+            print(f"Batch {idx}: already processed, skipping")
+            continue
+
+        batch = attempts.iloc[start:start + batch_size].copy()
+        candidates = index.candidate_pairs(batch)
+        print(f"Batch {idx}: Generated {len(candidates)} candidate pairs for {len(batch)} attempts")
+
+        if candidates.empty:
+            write_chunk_result(idx, candidates, progress, progress_path=progress_path)
+            continue
+
+        X, _ = add_features(candidates, pair_cache=pair_cache, model=model)
+        candidates["match_prob"] = predict_chunk(model, X)
+
+        write_chunk_result(idx, candidates, progress, reducer, top_k_path, progress_path)
+
+        batches_processed += 1
+        if name_cache_path and batches_processed % name_cache_save_every == 0:
+            save_name_cache(name_cache_path)
+
+    if name_cache_path:
+        save_name_cache(name_cache_path)
+    print(f"Processing complete. Total batches processed: {batches_processed}")
+    print_feature_timings()
+    save_best_matches(reducer, exact_matches=exact_matches)
+
+
 if __name__ == "__main__":
+    import argparse
     import matching.utils.db as db
 
-    # Prepare database engine for querying
-    db_engine = db.get_engine()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--block-index", default=None,
+                        help="Directory from build_block_index.py; look up candidates there instead of streaming the voterfile")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for blocking, features and prediction (1 = serial)")
+    parser.add_argument("--exact-pass", action="store_true",
+                        help="Resolve attempts with a unique exact (name, DOB, ZIP) match before blocking")
+    parser.add_argument("--cascade", action="store_true",
+                        help="Drop pairs that cannot reach MATCH_THRESHOLD after the cheap features (linear models only)")
+    parser.add_argument("--snapshot", default=None,
+                        help="Voterfile Parquet snapshot from build_voterfile_snapshot.py; read it instead of the database")
+    args = parser.parse_args()
 
     # Filepath to attempts CSV data
     attempts_path = "/Users/borismartinez/Documents/GitHub/engage/data/vr_blocks_export_no_na.csv"
@@ -178,20 +663,33 @@ if __name__ == "__main__":
     # Number of rows per chunk
     chunksize = 5000
 
-    # Optionally clear chunk output directory before processing
-    output_dir = "/Users/borismartinez/Documents/GitHub/engage/chunk_folder"
-    if os.path.exists(output_dir):
-        for f in os.listdir(output_dir):
-            if f.startswith("predicted_matches_chunk_") and f.endswith(".csv"):
-                os.remove(os.path.join(output_dir, f))
+    # Optionally clear the prediction dataset before processing
+    if os.path.exists(PREDICTIONS_DIR):
+        shutil.rmtree(PREDICTIONS_DIR)
+    os.makedirs(PREDICTIONS_DIR)
+
+    if args.block_index:
+        # Look up candidates in the prebuilt blocking index
+        stream_inference_indexed(
+            attempts_path=attempts_path,
+            index_dir=args.block_index,
+            model_path=model_path,
+            batch_size=chunksize,
+            exact_pass=args.exact_pass,
+        )
     else:
-        os.makedirs(output_dir)
-
-    # Run streaming inference over chunks
-    stream_inference(
-        attempts_path=attempts_path,
-        db_engine=db_engine,
-        sql=sql,
-        model_path=model_path,
-        chunksize=chunksize
-    )
\ No newline at end of file
+        # Prepare database engine for querying
+        db_engine = db.get_engine()
+
+        # Run streaming inference over chunks
+        stream_inference(
+            attempts_path=attempts_path,
+            db_engine=db_engine,
+            sql=sql,
+            model_path=model_path,
+            chunksize=chunksize,
+            workers=args.workers,
+            cascade_threshold=MATCH_THRESHOLD if args.cascade else None,
+            exact_pass=args.exact_pass,
+            snapshot_path=args.snapshot,
+        )
\ No newline at end of file
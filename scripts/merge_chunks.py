@@ -4,6 +4,8 @@ import pandas as pd
 from glob import glob
 import re
 from script_helper import add_repo_root_to_syspath; add_repo_root_to_syspath()
+from matching.modeling.prediction_store import open_prediction_dataset, write_dataset_metadata
+from matching.modeling.top_k import TopKReducer
 
 def get_chunk_num(filename):
     match = re.search(r'predicted_matches_chunk_(\d+)\.csv', filename)
@@ -72,5 +74,62 @@ def merge_chunk_csvs(
 
     return merged_df
 
+def best_matches_from_dataset(dataset):
+    """
+    Highest match_prob row per registration_form_id (with runner-up margin),
+    folding one chunk file at a time into a TopKReducer.
+
+    Args:
+        dataset (pyarrow.dataset.Dataset): Prediction dataset.
+
+    Returns:
+        pd.DataFrame: One row per registration_form_id.
+    """
+    reducer = TopKReducer(k=2)
+    for fragment in dataset.get_fragments():
+        df_chunk = fragment.to_table(schema=dataset.schema).to_pandas()
+        if df_chunk.empty:
+            continue
+        reducer.update(df_chunk.drop(columns=['chunk']), int(df_chunk['chunk'].iloc[0]))
+    return reducer.best_matches()
+
+
+def merge_prediction_dataset(
+    dataset_dir="/Users/borismartinez/Documents/GitHub/engage/chunk_folder/predictions",
+    best_matches_path="predicted_best_matches.parquet",
+):
+    """
+    Finish a prediction dataset written by inference_streaming.py.
+
+    Merging is metadata-only: the chunk files stay where they are and a
+    `_metadata` file ties them into one dataset. Best matches per
+    registration_form_id are then computed one chunk at a time.
+
+    Args:
+        dataset_dir (str): Dataset root written by save_chunk_results.
+        best_matches_path (str): Path to save the best matches Parquet.
+
+    Returns:
+        pd.DataFrame: Best match per registration_form_id.
+    """
+    summary = write_dataset_metadata(dataset_dir)
+    print(f"Dataset metadata written for {summary['n_files']} chunk files, {summary['n_rows']} rows.")
+
+    best_matches = best_matches_from_dataset(open_prediction_dataset(dataset_dir))
+    best_matches.to_parquet(best_matches_path, index=False)
+    print(f"Best matches saved to {best_matches_path} with {len(best_matches)} rows.")
+    return best_matches
+
+
 if __name__ == "__main__":
-    merge_chunk_csvs()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", action="store_true",
+                        help="Merge legacy predicted_matches_chunk_*.csv files instead of the Parquet dataset")
+    args = parser.parse_args()
+
+    if args.csv:
+        merge_chunk_csvs()
+    else:
+        merge_prediction_dataset()
\ No newline at end of file
@@ -1,14 +1,23 @@
 import os
 import pandas as pd
 import json
-import joblib
 from tqdm import tqdm
 from script_helper import add_repo_root_to_syspath; add_repo_root_to_syspath()
-from matching.loaders.load_attempts import load_attempts, load_matches
-from matching.gold.gold_pairs import build_gold_pairs, add_normalized_keys
+from matching.loaders.load_attempts import CSV_CACHE_DIR, load_attempts, load_matches
+from matching.gold.gold_pairs import (
+    add_normalized_keys,
+    build_gold_pairs,
+    build_gold_pairs_partitioned,
+    normalize_attempt_keys,
+    normalize_voterfile_keys,
+)
+from matching.loaders.load_voterfile import voterfile_chunks
+from matching.loaders.voterfile_snapshot import load_voterfile_snapshot
+from matching.config.column_map import MATCHING_VOTERFILE_COL_MAP
 from matching.negatives.hard_negatives import generate_hard_negatives
-from matching.features.feature_builder import add_features
+from matching.features.feature_builder import add_features, ALL_FEATURE_COLS, SIMILARITY_FEATURE_COLS
 from matching.modeling.train_eval import train_and_evaluate
+from matching.modeling.model_bundle import ModelBundle, save_model_bundle
 import matching.utils.db as db
 from sklearn.metrics import classification_report, roc_auc_score
 from sklearn.linear_model import LogisticRegression
@@ -40,6 +49,13 @@ def train_random_forest(X, y):
     model.fit(X, y)
     return model
 
+VF_RENAME = {
+    "first_name": "first_name_vf",
+    "last_name": "last_name_vf",
+    "residence_zipcode": "zip_raw_vf",
+    "birth_date": "dob_raw_vf",
+}
+
 def run_query_with_progress(sql):
     sql = sql.strip().rstrip(';')
     count_sql = f"SELECT COUNT(*) FROM ({sql}) AS subquery"
@@ -48,21 +64,27 @@ def run_query_with_progress(sql):
 
     print("Running full query, please wait...")
     df = db.run_query(sql)
-    print(f"Query finished. Read {len(df)} rows.")
+    metrics = db.query_metrics()
+    print(f"Query finished. Read {len(df)} rows. "
+          f"({metrics['queries']} queries, {metrics['seconds']:.1f}s, {metrics['rows_per_sec']:,.0f} rows/sec)")
     return df
 
 def main(voterfile_sql="SELECT * FROM voterfile.election_detail_2024 WHERE county = 'DAD'",
          model_dir="models",
          model_choice="all",
          test_size=0.2,
-         random_state=42):
+         random_state=42,
+         feature_cols=None,
+         gold_partitions=None,
+         voterfile_chunksize=200_000,
+         snapshot_path=None):
     os.makedirs(model_dir, exist_ok=True)
-    matches = load_matches("/Users/borismartinez/Documents/GitHub/engage/data/vr_match_export.csv")
-    attempts = load_attempts("/Users/borismartinez/Documents/GitHub/engage/data/vr_blocks_export_no_na.csv")
+    matches = load_matches("/Users/borismartinez/Documents/GitHub/engage/data/vr_match_export.csv",
+                           cache_dir=CSV_CACHE_DIR)
+    attempts = load_attempts("/Users/borismartinez/Documents/GitHub/engage/data/vr_blocks_export_no_na.csv",
+                             cache_dir=CSV_CACHE_DIR)
     pledges = pd.read_csv("/Users/borismartinez/Documents/GitHub/engage/data/pledge_data.csv")
 
-    vf_df = run_query_with_progress(voterfile_sql)
-
     att = attempts.merge(
         matches[["registration_form_id", "type_code", "confidence_score"]],
         on="registration_form_id",
@@ -76,20 +98,29 @@ def main(voterfile_sql="SELECT * FROM voterfile.election_detail_2024 WHERE count
         "voting_zipcode": "zip_raw_att",
     })
 
-    vf_df = vf_df.rename(columns={
-        "first_name": "first_name_vf",
-        "last_name": "last_name_vf",
-        "residence_zipcode": "zip_raw_vf",
-        "birth_date": "dob_raw_vf",
-    })
-
-    att, vf_df = add_normalized_keys(att, vf_df)
-
-    pos_df, vf_small, att_small = build_gold_pairs(att, vf_df)
+    if gold_partitions:
+        # Stream the voterfile and build gold pairs ZIP partition by partition
+        att = normalize_attempt_keys(att)
+        vf_chunks = (
+            normalize_voterfile_keys(chunk)
+            for chunk in voterfile_chunks(None if snapshot_path else db.get_engine(), voterfile_sql,
+                                          col_map=MATCHING_VOTERFILE_COL_MAP, chunksize=voterfile_chunksize,
+                                          snapshot_path=snapshot_path)
+        )
+        pos_df, vf_small, att_small = build_gold_pairs_partitioned(att, vf_chunks, n_partitions=gold_partitions)
+    else:
+        if snapshot_path:
+            vf_df = load_voterfile_snapshot(snapshot_path, col_map=None)
+            print(f"Loaded {len(vf_df)} voterfile rows from snapshot {snapshot_path}")
+        else:
+            vf_df = run_query_with_progress(voterfile_sql)
+        vf_df = vf_df.rename(columns=VF_RENAME)
+        att, vf_df = add_normalized_keys(att, vf_df)
+        pos_df, vf_small, att_small = build_gold_pairs(att, vf_df)
 
-    negatives = generate_hard_negatives(pos_df, vf_small)
+    negatives = generate_hard_negatives(pos_df, vf_small, seed=random_state)
     train_df = pd.concat([pos_df, negatives], ignore_index=True)
-    X, y = add_features(train_df)
+    X, y = add_features(train_df, feature_cols=feature_cols)
 
     # Train-test split for defensible evaluation
     X_train, X_test, y_train, y_test = train_test_split(
@@ -168,9 +199,13 @@ def main(voterfile_sql="SELECT * FROM voterfile.election_detail_2024 WHERE count
         print("Metrics dictionary:")
         print(metrics)
 
+        # Save the estimator with its ordered feature list, normalization version and metrics
+        bundle = ModelBundle(model, list(X.columns), metrics=metrics)
+        metrics["feature_cols"] = bundle.feature_cols
+        metrics["normalization_version"] = bundle.normalization_version
         model_path = os.path.join(model_dir, f"{m}_model.pkl")
-        joblib.dump(model, model_path)
-        print(f"Model saved as {model_path}")
+        save_model_bundle(bundle, model_path)
+        print(f"Model bundle saved as {model_path}")
 
         metrics_path = os.path.join(model_dir, f"{m}_metrics.json")
         with open(metrics_path, "w") as f:
@@ -187,6 +222,15 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--model", choices=["logreg", "xgboost", "random_forest", "all"], default="all",
                         help="Specify which model(s) to train and evaluate")
+    parser.add_argument("--features", choices=["base", "extended"], default="base",
+                        help="base: SIMILARITY_FEATURE_COLS; extended: also the phonetic/nickname/surname/swap features")
+    parser.add_argument("--gold-partitions", type=int, default=None,
+                        help="Stream the voterfile and build gold pairs in this many ZIP partitions "
+                             "(for voterfiles that do not fit in memory)")
+    parser.add_argument("--snapshot", default=None,
+                        help="Voterfile Parquet snapshot from build_voterfile_snapshot.py; read it instead of the database")
     args = parser.parse_args()
 
-    main(model_choice=args.model)
\ No newline at end of file
+    feature_cols = ALL_FEATURE_COLS if args.features == "extended" else SIMILARITY_FEATURE_COLS
+    main(model_choice=args.model, feature_cols=feature_cols, gold_partitions=args.gold_partitions,
+         snapshot_path=args.snapshot)
\ No newline at end of file
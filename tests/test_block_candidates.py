@@ -0,0 +1,105 @@
+import unittest
+
+import pandas as pd
+
+import numpy as np
+
+from matching.candidates.block_candidates import (
+    block_candidate_pairs,
+    capped_block_candidate_pairs,
+    multi_pass_candidate_pairs,
+)
+from matching.gold.gold_pairs import normalize_attempt_keys, normalize_voterfile_keys
+
+
+def make_frames():
+    att = normalize_attempt_keys(pd.DataFrame({
+        "registration_form_id": [1, 2, 3],
+        "first_name_att": ["Ana", "Luis", "Rosa"],
+        "last_name_att": ["Garcia", "Gomez", None],
+        "zip_raw_att": ["33125", "33130", "33125"],
+        "dob_raw_att": ["1990-01-02", "1985-05-06", "1970-03-03"],
+    }))
+    vf = normalize_voterfile_keys(pd.DataFrame({
+        "voter_id": ["a", "b", "c", "d"],
+        "first_name_vf": ["ana", "luis", "rosa", "ana"],
+        "last_name_vf": ["Garcia", "Gomez", "Diaz", "Harcia"],
+        "zip_raw_vf": ["33125", "33130", "33125", "33125"],
+        # b has a mistyped year, so only the ZIP pass can find it
+        "dob_raw_vf": ["1990-01-02", "1986-05-06", "1970-03-03", "1991-01-02"],
+    }))
+    return att, vf
+
+
+class TestMultiPassBlocking(unittest.TestCase):
+    def test_union_recovers_pairs_missed_by_initial_year_pass(self):
+        att, vf = make_frames()
+        gold = pd.DataFrame({"registration_form_id": [1, 2, 3], "voter_id": ["a", "b", "c"]})
+        candidates, stats = multi_pass_candidate_pairs(att, vf, gold_pairs=gold)
+
+        pairs = set(zip(candidates["registration_form_id"], candidates["voter_id"]))
+        self.assertEqual(pairs, {(1, "a"), (1, "d"), (2, "b"), (3, "c")})
+        self.assertEqual(len(candidates), len(pairs))
+
+        by_pass = stats.set_index("pass")
+        self.assertAlmostEqual(by_pass.loc["ln0_dob_year", "pair_completeness"], 1 / 3)
+        self.assertEqual(by_pass.loc["union", "pair_completeness"], 1.0)
+        self.assertEqual(by_pass.loc["dob_exact", "new_pairs"], 0)
+        self.assertAlmostEqual(by_pass.loc["union", "reduction_ratio"], 1 - 4 / 12)
+
+    def test_first_pass_wins_provenance(self):
+        att, vf = make_frames()
+        candidates, _ = multi_pass_candidate_pairs(att, vf)
+        first = candidates.set_index(["registration_form_id", "voter_id"])["block_pass"]
+        self.assertEqual(first.loc[(1, "a")], "ln0_dob_year")
+        self.assertEqual(first.loc[(3, "c")], "zip_fn0")
+        self.assertIn("first_name_vf", candidates.columns)
+        self.assertNotIn("fn0_vf", candidates.columns)
+
+
+def make_skewed_frames(seed=0):
+    rng = np.random.default_rng(seed)
+
+    def make(n, side):
+        return pd.DataFrame({
+            f"row_{side}": range(n),
+            f"first_name_{side}": "ana",
+            f"last_name_{side}": rng.choice(["Garcia", "Gomez", "Gonzalez", "Perez", None], n),
+            f"zip_raw_{side}": "33125",
+            f"dob_raw_{side}": rng.choice(["1990-01-02", "1990-05-06", "1990-07-03", "1985-01-01", None], n),
+        })
+
+    return normalize_attempt_keys(make(120, "att")), normalize_voterfile_keys(make(300, "vf"))
+
+
+class TestCappedBlocking(unittest.TestCase):
+    def test_no_cap_matches_plain_blocking(self):
+        att, vf = make_skewed_frames()
+        expected = block_candidate_pairs(att.copy(), vf.copy())
+        candidates, report = capped_block_candidate_pairs(att.copy(), vf.copy(), max_block_pairs=10**9)
+        self.assertEqual(list(candidates.columns), list(expected.columns))
+        self.assertEqual(len(candidates), len(expected))
+        self.assertEqual(report["oversized_blocks"], 0)
+        self.assertEqual(report["histogram"]["total_pairs"].sum(), len(expected))
+
+    def test_oversized_blocks_are_split(self):
+        att, vf = make_skewed_frames()
+        candidates, report = capped_block_candidate_pairs(att.copy(), vf.copy(), max_block_pairs=300)
+        self.assertGreater(report["oversized_blocks"], 0)
+        self.assertLess(report["pairs_after"], report["pairs_before"])
+        self.assertLess(report["largest_block_after"], report["largest_block_before"])
+        # every pair still agrees on the original block keys
+        self.assertTrue((candidates["dob_norm_att"].dt.year.fillna(0) == candidates["dob_norm_vf"].dt.year.fillna(0)).all())
+        # the pair count is planned from block stats before the join, and is exact
+        self.assertEqual(report["pairs_after"], len(candidates))
+
+    def test_candidate_bytes_guard(self):
+        att, vf = make_skewed_frames()
+        _, report = capped_block_candidate_pairs(att.copy(), vf.copy(), max_block_pairs=300)
+        with self.assertRaises(ValueError):
+            capped_block_candidate_pairs(att.copy(), vf.copy(), max_block_pairs=300,
+                                         max_candidate_bytes=report["est_candidate_bytes"] - 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from matching.candidates.block_candidates import block_candidate_pairs
+from matching.candidates.block_index import build_block_index, load_block_index
+from matching.gold.gold_pairs import normalize_attempt_keys, normalize_voterfile_keys
+
+
+def make_vf_chunk(rng, n, offset):
+    return pd.DataFrame({
+        "voter_id": [f"V{offset + i}" for i in range(n)],
+        "first_name_vf": rng.choice(["ana", "luis", None], n),
+        "last_name_vf": rng.choice(["Garcia", "gomez", "Perez", "", None], n),
+        "zip_raw_vf": rng.choice(["33125-1234", "33130", None], n),
+        "dob_raw_vf": rng.choice(["1990-01-02", "1985-05-06", None], n),
+        "gender": rng.choice(["M", "F"], n),
+    })
+
+
+class TestBlockIndex(unittest.TestCase):
+    def test_index_pairs_match_merge(self):
+        rng = np.random.default_rng(0)
+        chunks = [make_vf_chunk(rng, 200, 0), make_vf_chunk(rng, 200, 200), make_vf_chunk(rng, 30, 400)]
+        full_vf = normalize_voterfile_keys(pd.concat([c.copy() for c in chunks], ignore_index=True))
+
+        att = normalize_attempt_keys(pd.DataFrame({
+            "registration_form_id": range(30),
+            "first_name_att": rng.choice(["ana", "luis"], 30),
+            "last_name_att": rng.choice(["garcia", "Gomez", "perez", None], 30),
+            "zip_raw_att": "33125",
+            "dob_raw_att": rng.choice(["1990-01-02", "1985-05-06", None], 30),
+            "gender": "F",
+        }))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            summary = build_block_index(iter(chunks), tmp)
+            self.assertEqual(summary["n_rows"], 430)
+            index = load_block_index(tmp)
+            from_index = index.candidate_pairs(att.copy())
+
+        from_merge = block_candidate_pairs(att.copy(), full_vf).reset_index(drop=True)
+        # phonetic code columns are categorical on both sides, but the index only
+        # knows the categories of the rows it returns
+        pd.testing.assert_frame_equal(from_index, from_merge, check_categorical=False)
+
+    def test_lookup_unknown_key_returns_nothing(self):
+        rng = np.random.default_rng(1)
+        with tempfile.TemporaryDirectory() as tmp:
+            build_block_index(iter([make_vf_chunk(rng, 10, 0)]), tmp)
+            att_pos, vf_rows = load_block_index(tmp).lookup(np.array([-5], dtype=np.int64))
+        self.assertEqual(len(att_pos), 0)
+        self.assertEqual(len(vf_rows), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from matching.features.feature_builder import SIMILARITY_FEATURE_COLS, add_features
+from matching.modeling.cascade import CascadeScorer, verify_cascade_recall
+from matching.modeling.model_bundle import ModelBundle
+
+
+def make_pairs(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    first = np.array(["maria", "mario", "jose", "ana", "luis", "rosa"], dtype=object)
+    last = np.array(["garcia", "lopez", "perez", "diaz", "gomez"], dtype=object)
+    dob = pd.Series(pd.to_datetime(rng.integers(0, 20000, n), unit="D", origin="1940-01-01"))
+    same = rng.random(n) < 0.3
+    fn_att = rng.choice(first, n)
+    ln_att = rng.choice(last, n)
+    zips = np.array(["33125", "33130", "33142"], dtype=object)
+    zip_att = rng.choice(zips, n)
+    return pd.DataFrame({
+        "first_name_att": fn_att,
+        "first_name_vf": np.where(same, fn_att, rng.choice(first, n)),
+        "last_name_att": ln_att,
+        "last_name_vf": np.where(same, ln_att, rng.choice(last, n)),
+        "dob_norm_att": dob,
+        "dob_norm_vf": dob.where(same | (rng.random(n) < 0.2), dob + pd.Timedelta(days=400)),
+        "zip_norm_att": pd.Series(zip_att, dtype="string"),
+        "zip_norm_vf": pd.Series(np.where(same, zip_att, rng.choice(zips, n)), dtype="string"),
+        "voting_street_address_one": "1 main st",
+        "residence_address_1": np.where(same, "1 main st", "9 ocean dr"),
+        "is_match": same.astype(int),
+    })
+
+
+def fit_bundle(estimator):
+    X, y = add_features(make_pairs(seed=1))
+    return ModelBundle(estimator.fit(X, y), SIMILARITY_FEATURE_COLS)
+
+
+class TestCascade(unittest.TestCase):
+    def test_survivors_match_full_scoring(self):
+        bundle = fit_bundle(LogisticRegression(max_iter=1000))
+        scorer = CascadeScorer(bundle, threshold=0.5)
+        pairs = make_pairs(seed=2)
+
+        X, _ = add_features(pairs.copy(), model=bundle)
+        full = bundle.predict_proba(X)[:, 1]
+        survivors = scorer.score(pairs.copy())
+
+        self.assertGreater(scorer.pruning_rate(), 0.3)
+        # every pair the full model accepts survives, with the same probability
+        accepted = set(np.flatnonzero(full >= 0.5))
+        self.assertTrue(accepted <= set(survivors.index))
+        np.testing.assert_allclose(survivors["match_prob"].to_numpy(), full[survivors.index], rtol=0, atol=1e-12)
+
+        report = verify_cascade_recall(scorer, pairs)
+        self.assertEqual(report["lost_matches"], 0)
+        self.assertEqual(report["gold_recall_cascade"], report["gold_recall_full"])
+
+    def test_requires_linear_model(self):
+        with self.assertRaises(ValueError):
+            CascadeScorer(fit_bundle(RandomForestClassifier(n_estimators=5, random_state=0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
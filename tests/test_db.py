@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+import matching.utils.db as db
+
+
+class TestEngineRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # SQLite file stand-in (file databases get a QueuePool like Postgres)
+        self.url = f"sqlite:///{os.path.join(self.tmp.name, 'vf.db')}"
+        db.dispose_engines()
+        db.reset_query_metrics()
+
+    def tearDown(self):
+        db.dispose_engines()
+        self.tmp.cleanup()
+
+    def test_engine_is_reused(self):
+        engine = db.get_engine(self.url)
+        self.assertIs(db.get_engine(self.url), engine)
+        self.assertEqual(engine.pool.size(), db.DB_POOL_SIZE)
+        self.assertTrue(engine.pool._pre_ping)
+
+        pd.DataFrame({"voter_id": range(7)}).to_sql("vf", engine, index=False)
+        for _ in range(3):
+            self.assertEqual(len(db.run_query("SELECT * FROM vf", engine=engine)), 7)
+        # one engine for the whole loop, its connection checked back into the pool
+        metrics = db.query_metrics()
+        self.assertEqual(metrics["engines_created"], 1)
+        self.assertEqual(metrics["queries"], 3)
+        self.assertEqual(metrics["rows"], 21)
+        self.assertGreater(metrics["mean_seconds"], 0)
+        self.assertEqual(engine.pool.checkedin(), 1)
+
+    def test_default_engine_uses_db_url(self):
+        original = db.DB_URL
+        db.DB_URL = self.url
+        try:
+            self.assertEqual(db.database_url(), self.url)
+            self.assertEqual(db.run_query("SELECT 1 AS x")["x"].tolist(), [1])
+            self.assertIs(db.get_engine(), db.get_engine(self.url))
+        finally:
+            db.DB_URL = original
+
+
+if __name__ == "__main__":
+    unittest.main()
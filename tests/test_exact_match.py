@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from matching.gold.exact_match import EXACT_MATCH_SOURCE, ExactMatchPass, exact_matches_path, remove_resolved
+
+
+def make_attempts():
+    return pd.DataFrame({
+        "registration_form_id": ["a1", "a2", "a3", "a4"],
+        "fn_norm_att": ["maria", "jose", "ana", None],
+        "ln_norm_att": ["garcia", "lopez", "diaz", "perez"],
+        "dob_norm_att": pd.to_datetime(["1980-01-02", "1975-05-06", "1990-03-04", "1960-07-08"]),
+        "zip_norm_att": ["33125", "33130", "33142", "33125"],
+    })
+
+
+def make_vf_chunk(voter_ids, first, last, dob, zips):
+    # raw voterfile columns, as rename_voterfile_chunk leaves them
+    return pd.DataFrame({
+        "voter_id": voter_ids,
+        "first_name_vf": first,
+        "last_name_vf": last,
+        "dob_raw_vf": dob,
+        "zip_raw_vf": zips,
+    })
+
+
+class TestExactMatchPass(unittest.TestCase):
+    def test_unique_hits_are_resolved(self):
+        exact = ExactMatchPass(make_attempts())
+        # maria garcia once (ZIP+4 normalizes to the same key); jose lopez
+        # in two chunks (ambiguous); a voter missing a first name never matches a4
+        exact.update(make_vf_chunk(["v1", "v2", "v3"], ["maria", "jose", None],
+                                   ["garcia", "lopez", "perez"],
+                                   ["1980-01-02", "1975-05-06", "1960-07-08"],
+                                   ["33125-0001", "33130", "33125"]), 0)
+        exact.update(make_vf_chunk(["v4", "v5"], ["jose", "ana"], ["lopez", "diaz"],
+                                   ["1975-05-06", "1990-03-05"], ["33130", "33142"]), 1)
+
+        resolved = exact.resolved()
+        self.assertEqual(resolved["registration_form_id"].tolist(), ["a1"])
+        self.assertEqual(resolved["voter_id"].tolist(), ["v1"])
+        self.assertEqual(resolved["match_source"].tolist(), [EXACT_MATCH_SOURCE])
+        self.assertEqual(resolved["chunk"].tolist(), [0])
+        np.testing.assert_array_equal(resolved["match_prob"], [1.0])
+        self.assertEqual(list(exact.ambiguous_ids()), ["a2"])
+        self.assertEqual(exact.summary()["rows_scanned"], 5)
+
+        remaining = remove_resolved(make_attempts(), resolved)
+        self.assertEqual(remaining["registration_form_id"].tolist(), ["a2", "a3", "a4"])
+
+    def test_no_hits(self):
+        exact = ExactMatchPass(make_attempts())
+        exact.update(make_vf_chunk(["v9"], ["zoe"], ["smith"], ["2000-01-01"], ["10001"]), 0)
+        self.assertTrue(exact.resolved().empty)
+        self.assertEqual(len(remove_resolved(make_attempts(), exact.resolved())), 4)
+
+    def test_saved_results_keyed_by_inputs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            attempts_path = os.path.join(tmp, "attempts.csv")
+            make_attempts().to_csv(attempts_path, index=False)
+            path = exact_matches_path(attempts_path, "sql:SELECT 1", tmp)
+            self.assertEqual(path, exact_matches_path(attempts_path, "sql:SELECT 1", tmp))
+            self.assertNotEqual(path, exact_matches_path(attempts_path, "snapshot:abc", tmp))
+
+            make_attempts().head(2).to_csv(attempts_path, index=False)
+            self.assertNotEqual(path, exact_matches_path(attempts_path, "sql:SELECT 1", tmp))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from rapidfuzz import fuzz
+from rapidfuzz.distance import JaroWinkler
+
+from matching.features.batch_similarity import dedup_pairwise_similarity, pairwise_similarity
+from matching.features.feature_builder import (
+    add_features,
+    compute_similarity,
+    compute_similarity_columns,
+    ALL_FEATURE_COLS,
+    SIMILARITY_FEATURE_COLS,
+)
+from matching.features.name_features import NAME_FEATURE_COLS
+from matching.candidates.block_candidates import block_candidate_pairs
+from matching.gold.gold_pairs import normalize_attempt_keys, normalize_voterfile_keys
+from matching.utils.cache import LRUCache
+
+
+def make_pairs():
+    dob = pd.to_datetime(pd.Series([
+        "1990-03-04", "1990-04-03", "1985-12-01", None, "2001-07-15", "1970-01-31",
+    ]))
+    dob_vf = pd.to_datetime(pd.Series([
+        "1990-03-04", "1990-03-04", "1985-12-11", "1999-01-01", None, "1971-01-31",
+    ]))
+    return pd.DataFrame({
+        "first_name_att": ["Maria", "José", None, "bill", "", "ana"],
+        "first_name_vf": ["maria", "jose", "liz", "william", None, np.nan],
+        "last_name_att": ["Garcia", "García", "smith-jones", "lopez", "perez", "diaz"],
+        "last_name_vf": ["garcia", "garcia", "smith", None, "perez", "dias"],
+        "dob_norm_att": dob,
+        "dob_norm_vf": dob_vf,
+        "zip_norm_att": pd.Series(["33125", "33130", None, "33142", "33125", None], dtype="string"),
+        "zip_norm_vf": pd.Series(["33125", "33131", None, "33142", None, "33125"], dtype="string"),
+        "voting_street_address_one": ["123 main st", None, np.nan, "", "45 ocean dr", "1 a st"],
+        "residence_address_1": ["123 main street", None, "9 b ave", "", np.nan, "1 a st"],
+    })
+
+
+class TestColumnarFeatures(unittest.TestCase):
+    def test_matches_rowwise_exactly(self):
+        df = make_pairs()
+        expected = df.apply(compute_similarity, axis=1)[SIMILARITY_FEATURE_COLS]
+        result = compute_similarity_columns(df)
+        pd.testing.assert_frame_equal(expected, result, check_exact=True)
+
+    def test_missing_address_columns(self):
+        df = make_pairs().drop(columns=["voting_street_address_one", "residence_address_1"])
+        expected = df.apply(compute_similarity, axis=1)[SIMILARITY_FEATURE_COLS]
+        pd.testing.assert_frame_equal(expected, compute_similarity_columns(df), check_exact=True)
+
+    def test_add_features_returns_target(self):
+        df = make_pairs()
+        df["is_match"] = [1, 1, 0, 0, 0, 0]
+        X, y = add_features(df)
+        self.assertEqual(list(X.columns), SIMILARITY_FEATURE_COLS)
+        self.assertEqual(y.tolist(), [1, 1, 0, 0, 0, 0])
+
+
+class TestDedupSimilarity(unittest.TestCase):
+    def test_dedup_matches_plain_and_counts_savings(self):
+        left = np.array(["maria", "maria", "jose", None, np.nan, "maria"], dtype=object)
+        right = np.array(["mario", "mario", "josé", "", np.nan, "mario"], dtype=object)
+        stats = {}
+        result = dedup_pairwise_similarity(left, right, JaroWinkler, stats=stats)
+        np.testing.assert_array_equal(result, pairwise_similarity(left, right, JaroWinkler))
+        self.assertEqual(stats["pairs"], 6)
+        self.assertEqual(stats["unique_pairs"], 4)
+
+    def test_cache_carries_scores_across_calls(self):
+        cache = LRUCache(100)
+        left = np.array(["maria", "ana"], dtype=object)
+        right = np.array(["mario", "anna"], dtype=object)
+        dedup_pairwise_similarity(left, right, JaroWinkler, cache=cache)
+        stats = {}
+        result = dedup_pairwise_similarity(left, right, JaroWinkler, cache=cache, stats=stats)
+        self.assertEqual(stats["cache_hits"], 2)
+        self.assertEqual(stats["scored"], 0)
+        np.testing.assert_array_equal(result, pairwise_similarity(left, right, JaroWinkler))
+
+
+class TestNameFeatures(unittest.TestCase):
+    def test_name_features(self):
+        df = pd.DataFrame({
+            "first_name_att": ["bill", "jon", "garcia", None, "maria"],
+            "first_name_vf": ["william", "john", "maria", "ana", "maria"],
+            "last_name_att": ["smith", "garcia lopez", "maria", "diaz", "perez"],
+            "last_name_vf": ["smyth", "lopez-garcia", "garcia", None, "perez"],
+        })
+        X = compute_similarity_columns(df, feature_cols=NAME_FEATURE_COLS)
+        self.assertEqual(list(X.columns), NAME_FEATURE_COLS)
+        self.assertEqual(X["fn_soundex_match"].tolist(), [0, 1, 0, 0, 1])
+        self.assertEqual(X["ln_soundex_match"].tolist(), [1, 0, 0, 0, 1])
+        self.assertEqual(X["fn_nickname_match"].tolist(), [1, 0, 0, 0, 1])
+        self.assertEqual(X["name_swap"].tolist(), [0, 0, 1, 0, 0])
+        self.assertEqual(X["ln_token_sort"].iloc[1], 1.0)
+        expected = [fuzz.partial_ratio(a, b) / 100 for a, b in
+                    [("smith", "smyth"), ("garcia lopez", "lopez garcia"), ("maria", "garcia"), ("diaz", "")]]
+        self.assertEqual(X["ln_partial_ratio"].iloc[:4].tolist(), expected)
+
+    def test_phonetic_features_reuse_blocking_codes(self):
+        att = normalize_attempt_keys(pd.DataFrame({
+            "registration_form_id": ["a1", "a2", "a3"],
+            "first_name_att": ["José", "bill", "ana"],
+            "last_name_att": ["Garcia", "smith", "diaz"],
+            "dob_raw_att": ["1990-03-04", "1975-05-06", "1980-01-02"],
+            "zip_raw_att": ["33125", "33130", "33142"],
+        }))
+        vf = normalize_voterfile_keys(pd.DataFrame({
+            "voter_id": ["v1", "v2", "v3", "v4"],
+            "first_name_vf": ["jose", "william", "anna", None],
+            "last_name_vf": ["garsia", "smyth", "dias", "gomez"],
+            "dob_raw_vf": ["1990-01-01", "1975-01-01", "1980-07-08", "1990-03-04"],
+            "zip_raw_vf": ["33125", "33130", "33142", "33125"],
+        }))
+        pairs = block_candidate_pairs(att, vf)
+        self.assertIn("fn_soundex_att", pairs.columns)
+        codes = [c for c in pairs.columns if "_soundex_" in c]
+
+        # blocked codes are reused; without them the same codes are built from the raw names
+        reused, _ = add_features(pairs.copy(), feature_cols=NAME_FEATURE_COLS)
+        rebuilt, _ = add_features(pairs.drop(columns=codes), feature_cols=NAME_FEATURE_COLS)
+        pd.testing.assert_frame_equal(reused, rebuilt)
+        by_voter = reused.set_axis(pairs["voter_id"])
+        self.assertEqual(by_voter.loc[["v1", "v2", "v3", "v4"], "fn_soundex_match"].tolist(), [1, 0, 1, 0])
+        self.assertEqual(by_voter.loc[["v1", "v2", "v3", "v4"], "fn_nickname_match"].tolist(), [1, 1, 0, 0])
+
+    def test_extended_columns_keep_base_values(self):
+        df = make_pairs()
+        base = compute_similarity_columns(df)
+        extended = compute_similarity_columns(df, feature_cols=ALL_FEATURE_COLS)
+        self.assertEqual(list(extended.columns), ALL_FEATURE_COLS)
+        pd.testing.assert_frame_equal(base, extended[SIMILARITY_FEATURE_COLS], check_exact=True)
+        with self.assertRaises(ValueError):
+            compute_similarity_columns(df, feature_cols=["not_a_feature"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from matching.features.feature_builder import add_features, SIMILARITY_FEATURE_COLS
+from matching.features.registry import FEATURES, FeatureRegistry
+
+
+class FittedModel:
+    feature_names_in_ = np.array(["name_swap", "zip_exact"], dtype=object)
+
+
+class TestFeatureRegistry(unittest.TestCase):
+    def test_resolve_dependencies_and_timings(self):
+        registry = FeatureRegistry()
+        registry.register("a", inputs=["x"])(lambda ctx: ctx.df["x"] * 2)
+        registry.register("b", inputs=["y"], depends=["a"])(lambda ctx: ctx.feature("a") + ctx.df["y"])
+        registry.register("c", inputs=["z"])(lambda ctx: ctx.df["z"])
+
+        self.assertEqual(registry.resolve(["b"]), ["a", "b"])
+        self.assertEqual(registry.required_columns(["b"]), ["x", "y"])
+        with self.assertRaises(ValueError):
+            registry.resolve(["missing"])
+
+        # duplicate index labels are fine: values are kept positionally
+        df = pd.DataFrame({"x": [1, 2], "y": [10, 20]}, index=[5, 5])
+        timings = {}
+        X = registry.compute(df, ["b"], timings=timings)
+        self.assertEqual(X["b"].tolist(), [12, 24])
+        self.assertEqual(sorted(timings), ["a", "b"])
+        report = registry.timing_report()
+        self.assertEqual(report.loc["a", "rows"], 2)
+        self.assertNotIn("c", report.index)
+
+    def test_add_features_builds_only_model_columns(self):
+        df = pd.DataFrame({
+            "first_name_att": ["ana", "perez"],
+            "first_name_vf": ["ana", "maria"],
+            "last_name_att": ["diaz", "maria"],
+            "last_name_vf": ["diaz", "perez"],
+            "zip_norm_att": pd.Series(["33125", None], dtype="string"),
+            "zip_norm_vf": pd.Series(["33125", "33130"], dtype="string"),
+        })
+        # no DOB columns: the model does not need any DOB feature
+        X, y = add_features(df, model=FittedModel())
+        self.assertEqual(list(X.columns), ["name_swap", "zip_exact"])
+        self.assertEqual(X["name_swap"].tolist(), [0, 1])
+        self.assertEqual(X["zip_exact"].tolist(), [1, 0])
+        self.assertIsNone(y)
+
+    def test_default_features_registered(self):
+        for name in SIMILARITY_FEATURE_COLS:
+            self.assertIn(name, FEATURES)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from matching.gold.gold_pairs import (
+    add_normalized_keys,
+    build_gold_pairs,
+    build_gold_pairs_partitioned,
+)
+
+
+def make_frames(n_att=300, n_vf=600, seed=0):
+    rng = np.random.default_rng(seed)
+    first = ["maria", "jose", "ana", None]
+    last = ["garcia", "lopez", "diaz"]
+    dobs = ["1980-01-02", "1975-05-06", None]
+    zips = ["33125", "33130-0001", "33142", None]
+    att = pd.DataFrame({
+        "registration_form_id": [f"r{i % (n_att - 20)}" for i in range(n_att)],  # some repeated ids
+        "first_name_att": rng.choice(first, n_att),
+        "last_name_att": rng.choice(last, n_att),
+        "dob_raw_att": rng.choice(dobs, n_att),
+        "zip_raw_att": rng.choice(zips, n_att),
+        "type_code": rng.choice(["Status change", "Duplicate"], n_att),
+        "confidence_score": rng.random(n_att),
+        "county": "DAD",  # also on the voterfile: suffixed in the output
+    })
+    vf = pd.DataFrame({
+        "voter_id": rng.integers(0, n_vf // 2, n_vf).astype(str),  # some voters on several rows
+        "first_name_vf": rng.choice(first, n_vf),
+        "last_name_vf": rng.choice(last, n_vf),
+        "dob_raw_vf": rng.choice(dobs, n_vf),
+        "zip_raw_vf": rng.choice(zips, n_vf),
+        "county": "DAD",
+    })
+    return add_normalized_keys(att, vf)
+
+
+def merge_gold_pairs(att_df, vf_df):
+    """The plain-merge construction build_gold_pairs must reproduce."""
+    clean_pairs = att_df.merge(
+        vf_df,
+        left_on=["fn_norm_att", "ln_norm_att", "dob_norm_att", "zip_norm_att"],
+        right_on=["fn_norm_vf", "ln_norm_vf", "dob_norm_vf", "zip_norm_vf"],
+        how="inner",
+        suffixes=("_att", "_vf"),
+    )
+    pos_df = clean_pairs[[
+        "registration_form_id",
+        "first_name_att", "last_name_att", "dob_norm_att", "zip_norm_att",
+        "first_name_vf", "last_name_vf", "dob_norm_vf", "zip_norm_vf"
+    ]].copy()
+    pos_df["is_match"] = 1
+    counts = clean_pairs.groupby("registration_form_id")["voter_id"].nunique()
+    good = counts[counts == 1].index
+    return pos_df, clean_pairs[clean_pairs["registration_form_id"].isin(good)].copy()
+
+
+class TestGoldPairs(unittest.TestCase):
+    def test_matches_plain_merge(self):
+        att, vf = make_frames()
+        expected_pos, expected_gold = merge_gold_pairs(att, vf)
+        self.assertGreater(len(expected_gold), 0)
+        self.assertGreater(len(expected_pos), len(expected_gold))
+
+        pos_df, gold_pairs, att_out = build_gold_pairs(att, vf)
+        pd.testing.assert_frame_equal(pos_df, expected_pos)
+        pd.testing.assert_frame_equal(gold_pairs, expected_gold)
+        self.assertIs(att_out, att)
+
+    def test_partitioned_matches_in_memory(self):
+        att, vf = make_frames(seed=1)
+        expected = build_gold_pairs(att, vf)
+        chunks = [vf.iloc[i:i + 150].reset_index(drop=True) for i in range(0, len(vf), 150)]
+        for n_partitions in (1, 4):
+            pos_df, gold_pairs, _ = build_gold_pairs_partitioned(att, iter(chunks), n_partitions=n_partitions)
+            pd.testing.assert_frame_equal(pos_df, expected[0])
+            pd.testing.assert_frame_equal(gold_pairs, expected[1])
+
+        with self.assertRaises(ValueError):
+            build_gold_pairs_partitioned(att, iter([]))
+
+
+if __name__ == "__main__":
+    unittest.main()
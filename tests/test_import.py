@@ -11,7 +11,7 @@ from matching.features.feature_builder import *
 from matching.config.column_map import *
 from matching.config.match_config import *
 
-class TestImports(unsttest.TestCase):
+class TestImports(unittest.TestCase):
     def test_imports(self):
         self.assertTrue(True)  # If any import fails, test will error out
 
@@ -0,0 +1,80 @@
+import os
+import sys
+import unittest
+
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from matching.candidates.prepared_attempts import prepare_attempts
+from matching.features.name_normalization import NAME_CACHE
+from tests.test_cascade import fit_bundle
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+import inference_streaming  # noqa: E402
+
+
+def make_attempts():
+    return prepare_attempts(pd.DataFrame({
+        "registration_form_id": ["a1", "a2", "a3", "a4"],
+        "first_name_att": ["maria", "jose", "ana", "luis"],
+        "last_name_att": ["garcia", "lopez", "diaz", "gomez"],
+        "dob_raw_att": ["1980-01-02", "1975-05-06", "1990-03-04", "1960-07-08"],
+        "zip_raw_att": ["33125", "33130", "33142", "33125"],
+        "voting_street_address_one": "1 main st",
+    }))
+
+
+def make_vf_chunks():
+    # chunks as voterfile_chunks yields them (MATCHING_VOTERFILE_COL_MAP names), uneven sizes
+    people = [
+        ("maria", "garcia", "1980-01-02", "33125"),
+        ("mario", "garcia", "1980-03-02", "33125"),
+        ("jose", "lopez", "1975-05-06", "33130"),
+        ("ana", "diaz", "1990-03-04", "33142"),
+        ("luis", "gomez", "1960-07-08", "33125"),
+        ("luisa", "gomez", "1960-01-01", "33130"),
+    ]
+    chunks = []
+    for idx, size in enumerate([3, 1, 2, 4]):
+        rows = [people[(idx + i) % len(people)] for i in range(size)]
+        chunks.append(pd.DataFrame({
+            "voter_id": [f"c{idx}v{i}" for i in range(size)],
+            "first_name": [r[0] for r in rows],
+            "last_name": [r[1] for r in rows],
+            "birth_date": [r[2] for r in rows],
+            "residence_zipcode": [r[3] for r in rows],
+            "residence_address_1": "1 main st",
+        }))
+    return chunks
+
+
+class TestParallelInference(unittest.TestCase):
+    def test_parallel_results_in_order_and_resumable(self):
+        attempts = make_attempts()
+        model = fit_bundle(LogisticRegression(max_iter=1000))
+        chunks = make_vf_chunks()
+        progress = {"1": True}  # chunk 1 was written by an earlier run
+        NAME_CACHE.clear()  # forked workers start from this (empty) cache
+
+        init_args = (attempts, model, None, 0, False, None)
+        results = list(inference_streaming._parallel_results(
+            inference_streaming.pending_chunks(iter(chunks), progress), 2, 2, init_args
+        ))
+
+        self.assertEqual([idx for idx, _, _ in results], [0, 2, 3])
+        for idx, candidates, cache_update in results:
+            expected = inference_streaming.process_chunk(idx, chunks[idx].copy(), attempts.copy(), model)
+            pd.testing.assert_frame_equal(candidates, expected)
+            self.assertGreater(cache_update["hits"] + cache_update["misses"], 0)
+
+        # the writer merges what the workers normalized into its own cache
+        NAME_CACHE.clear()  # drop what the serial process_chunk calls above added
+        for _, _, cache_update in results:
+            inference_streaming.merge_name_cache_update(cache_update)
+        self.assertIn("mario", NAME_CACHE)
+        self.assertGreater(NAME_CACHE.stats()["misses"], 0)
+        NAME_CACHE.clear()
+
+
+if __name__ == "__main__":
+    unittest.main()
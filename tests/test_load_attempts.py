@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from matching.loaders.load_attempts import (
+    attach_match_labels,
+    filter_dataframe_by_columns,
+    load_attempts,
+    load_matches,
+)
+
+
+ATTEMPTS_CSV = (
+    "registration_form_id,first_name,last_name,date_of_birth,voting_zipcode,gender,upload_time,"
+    "voting_address_latitude,internal_notes\n"
+    "00017,ana,diaz,1980-01-02,03125,F,2025-01-02 10:00:00,25.7,x\n"
+    "00018,jose,,1975-05-06,33130,M,2024-12-31T20:00:00-05:00,,y\n"
+    "00019,luis,perez,,,,,25.8,z\n"
+)
+MATCHES_CSV = "registration_form_id,type_code,confidence_score,reviewer\n00017,Status change,0.9,a\n00019,Duplicate,,b\n"
+
+
+class TestLoadAttempts(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.attempts_path = os.path.join(self.tmp.name, "vr_blocks_export.csv")
+        self.matches_path = os.path.join(self.tmp.name, "vr_match_export.csv")
+        with open(self.attempts_path, "w") as f:
+            f.write(ATTEMPTS_CSV)
+        with open(self.matches_path, "w") as f:
+            f.write(MATCHES_CSV)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_typed_projection(self):
+        att = load_attempts(self.attempts_path)
+        self.assertNotIn("internal_notes", att.columns)
+        self.assertEqual(att["registration_form_id"].tolist(), ["00017", "00018", "00019"])
+        self.assertEqual(att.loc[0, "voting_zipcode"], "03125")
+        self.assertIsInstance(att["gender"].dtype, pd.CategoricalDtype)
+        self.assertEqual(att["voting_address_latitude"].dtype, "float64")
+        # the year as written, not shifted into 2025 by a UTC conversion
+        self.assertEqual(att["upload_time"].dt.year.tolist()[:2], [2025, 2024])
+        self.assertEqual(att.loc[1, "upload_time"], pd.Timestamp("2024-12-31 20:00:00"))
+        self.assertTrue(pd.isna(att.loc[2, "upload_time"]))
+
+        matches = load_matches(self.matches_path)
+        self.assertEqual(list(matches.columns), ["registration_form_id", "type_code", "confidence_score"])
+        labeled = attach_match_labels(att, matches)
+        self.assertEqual(labeled["registration_form_id"].tolist(), ["00017", "00019"])
+
+    def test_parquet_cache(self):
+        cache_dir = os.path.join(self.tmp.name, "cache")
+        first = load_attempts(self.attempts_path, cache_dir=cache_dir)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        pd.testing.assert_frame_equal(load_attempts(self.attempts_path, cache_dir=cache_dir), first)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+        # a changed file (size differs) is read again under a new key
+        with open(self.attempts_path, "a") as f:
+            f.write("00020,rosa,lopez,1990-03-04,33142,F,2025-06-01 08:00:00,,w\n")
+        self.assertEqual(len(load_attempts(self.attempts_path, cache_dir=cache_dir)), 4)
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+
+class TestFilterDataframeByColumns(unittest.TestCase):
+    def test_null_tokens(self):
+        df = pd.DataFrame({
+            "first_name_att": pd.Series([" ana", "NULL", None, "jose", " Undefined ", "ana"], dtype="str"),
+            "last_name_att": pd.Categorical(["diaz", "lopez", "perez", " nan", "gomez", "diaz "]),
+            "registration_form_id": ["r1", "r2", "r3", "r4", "r5", "r1"],
+        })
+        null_counts = {}
+        out = filter_dataframe_by_columns(df, ["first_name_att", "last_name_att"], null_counts=null_counts)
+        self.assertEqual(null_counts, {"first_name_att": 3, "last_name_att": 1})
+        self.assertEqual(out.index.tolist(), [0, 5])
+        self.assertEqual(out["first_name_att"].tolist(), ["ana", "ana"])
+        self.assertEqual(out["last_name_att"].tolist(), ["diaz", "diaz"])
+        # the input frame is left as it was
+        self.assertEqual(df.loc[0, "first_name_att"], " ana")
+
+        deduped = filter_dataframe_by_columns(df, ["first_name_att"], unique_col="registration_form_id")
+        self.assertEqual(deduped["registration_form_id"].tolist(), ["r1", "r4"])
+        with self.assertRaises(ValueError):
+            filter_dataframe_by_columns(df, ["missing"])
+
+
+if __name__ == "__main__":
+    unittest.main()
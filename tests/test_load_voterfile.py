@@ -0,0 +1,61 @@
+import unittest
+
+import pandas as pd
+from sqlalchemy import create_engine, event
+
+from matching.config.column_map import MATCHING_VOTERFILE_COL_MAP
+from matching.loaders.load_voterfile import standardize_voterfile_columns, stream_voterfile
+
+
+def make_engine(n=25):
+    # SQLite stand-in for the Postgres voterfile table
+    engine = create_engine("sqlite://")
+    pd.DataFrame({
+        "voter_id": [f"v{i}" for i in range(n)],
+        "first_name": [f"name{i}" for i in range(n)],
+        "last_name": "garcia",
+        "birth_date": "1980-01-02",
+        "residence_zipcode": "33125",
+        "residence_address_1": [f"{i} main st" for i in range(n)],
+        "county": ["DAD", "BRO"] * (n // 2) + ["DAD"] * (n % 2),
+        "not_mapped": 1.5,
+    }).to_sql("election_detail", engine, index=False)
+    return engine
+
+
+class TestStreamVoterfile(unittest.TestCase):
+    def test_projects_renames_and_chunks(self):
+        engine = make_engine()
+        sql = "SELECT * FROM election_detail WHERE county = 'DAD';"
+        streamed = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def record(conn, cursor, statement, parameters, context, executemany):
+            streamed.append((statement, context.execution_options.get("stream_results", False)))
+
+        stats = {}
+        chunks = list(stream_voterfile(engine, sql, chunksize=5, stats=stats))
+        self.assertEqual([len(c) for c in chunks], [5, 5, 3])
+        self.assertEqual(stats["rows"], 13)
+        self.assertEqual(stats["chunks"], 3)
+        self.assertGreater(stats["bytes"], 0)
+
+        # same rows and names as reading everything and standardizing in pandas
+        expected = standardize_voterfile_columns(pd.read_sql_query(sql.rstrip(";"), engine))
+        result = pd.concat(chunks, ignore_index=True)
+        pd.testing.assert_frame_equal(result, expected)
+        self.assertNotIn("not_mapped", result.columns)
+
+        # the row query (not the LIMIT 0 column probe) ran with stream_results
+        self.assertTrue(any(flag and "AS vf" in stmt and "LIMIT 0" not in stmt for stmt, flag in streamed))
+
+    def test_custom_map(self):
+        engine = make_engine(4)
+        chunk = next(stream_voterfile(engine, "SELECT * FROM election_detail", col_map=MATCHING_VOTERFILE_COL_MAP))
+        self.assertEqual(list(chunk.columns), list(MATCHING_VOTERFILE_COL_MAP.values()))
+        with self.assertRaises(ValueError):
+            next(stream_voterfile(engine, "SELECT * FROM election_detail", col_map={"missing": "x"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
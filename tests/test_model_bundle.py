@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from matching.features.feature_builder import add_features
+from matching.modeling.model_bundle import ModelBundle, load_model_bundle, save_model_bundle
+
+
+FEATURES = ["ln_jw", "zip_exact"]
+
+
+def make_candidates():
+    return pd.DataFrame({
+        "first_name_att": ["ana", "luis", "rosa", "juan"],
+        "first_name_vf": ["ana", "jose", "rosa", "maria"],
+        "last_name_att": ["diaz", "perez", "lopez", "garcia"],
+        "last_name_vf": ["diaz", "gomez", "lopes", "smith"],
+        "zip_norm_att": pd.Series(["33125", "33130", "33142", "33125"], dtype="string"),
+        "zip_norm_vf": pd.Series(["33125", "33131", "33142", "33135"], dtype="string"),
+    })
+
+
+def fit_model():
+    X = pd.DataFrame({"ln_jw": [1.0, 0.4, 0.9, 0.3], "zip_exact": [1, 0, 1, 0]})
+    return LogisticRegression().fit(X, [1, 0, 1, 0])
+
+
+class TestModelBundle(unittest.TestCase):
+    def test_round_trip_drives_features(self):
+        bundle = ModelBundle(fit_model(), FEATURES, metrics={"auc": 1.0})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "model.pkl")
+            save_model_bundle(bundle, path)
+            loaded = load_model_bundle(path)
+        self.assertEqual(loaded.feature_cols, FEATURES)
+        self.assertEqual(loaded.metrics, {"auc": 1.0})
+
+        # no DOB or address columns: the bundle's features do not need them
+        X, _ = add_features(make_candidates(), model=loaded)
+        self.assertEqual(list(X.columns), FEATURES)
+        self.assertEqual(loaded.predict_proba(X).shape, (4, 2))
+        with self.assertRaises(ValueError):
+            loaded.predict_proba(X[FEATURES[::-1]])
+
+    def test_rejects_mismatched_schema(self):
+        with self.assertRaises(ValueError):
+            ModelBundle(fit_model(), FEATURES[::-1])
+        with self.assertRaises(ValueError):
+            ModelBundle(fit_model(), ["ln_jw", "not_a_feature"])
+
+        bundle = ModelBundle(fit_model(), FEATURES, normalization_version="stale")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "model.pkl")
+            save_model_bundle(bundle, path)
+            with self.assertRaises(ValueError):
+                load_model_bundle(path)
+            self.assertEqual(load_model_bundle(path, check_normalization=False).feature_cols, FEATURES)
+
+    def test_bare_estimator_is_wrapped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "model.pkl")
+            joblib.dump(fit_model(), path)
+            bundle = load_model_bundle(path)
+        self.assertEqual(bundle.feature_cols, FEATURES)
+        X = pd.DataFrame({"ln_jw": [0.5], "zip_exact": [1]})
+        np.testing.assert_array_equal(bundle.predict_proba(X), bundle.estimator.predict_proba(X))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from matching.features.name_normalization import (
+    normalize_name,
+    normalize_name_series,
+    load_name_cache,
+    save_name_cache,
+)
+from matching.utils.cache import LRUCache
+
+
+class TestNormalizeNameSeries(unittest.TestCase):
+    def test_matches_per_row_normalization(self):
+        names = pd.Series(["José", " Bill", None, "SMITH-JONES", np.nan, "José", "liz "], index=range(10, 17))
+        expected = names.fillna("").astype(str).str.strip().apply(normalize_name)
+        result = normalize_name_series(names, cache=LRUCache(100))
+        pd.testing.assert_series_equal(result, expected)
+
+    def test_cache_counts_distinct_values_once(self):
+        cache = LRUCache(100)
+        normalize_name_series(pd.Series(["ana", "ana", "luis"]), cache=cache)
+        self.assertEqual(cache.stats()["misses"], 2)
+        normalize_name_series(pd.Series(["ana", "luis", "luis"]), cache=cache)
+        self.assertEqual(cache.stats()["hits"], 2)
+
+    def test_persisted_cache_roundtrip(self):
+        cache = LRUCache(100)
+        normalize_name_series(pd.Series(["Bill", "Pepe"]), cache=cache)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "names.json")
+            save_name_cache(path, cache)
+            warm = LRUCache(100)
+            self.assertEqual(load_name_cache(path, warm), 2)
+            self.assertEqual(warm.get("Pepe"), "joseph")
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from matching.features.address_features import compute_address_similarity
+from matching.negatives.address_negatives import generate_address_negatives
+from matching.negatives.hard_negatives import build_vf_indexes, generate_hard_negatives
+from matching.negatives.sampling import PositionIndex, sample_excluding
+
+
+STREETS = ["main st", "main street", "ocean dr", "nw 7th st", "brickell ave"]
+
+
+def make_people(n, side, seed):
+    rng = np.random.default_rng(seed)
+    house = rng.choice(["12", "45", "900"], n).astype(object)
+    address = pd.Series([f"{h} {s}" for h, s in zip(house, rng.choice(STREETS, n))], dtype=object)
+    address[rng.random(n) < 0.1] = None
+    col = "voting_street_address_one" if side == "att" else "residence_address_1"
+    df = pd.DataFrame({
+        f"first_name_{side}": rng.choice(["ana", "luis", "maria"], n),
+        f"last_name_{side}": rng.choice(["garcia", "perez"], n),
+        f"dob_norm_{side}": pd.to_datetime(rng.choice(["1990-01-02", "1985-05-06"], n)),
+        f"zip_norm_{side}": rng.choice(["33125", "33130"], n),
+        col: address,
+    })
+    if side == "att":
+        df.insert(0, "registration_form_id", np.arange(n))
+    else:
+        df.insert(0, "voter_id", [f"V{i}" for i in range(n)])
+    return df
+
+
+class TestAddressNegatives(unittest.TestCase):
+    def test_matches_brute_force_within_index_keys(self):
+        pos = make_people(30, "att", 0)
+        vf = make_people(200, "vf", 1)
+        result = generate_address_negatives(pos, vf, max_per_positive=1000, max_total=10**6, seed=0)
+
+        expected = set()
+        for i, p in pos.iterrows():
+            for j, v in vf.iterrows():
+                if p["zip_norm_att"] != v["zip_norm_vf"] or p["voting_street_address_one"] is None \
+                        or v["residence_address_1"] is None \
+                        or p["voting_street_address_one"].split()[0] != v["residence_address_1"].split()[0]:
+                    continue
+                sim = compute_address_similarity(p["voting_street_address_one"], v["residence_address_1"])
+                if sim >= 0.8 and (p["first_name_att"] != v["first_name_vf"] or p["dob_norm_att"] != v["dob_norm_vf"]):
+                    expected.add((p["registration_form_id"], v["first_name_vf"], v["dob_norm_vf"], v["zip_norm_vf"]))
+
+        got = set(zip(result["registration_form_id"], result["first_name_vf"], result["dob_norm_vf"], result["zip_norm_vf"]))
+        self.assertEqual(got, expected)
+        self.assertTrue((result["is_match"] == 0).all())
+
+    def test_caps_and_seed(self):
+        pos = make_people(30, "att", 2)
+        vf = make_people(300, "vf", 3)
+        a = generate_address_negatives(pos, vf, max_per_positive=2, max_total=25, seed=7)
+        b = generate_address_negatives(pos, vf, max_per_positive=2, max_total=25, seed=7)
+        pd.testing.assert_frame_equal(a, b)
+        self.assertLessEqual(len(a), 25)
+        self.assertLessEqual(a.groupby("registration_form_id").size().max(), 2)
+
+    def test_missing_address_columns_give_no_negatives(self):
+        pos = make_people(5, "att", 4).drop(columns=["voting_street_address_one"])
+        result = generate_address_negatives(pos, make_people(20, "vf", 5))
+        self.assertTrue(result.empty)
+
+
+class TestPositionIndex(unittest.TestCase):
+    def test_groups_match_groupby(self):
+        vf = make_people(200, "vf", 6)
+        vf["fn_norm_vf"] = vf["first_name_vf"].where(vf.index % 7 != 0, None)
+        vf["ln_norm_vf"] = vf["last_name_vf"]
+        zip_index, dob_index, name_index = build_vf_indexes(vf)
+
+        for key, group in vf.groupby("zip_norm_vf"):
+            _, rows = zip_index.expand(zip_index.groups(pd.Series([key])))
+            self.assertEqual(sorted(rows), list(group.index))
+
+        query = pd.DataFrame({"fn0": ["a", "z", None], "ln0": ["g", "g", "g"]})
+        sizes = name_index.sizes(name_index.groups(query))
+        expected = ((vf["fn_norm_vf"].str[0] == "a") & (vf["ln_norm_vf"].str[0] == "g")).sum()
+        self.assertEqual(sizes.tolist(), [expected, 0, 0])
+
+    def test_sample_excluding_respects_filter_and_seed(self):
+        keys = pd.Series(["a"] * 50 + ["b"] * 3 + ["c"] * 10)
+        index = PositionIndex(keys)
+        groups = index.groups(pd.Series(["a", "b", "c", "d", None] * 20))
+        # one valid row in group "a" and none in "b" force the enumeration fallback
+        valid_rows = np.concatenate([[10], np.arange(53, 63)])
+
+        def is_valid(query_pos, rows):
+            return np.isin(rows, valid_rows)
+
+        draws = sample_excluding(index, groups, is_valid, np.random.default_rng(3))
+        again = sample_excluding(index, groups, is_valid, np.random.default_rng(3))
+        np.testing.assert_array_equal(draws, again)
+
+        by_key = dict(zip(["a", "b", "c", "d", None], draws.reshape(20, 5).T))
+        self.assertTrue((by_key["a"] == 10).all())
+        self.assertTrue((by_key["b"] == -1).all())
+        self.assertTrue(np.isin(by_key["c"], np.arange(53, 63)).all())
+        self.assertTrue((by_key["d"] == -1).all() and (by_key[None] == -1).all())
+
+
+class TestHardNegatives(unittest.TestCase):
+    def setUp(self):
+        self.pos = make_people(100, "att", 8)
+        self.vf = make_people(500, "vf", 9)
+        self.vf["fn_norm_vf"] = self.vf["first_name_vf"]
+        self.vf["ln_norm_vf"] = self.vf["last_name_vf"]
+
+    def test_mix_counts_filters_and_seed(self):
+        mix = {"zip": 1, "dob": 2, "initials": 0, "random": 0.5, "address": 0, "phonetic": 0}
+        a = generate_hard_negatives(self.pos, self.vf, seed=11, mix=mix)
+        b = generate_hard_negatives(self.pos, self.vf, seed=11, mix=mix)
+        pd.testing.assert_frame_equal(a, b)
+
+        per_positive = a.groupby("registration_form_id").size()
+        self.assertTrue(per_positive.between(3, 4).all())
+        self.assertTrue((a["is_match"] == 0).all())
+        self.assertEqual(a["registration_form_id"].tolist(), sorted(a["registration_form_id"]))
+
+    def test_unknown_strategy_raises(self):
+        with self.assertRaises(ValueError):
+            generate_hard_negatives(self.pos, self.vf, mix={"zipcode": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
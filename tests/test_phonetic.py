@@ -0,0 +1,38 @@
+import unittest
+
+import pandas as pd
+
+from matching.utils.cache import LRUCache
+from matching.utils.phonetic import double_metaphone, phonetic_series, soundex
+
+
+class TestPhonetic(unittest.TestCase):
+    def test_soundex_reference_codes(self):
+        expected = {
+            "Robert": "R163", "Rupert": "R163", "Rubin": "R150", "Ashcraft": "A261",
+            "Tymczak": "T522", "Pfister": "P236", "Honeyman": "H555", "Lee": "L000",
+            "José": "J200", "Jose": "J200", "": "", None: "",
+        }
+        for name, code in expected.items():
+            self.assertEqual(soundex(name), code, name)
+
+    def test_double_metaphone(self):
+        self.assertEqual(double_metaphone("Smith"), double_metaphone("Smyth"))
+        self.assertEqual(double_metaphone(None), "")
+
+    def test_series_encodes_each_distinct_name_once(self):
+        cache = LRUCache(100)
+        names = pd.Series(["maria", "Maria", None, "", "maria", "smith-jones"], index=[5, 4, 3, 2, 1, 0])
+        codes = phonetic_series(names, cache=cache)
+        self.assertIsInstance(codes.dtype, pd.CategoricalDtype)
+        self.assertEqual(list(codes.index), list(names.index))
+        self.assertEqual(codes.astype(object).where(codes.notna(), None).tolist(),
+                         ["M600", "M600", None, None, "M600", "S532"])
+        self.assertEqual(cache.misses, 4)
+
+        phonetic_series(names, cache=cache)
+        self.assertEqual(cache.hits, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import tempfile
+import unittest
+
+import pandas as pd
+
+from matching.modeling.prediction_store import (
+    PREDICTION_SCHEMA,
+    open_prediction_dataset,
+    write_dataset_metadata,
+    write_prediction_chunk,
+)
+
+
+def make_scored(ids, probs, **extra):
+    return pd.DataFrame({
+        "registration_form_id": ids,
+        "voter_id": [f"V{i}" for i in range(len(ids))],
+        "first_name_att": ["ana"] * len(ids),
+        "last_name_att": ["garcia"] * len(ids),
+        "dob_norm_att": pd.to_datetime(["1990-01-02"] * len(ids)),
+        "zip_norm_att": ["33125"] * len(ids),
+        "first_name_vf": ["ana"] * len(ids),
+        "last_name_vf": ["garcia"] * len(ids),
+        "dob_norm_vf": pd.to_datetime([None] * len(ids)),
+        "zip_norm_vf": [None] * len(ids),
+        "ln0": ["g"] * len(ids),
+        "match_prob": probs,
+        **extra,
+    })
+
+
+class TestPredictionStore(unittest.TestCase):
+    def test_chunks_share_schema_and_merge_by_metadata(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_prediction_chunk(make_scored([1, 2], [0.9, 0.1]), 0, tmp)
+            write_prediction_chunk(make_scored(["3"], [0.5], block_pass=["zip_fn0"]), 1, tmp)
+            # rewriting a chunk (resume) replaces it rather than appending
+            write_prediction_chunk(make_scored([1, 2], [0.8, 0.2]), 0, tmp)
+
+            summary = write_dataset_metadata(tmp)
+            self.assertEqual(summary, {"n_files": 2, "n_rows": 3})
+
+            dataset = open_prediction_dataset(tmp)
+            for name in PREDICTION_SCHEMA.names:
+                self.assertEqual(dataset.schema.field(name).type, PREDICTION_SCHEMA.field(name).type)
+            self.assertNotIn("ln0", dataset.schema.names)
+
+            table = dataset.to_table(columns=["registration_form_id", "match_prob", "block_pass", "chunk"])
+            df = table.to_pandas().sort_values("registration_form_id", ignore_index=True)
+
+        self.assertEqual(df["registration_form_id"].tolist(), ["1", "2", "3"])
+        self.assertEqual(df["match_prob"].tolist(), [0.8, 0.2, 0.5])
+        self.assertEqual(df["chunk"].tolist(), [0, 0, 1])
+        self.assertTrue(pd.isna(df.loc[0, "block_pass"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
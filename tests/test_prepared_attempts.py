@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from matching.candidates.block_candidates import block_candidate_pairs
+from matching.candidates.prepared_attempts import load_prepared_attempts
+from matching.gold.gold_pairs import add_normalized_keys, normalize_voterfile_keys
+
+
+def make_attempts():
+    return pd.DataFrame({
+        "registration_form_id": [1, 2, 3, 4],
+        "first_name_att": ["Ana", "luis", "Maria", None],
+        "last_name_att": ["Garcia", "gomez", None, "Perez"],
+        "zip_raw_att": ["33125-1234", "33130", None, "33125"],
+        "dob_raw_att": ["1990-01-02", None, "1985-05-06", "1990-03-04"],
+    }, index=[10, 11, 13, 17])
+
+
+def make_vf_chunk():
+    return pd.DataFrame({
+        "voter_id": ["V1", "V2", "V3", "V4"],
+        "first_name_vf": ["ana", "luis", "maria", "joe"],
+        "last_name_vf": ["garcia", "Gomez", "perez", None],
+        "zip_raw_vf": ["33125", "33130", "33125", None],
+        "dob_raw_vf": ["1990-01-02", None, "1990-07-08", "1985-05-06"],
+    })
+
+
+class TestPreparedAttempts(unittest.TestCase):
+    def test_cached_frame_blocks_like_per_chunk_normalization(self):
+        calls = []
+
+        def load_fn(path):
+            calls.append(path)
+            return make_attempts()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            attempts_path = os.path.join(tmp, "attempts.csv")
+            make_attempts().to_csv(attempts_path)
+            first = load_prepared_attempts(attempts_path, load_fn, cache_dir=tmp)
+            second = load_prepared_attempts(attempts_path, load_fn, cache_dir=tmp)
+
+        self.assertEqual(len(calls), 1)
+        pd.testing.assert_frame_equal(first, second)
+
+        att, vf = add_normalized_keys(make_attempts(), make_vf_chunk())
+        expected = block_candidate_pairs(att, vf)
+        from_cache = block_candidate_pairs(second, normalize_voterfile_keys(make_vf_chunk()))
+        pd.testing.assert_frame_equal(expected, from_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
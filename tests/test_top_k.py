@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from matching.modeling.top_k import TopKReducer, top_k_state_path
+
+
+def make_chunks(n_chunks=4, seed=0):
+    rng = np.random.default_rng(seed)
+    chunks = []
+    for c in range(n_chunks):
+        n = 40
+        chunks.append(pd.DataFrame({
+            "registration_form_id": rng.integers(0, 10, n),
+            "voter_id": [f"V{c}_{i}" for i in range(n)],
+            # coarse probabilities so ties across chunks are common
+            "match_prob": rng.integers(0, 5, n) / 4,
+            "ln0": "g",
+        }))
+    return chunks
+
+
+class TestTopKReducer(unittest.TestCase):
+    def test_best_matches_equal_full_idxmax(self):
+        chunks = make_chunks()
+        reducer = TopKReducer(k=2)
+        for idx, chunk in enumerate(chunks):
+            reducer.update(chunk, idx)
+            # folding a chunk twice (resume after a crash) changes nothing
+            reducer.update(chunk, idx)
+        self.assertLessEqual(len(reducer), 2 * 10)
+
+        merged = pd.concat(chunks, ignore_index=True)
+        expected = merged.loc[merged.groupby("registration_form_id")["match_prob"].idxmax()]
+        best = reducer.best_matches().sort_values("registration_form_id", key=lambda s: s.astype(int))
+        self.assertEqual(best["voter_id"].tolist(), expected["voter_id"].tolist())
+
+        runner_up = merged.groupby("registration_form_id")["match_prob"].apply(
+            lambda p: p.nlargest(2).iloc[-1] if len(p) > 1 else np.nan
+        )
+        np.testing.assert_array_equal(best["second_prob"].to_numpy(), runner_up.to_numpy())
+        np.testing.assert_array_equal(
+            best["margin"].to_numpy(), expected["match_prob"].to_numpy() - runner_up.fillna(0.0).to_numpy()
+        )
+        self.assertNotIn("ln0", best.columns)
+
+    def test_save_and_load_resume(self):
+        chunks = make_chunks(seed=1)
+        full = TopKReducer(k=3)
+        for idx, chunk in enumerate(chunks):
+            full.update(chunk, idx)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "top_k.parquet")
+            first = TopKReducer(k=3)
+            first.update(chunks[0], 0)
+            first.update(chunks[1], 1)
+            first.save(path)
+            resumed = TopKReducer(k=3)
+            self.assertEqual(resumed.load(path), len(first))
+
+        for idx, chunk in enumerate(chunks[2:], start=2):
+            resumed.update(chunk, idx)
+        pd.testing.assert_frame_equal(resumed.best_matches(), full.best_matches())
+
+    def test_refold_replaces_chunk_rows(self):
+        chunks = make_chunks(seed=2)
+        reducer = TopKReducer(k=2)
+        for idx, chunk in enumerate(chunks):
+            reducer.update(chunk, idx)
+
+        self.assertTrue((reducer.state.loc[reducer.state["chunk"] == 1, "match_prob"] > 0).any())
+
+        # chunk 1 re-scored (e.g. by a new model): none of its old probabilities survive
+        reducer.update(chunks[1].assign(match_prob=0.0), 1)
+        self.assertTrue((reducer.state.loc[reducer.state["chunk"] == 1, "match_prob"] == 0).all())
+        self.assertFalse(reducer.state.duplicated(["registration_form_id", "voter_id"]).any())
+
+        reducer.update(chunks[1].iloc[0:0], 1)
+        self.assertNotIn(1, reducer.state["chunk"].tolist())
+
+    def test_state_path_keyed_by_inputs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            attempts_path = os.path.join(tmp, "attempts.csv")
+            model_path = os.path.join(tmp, "model.pkl")
+            for path, text in ((attempts_path, "a\n1\n"), (model_path, "m1")):
+                with open(path, "w") as f:
+                    f.write(text)
+            path = top_k_state_path(attempts_path, model_path, "sql:x", tmp)
+            self.assertEqual(path, top_k_state_path(attempts_path, model_path, "sql:x", tmp))
+            self.assertNotEqual(path, top_k_state_path(attempts_path, model_path, "sql:y", tmp))
+            with open(model_path, "w") as f:
+                f.write("m2")
+            self.assertNotEqual(path, top_k_state_path(attempts_path, model_path, "sql:x", tmp))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import datetime
+import hashlib
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from matching.config.column_map import MATCHING_VOTERFILE_COL_MAP
+from matching.loaders.voterfile_snapshot import (
+    export_voterfile_snapshot,
+    load_snapshot_meta,
+    load_voterfile_snapshot,
+    stream_voterfile_snapshot,
+)
+
+
+CSV_TEXT = (
+    "voter_id,first_name,last_name,birth_date,residence_zipcode,residence_address_1,county\n"
+    + "".join(f"{i:05d},name{i},diaz,1980-01-{i % 28 + 1:02d},0312{i % 10},{i} main st,DAD\n" for i in range(30))
+    + "99999,,lopez,,,,\n"
+)
+
+
+class CopyCursor:
+    """Stand-in for a psycopg2 cursor: COPY ... TO STDOUT writes CSV_TEXT in pieces."""
+
+    def copy_expert(self, sql, f):
+        assert sql.startswith("COPY (SELECT * FROM voterfile.election_detail_2024) TO STDOUT")
+        for start in range(0, len(CSV_TEXT), 100):
+            f.write(CSV_TEXT[start:start + 100])
+
+    def close(self):
+        pass
+
+
+class CopyEngine:
+    def raw_connection(self):
+        engine = self
+
+        class Conn:
+            def cursor(self):
+                return CopyCursor()
+
+            def close(self):
+                engine.closed = True
+
+        return Conn()
+
+
+class TestVoterfileSnapshot(unittest.TestCase):
+    def test_export_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = CopyEngine()
+            meta = export_voterfile_snapshot(engine, "SELECT * FROM voterfile.election_detail_2024;", "vf", tmp)
+            path = os.path.join(tmp, "vf.parquet")
+            self.assertTrue(engine.closed)
+            self.assertEqual(sorted(os.listdir(tmp)), ["vf.json", "vf.parquet"])
+            self.assertEqual(meta["rows"], 31)
+            self.assertEqual(meta["sha1"], hashlib.sha1(CSV_TEXT.encode()).hexdigest())
+            self.assertEqual(load_snapshot_meta(path)["sha1"], meta["sha1"])
+
+            df = load_voterfile_snapshot(path, col_map=None)
+            # typed: ids and ZIPs keep leading zeros, dates are dates, county is dictionary-encoded
+            self.assertEqual(df.loc[0, "voter_id"], "00000")
+            self.assertEqual(df.loc[0, "residence_zipcode"], "03120")
+            self.assertEqual(df.loc[0, "birth_date"], datetime.date(1980, 1, 1))
+            self.assertIsInstance(df["county"].dtype, pd.CategoricalDtype)
+            self.assertTrue(df.iloc[-1][["first_name", "birth_date", "county"]].isna().all())
+
+            projected = load_voterfile_snapshot(path, col_map=MATCHING_VOTERFILE_COL_MAP)
+            self.assertEqual(list(projected.columns), list(MATCHING_VOTERFILE_COL_MAP.values()))
+
+            stats = {}
+            chunks = list(stream_voterfile_snapshot(path, col_map=MATCHING_VOTERFILE_COL_MAP, chunksize=8, stats=stats))
+            self.assertEqual([len(c) for c in chunks], [8, 8, 8, 7])
+            self.assertEqual(stats["rows"], 31)
+            pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), projected)
+
+
+if __name__ == "__main__":
+    unittest.main()